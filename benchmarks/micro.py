@@ -0,0 +1,297 @@
+"""Microbenchmarks
+
+This times the hot functions of the simulation core (QUBO formulations, attention
+allocation, movement, and reporting) with local samplers standing in for the QPU.
+The first run saves the results as a baseline; later runs are compared against it
+and every benchmark that got slower than the threshold is flagged. Run it from the
+repository's root:
+
+    python -m benchmarks.micro            # compare against (or create) the baseline
+    python -m benchmarks.micro --update   # overwrite the baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import numpy as np
+import classical as classical_mod
+from models import attention as attention_mod
+from models import attention_classical as attention_classical_mod
+from models import movement as movement_mod
+from models import movement_exact as movement_exact_mod
+from models import sampler as sampler_mod
+from characters import agent as agent_mod
+from characters import predator as predator_mod
+from characters import prey as prey_mod
+from characters import trace as trace_mod
+
+# File the baseline is stored in
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# A benchmark is flagged if it is this much slower than the baseline (0.2 is 20%)
+THRESHOLD = 0.2
+# Number of timed repetitions per benchmark (the fastest is compared)
+REPEAT = 5
+# Width and height of the coordinate plane and speed of movement
+WIDTH = 500
+HEIGHT = 500
+SPEED = 30
+
+def local_session():
+    """Gets a sampler session on a local exact solver
+
+    Returns
+    -------
+    SamplerSession
+        The session.
+    """
+    return sampler_mod.SamplerSession(sampler_factory=movement_exact_mod.ExactMovementSolver)
+
+def restorer(character):
+    """Gets a function that restores a character to its current location and traces
+
+    Parameters
+    ----------
+    character : Agent, Prey or Predator
+        The character.
+
+    Returns
+    -------
+    function
+        Restores the character's location and truncates its traces to their current
+        length (their buffers are kept, so restoring allocates nothing).
+    """
+    loc = list(character.loc)
+    sizes = {name: getattr(character, name).size for name in character.__slots__
+             if isinstance(getattr(character, name, None), trace_mod.Trace)}
+
+    def restore():
+        character.loc = list(loc)
+        for name, size in sizes.items():
+            getattr(character, name).size = size
+    return restore
+
+def bench_attention_qubo():
+    model = attention_mod.AttentionModel(WIDTH, HEIGHT, 5, session=local_session())
+    return lambda: model.qubo(200.0)
+
+def bench_attention_classical_alloc_attn():
+    model = attention_classical_mod.AttentionModelClassical(WIDTH, HEIGHT)
+    return lambda: model.alloc_attn(200.0)
+
+def bench_movement_qubo():
+    model = movement_mod.MovementModel(WIDTH, HEIGHT, 5, session=local_session())
+    dist2prey = np.linspace(100, 160, model.num_directions)
+    dist2predator = np.linspace(300, 240, model.num_directions)
+    return lambda: model.qubo(dist2prey, dist2predator)
+
+def bench_movement_decide_movement():
+    model = movement_mod.MovementModel(WIDTH, HEIGHT, 5, session=local_session())
+    return lambda: model.decide_movement(None, [250, 250], [300, 200], [100, 400], SPEED)
+
+def bench_agent_move():
+    agent = agent_mod.Agent(WIDTH, HEIGHT)
+    restore = restorer(agent)
+
+    # Start every call from the same location and traces, so all calls take the same path
+    def move():
+        restore()
+        agent.move([250, 250], [300, 200], [100, 400], [300, 200], [100, 400], SPEED, 0.8)
+    return move
+
+def bench_agent_move_quantum():
+    agent = agent_mod.Agent(WIDTH, HEIGHT)
+    restore = restorer(agent)
+
+    # Start every call from the same location and traces, so all calls take the same path
+    def move_quantum():
+        restore()
+        agent.move_quantum([250, 250], [300, 200], [100, 400], [300, 200], [100, 400], SPEED, [280, 250])
+    return move_quantum
+
+def bench_prey_avoid():
+    prey = prey_mod.Prey(WIDTH, HEIGHT)
+    restore = restorer(prey)
+
+    # Start every call from the same location and trace, so all calls take the same path
+    def avoid():
+        restore()
+        prey.avoid([250, 250], SPEED)
+    return avoid
+
+def bench_predator_pursue():
+    predator = predator_mod.Predator(WIDTH, HEIGHT)
+    restore = restorer(predator)
+
+    # Start every call from the same location and trace, so all calls take the same path
+    def pursue():
+        restore()
+        predator.pursue([250, 250], SPEED)
+    return pursue
+
+def bench_bounce_back():
+    agent = agent_mod.Agent(WIDTH, HEIGHT)
+    return agent.bounce_back
+
+def bench_metrics_repr():
+    metrics = classical_mod.main(iterations=100)
+    return lambda: repr(metrics)
+
+# Benchmarks by name; each builds its state and returns the function to be timed
+BENCHMARKS = {
+    "attention_qubo": bench_attention_qubo,
+    "attention_classical_alloc_attn": bench_attention_classical_alloc_attn,
+    "movement_qubo": bench_movement_qubo,
+    "movement_decide_movement": bench_movement_decide_movement,
+    "agent_move": bench_agent_move,
+    "agent_move_quantum": bench_agent_move_quantum,
+    "prey_avoid": bench_prey_avoid,
+    "predator_pursue": bench_predator_pursue,
+    "bounce_back": bench_bounce_back,
+    "metrics_repr": bench_metrics_repr,
+}
+
+def measure(function, repeat=REPEAT):
+    """Times a function
+
+    Parameters
+    ----------
+    function : callable
+        The function, called without arguments.
+    repeat : int, optional
+        Number of timed repetitions (default is REPEAT)
+
+    Returns
+    -------
+    dict
+        The median and minimum (i.e. least disturbed) time per call (in
+        microseconds) over the repetitions, and the number of calls per repetition.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number * 1000000
+    return {"median": float(np.median(times)), "min": float(times.min()), "number": number}
+
+def run(names=None):
+    """Runs the benchmarks
+
+    Parameters
+    ----------
+    names : [str], optional
+        The benchmarks to run (default is None, i.e. all of them)
+
+    Returns
+    -------
+    dict
+        The results of each benchmark (see measure), keyed by name.
+
+    Raises
+    ------
+    ValueError
+        If a benchmark does not exist.
+    """
+    names = list(BENCHMARKS) if names is None else names
+    results = {}
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError("unknown benchmark " + name)
+        results[name] = measure(BENCHMARKS[name]())
+    return results
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Finds the benchmarks that got slower than the baseline by more than a threshold
+
+    Parameters
+    ----------
+    results : dict
+        The results of this run (see run).
+    baseline : dict
+        The results of the baseline run.
+    threshold : float, optional
+        Relative slowdown of the fastest repetition that is flagged (default is
+        THRESHOLD)
+
+    Returns
+    -------
+    dict
+        The ratio of this run's fastest repetition to the baseline's for every
+        regression, keyed by benchmark.
+    """
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+def save(results, path=BASELINE):
+    """Saves results as the baseline
+
+    Parameters
+    ----------
+    results : dict
+        The results (see run).
+    path : str, optional
+        The baseline file (default is BASELINE)
+
+    Returns
+    -------
+    void
+    """
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                   "machine": platform.machine(), "results": results}, f, indent=2)
+
+def load(path=BASELINE):
+    """Loads the baseline
+
+    Parameters
+    ----------
+    path : str, optional
+        The baseline file (default is BASELINE)
+
+    Returns
+    -------
+    dict
+        The baseline's results, None if there is no baseline.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the simulation core")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default is all)")
+    parser.add_argument("--update", action="store_true", help="overwrite the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="relative slowdown flagged")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    args = parser.parse_args(argv)
+
+    results = run(args.names or None)
+    baseline = load(args.baseline)
+
+    for name, result in results.items():
+        line = name.ljust(34) + "{:12.2f} us".format(result["min"])
+        if baseline is not None and name in baseline:
+            line += "   x{:.2f} vs baseline".format(result["min"] / baseline[name]["min"])
+        print(line)
+
+    if baseline is None or args.update:
+        if baseline is not None:
+            results = {**baseline, **results}
+        save(results, args.baseline)
+        print("Saved baseline to " + args.baseline)
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions.items():
+        print("REGRESSION: " + name + " is x{:.2f} slower than the baseline".format(ratio))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
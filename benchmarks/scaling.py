@@ -0,0 +1,311 @@
+"""Scaling Benchmarks
+
+This runs families of episodes of classical.py and serial.py along one axis at a
+time (iterations, width and height, number of reads, and sampler backend), keeping
+every other parameter at its base value. Local samplers stand in for the QPU. Each
+episode runs in a fresh process, so its peak RSS is its own, and records its
+wall-clock time, peak RSS, mean step latency and phase percentiles, the time to
+write its report, and the memory it allocated (peak and still held by its metrics)
+as traced by tracemalloc.
+The results are written as JSON and CSV, along with the log-log slope of each curve
+so superlinear growth stands out. Run it from the repository's root:
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --implementations classical --axes iterations size
+"""
+
+import argparse
+import csv
+import io
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from dwave.samplers import SimulatedAnnealingSampler, SteepestDescentSolver
+import classical as classical_mod
+import serial as serial_mod
+from metrics import report as report_mod
+from models import movement_exact as movement_exact_mod
+from models import sampler as sampler_mod
+
+# Values of each axis (only one axis varies within a family)
+ITERATIONS = [10, 100, 1000]
+SIZES = [(250, 250), (500, 500), (1000, 1000)]
+NUM_READS = [1, 5, 25]
+BACKENDS = ["exact", "steepest_descent", "simulated_annealing"]
+# Base value of each axis while another one varies
+BASE = {"iterations": 100, "size": (500, 500), "num_reads": 5, "backend": "exact"}
+# Backend of the num_reads axis (the exact solver returns at most one sample per
+# one-hot state, so more reads would not cost it anything)
+NUM_READS_BACKEND = "simulated_annealing"
+# Axes each implementation is run along (classical.py has no sampler)
+AXES = {"classical": ["iterations", "size"],
+        "serial": ["iterations", "size", "num_reads", "backend"]}
+# Local samplers standing in for the QPU
+SAMPLERS = {"exact": movement_exact_mod.ExactMovementSolver,
+            "steepest_descent": SteepestDescentSolver,
+            "simulated_annealing": SimulatedAnnealingSampler}
+# A curve whose log-log slope exceeds this is reported as superlinear
+SUPERLINEAR = 1.2
+# Files the results are written to
+OUTPUT_JSON = "scaling.json"
+OUTPUT_CSV = "scaling.csv"
+
+def families(implementations=None, axes=None):
+    """Expands the axes into the episodes to run
+
+    Parameters
+    ----------
+    implementations : [str], optional
+        The implementations to run (default is None, i.e. all in AXES)
+    axes : [str], optional
+        The axes to run along (default is None, i.e. all of each implementation's)
+
+    Returns
+    -------
+    [dict]
+        The points, each with its implementation, the axis it belongs to, and
+        every parameter of the episode.
+
+    Raises
+    ------
+    ValueError
+        If an implementation or an axis does not exist.
+    """
+    values = {"iterations": ITERATIONS, "size": SIZES, "num_reads": NUM_READS, "backend": BACKENDS}
+
+    points = []
+    for implementation in implementations or list(AXES):
+        if implementation not in AXES:
+            raise ValueError("unknown implementation " + implementation)
+        for axis in axes or AXES[implementation]:
+            if axis not in values:
+                raise ValueError("unknown axis " + axis)
+            if axis not in AXES[implementation]:
+                continue
+            for value in values[axis]:
+                point = {"implementation": implementation, "axis": axis, **BASE, axis: value}
+                if axis == "num_reads":
+                    point["backend"] = NUM_READS_BACKEND
+                points.append(point)
+    return points
+
+def run_episode(point):
+    """Runs the episode of a point
+
+    Parameters
+    ----------
+    point : dict
+        The point (see families).
+
+    Returns
+    -------
+    Metrics
+        The metrics of the episode.
+    """
+    width, height = point["size"]
+    if point["implementation"] == "classical":
+        return classical_mod.main(iterations=point["iterations"], width=width, height=height)
+
+    session = sampler_mod.SamplerSession(sampler_factory=SAMPLERS[point["backend"]])
+    return serial_mod.main(session, iterations=point["iterations"], width=width, height=height,
+                           num_reads=point["num_reads"])
+
+def step_latency(metrics, iterations):
+    """Gets the mean latency of a step of an episode from its phase stats
+
+    Parameters
+    ----------
+    metrics : Metrics
+        The metrics of an episode run with PROFILE set.
+    iterations : int
+        Number of iterations run.
+
+    Returns
+    -------
+    float
+        The mean latency of a step (in microseconds), i.e. the total duration of
+        every phase over the number of steps. Every phase runs inside the steps,
+        though not necessarily once per step (e.g. the sampler calls the attention
+        cache saves), and no phase is nested in another.
+    """
+    total = sum(stats["total"] for stats in metrics.phase_stats.values())
+    return total / iterations
+
+def measure(point, allocations=True):
+    """Measures the episode of a point (in a process of its own)
+
+    Parameters
+    ----------
+    point : dict
+        The point (see families).
+    allocations : bool, optional
+        Whether to run the episode again under tracemalloc (default is True)
+
+    Returns
+    -------
+    dict
+        The point with its wall-clock time (in seconds), peak RSS (in bytes),
+        mean step latency and phase stats (in microseconds), report time (in
+        seconds), and, if allocations is set, the peak and retained memory traced
+        by tracemalloc (in bytes).
+    """
+    # Time the phases of each step (timed run, so no cProfile or tracemalloc)
+    classical_mod.PROFILE = serial_mod.PROFILE = True
+    classical_mod.PROFILE_CAPTURE = serial_mod.PROFILE_CAPTURE = False
+
+    # Run the episode
+    start_time = time.perf_counter()
+    metrics = run_episode(point)
+    wall_time = time.perf_counter() - start_time
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+
+    # Time the report, which grows with the traces
+    start_time = time.perf_counter()
+    report_mod.write_metrics(metrics, io.StringIO())
+    report_time = time.perf_counter() - start_time
+
+    result = {**point, "size": list(point["size"]), "wall_time": wall_time, "peak_rss": peak_rss,
+              "report_time": report_time}
+
+    # Step latency, and the percentiles of each phase
+    result["step_mean"] = step_latency(metrics, point["iterations"])
+    result["phases"] = metrics.phase_stats
+
+    # Trace the allocations of a second run, keeping its metrics alive
+    if allocations:
+        del metrics
+        tracemalloc.start()
+        metrics = run_episode(point)
+        result["retained_memory"], result["peak_memory"] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return result
+
+def slope(xs, ys):
+    """Fits the log-log slope of a curve (1 is linear, 2 is quadratic)
+
+    Parameters
+    ----------
+    xs : [float]
+        The values of the axis.
+    ys : [float]
+        The measurements.
+
+    Returns
+    -------
+    float
+        The slope, None if the curve cannot be fitted.
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if len(xs) < 2 or np.any(xs <= 0) or np.any(ys <= 0):
+        return None
+    return float(np.polyfit(np.log(xs), np.log(ys), 1)[0])
+
+def curves(results):
+    """Groups the results into curves and fits their slopes
+
+    Parameters
+    ----------
+    results : [dict]
+        The measured points (see measure).
+
+    Returns
+    -------
+    dict
+        For each implementation and numeric axis, the values of the axis (the
+        area for sizes) and the log-log slope of each measurement.
+    """
+    measurements = ["wall_time", "step_mean", "report_time", "peak_memory", "retained_memory"]
+
+    curves = {}
+    for result in results:
+        if result["axis"] == "backend":
+            continue
+        curve = curves.setdefault(result["implementation"] + "/" + result["axis"], {"x": [], "points": []})
+        value = result[result["axis"]]
+        curve["x"].append(value[0] * value[1] if result["axis"] == "size" else value)
+        curve["points"].append(result)
+
+    for curve in curves.values():
+        points = curve.pop("points")
+        curve["slopes"] = {m: slope(curve["x"], [p[m] for p in points])
+                           for m in measurements if all(m in p for p in points)}
+    return curves
+
+def save(results, fits, json_path=OUTPUT_JSON, csv_path=OUTPUT_CSV):
+    """Writes the results as JSON (with the fitted curves) and as CSV
+
+    Parameters
+    ----------
+    results : [dict]
+        The measured points (see measure).
+    fits : dict
+        The curves (see curves).
+    json_path : str, optional
+        The JSON file (default is OUTPUT_JSON)
+    csv_path : str, optional
+        The CSV file (default is OUTPUT_CSV)
+
+    Returns
+    -------
+    void
+    """
+    with open(json_path, "w") as f:
+        json.dump({"results": results, "curves": fits}, f, indent=2)
+
+    # Phase stats are nested, so only the JSON file has them
+    fields = []
+    for result in results:
+        for field in result:
+            if field not in fields and field != "phases":
+                fields.append(field)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fields, extrasaction="ignore")
+        writer.writeheader()
+        for result in results:
+            writer.writerow({**result, "size": "x".join(map(str, result["size"]))})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks of the episodes")
+    parser.add_argument("--implementations", nargs="+", choices=list(AXES), help="default is all")
+    parser.add_argument("--axes", nargs="+", choices=list(BASE), help="default is all")
+    parser.add_argument("--no-allocations", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--json", default=OUTPUT_JSON, help="JSON output file")
+    parser.add_argument("--csv", default=OUTPUT_CSV, help="CSV output file")
+    args = parser.parse_args(argv)
+
+    points = families(args.implementations, args.axes)
+
+    # One episode at a time, each in a fresh process
+    results = []
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for point in points:
+            result = executor.submit(measure, point, not args.no_allocations).result()
+            results.append(result)
+            value = result[result["axis"]]
+            print("{:10} {:10} {:>20} {:10.3f} s {:8.1f} MiB".format(
+                result["implementation"], result["axis"], str(value), result["wall_time"],
+                result["peak_rss"] / 2**20))
+
+    fits = curves(results)
+    save(results, fits, args.json, args.csv)
+
+    # Report the superlinear curves
+    for name, curve in fits.items():
+        for measurement, value in curve["slopes"].items():
+            if value is not None and value > SUPERLINEAR:
+                print("SUPERLINEAR: " + name + " " + measurement + " grows with slope {:.2f}".format(value))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
+import io
 import math
 import numpy as np
-from random import randint, seed
+from characters import spawn as spawn_mod
+from characters import trace as trace_mod
+from metrics import report as report_mod
 
 class Agent:
     """
@@ -16,17 +19,17 @@ class Agent:
         Says whether the agent has caught the prey or not
     alive : bool
         Says whether the agent is still alive (i.e. has not been caught)
-    loc_trace : [[float]]
+    loc_trace : Trace
         Keeps track of all the locations the agent was in
-    attn_trace : [[float]]
+    attn_trace : Trace
         Keeps track of all the attention allocations
-    dist_trace : [[float]]
+    dist_trace : Trace
         Keeps track of all distances at each time step
-    perceived_agent_trace : [[float]]
+    perceived_agent_trace : Trace
         Keeps track of the perceived agent locations
-    perceived_prey_trace : [[float]]
+    perceived_prey_trace : Trace
         Keeps track of the perceived prey locations
-    perceived_predator_trace : [[float]]
+    perceived_predator_trace : Trace
         Keeps track of the perceived predator locations
     w : int
         Width of the coordinate plane
@@ -47,7 +50,11 @@ class Agent:
         Add the given set of attention levels to the attention trace.
     """
 
-    def __init__(self, w, h):
+    __slots__ = ("loc", "feasted", "alive", "loc_trace", "attn_trace", "dist_trace",
+                 "perceived_agent_trace", "perceived_prey_trace", "perceived_predator_trace",
+                 "w", "h")
+
+    def __init__(self, w, h, loc=None, rng=None):
         """
         Parameters
         ----------
@@ -55,17 +62,23 @@ class Agent:
             Width of the coordinate plane
         h : int
             Height of the coordinate plane
+        loc : [int], optional
+            Initial location [x, y] (default is None, i.e. drawn from rng)
+        rng : np.random.Generator, optional
+            The stream the initial location is drawn from, in the middle
+            third of the plane (default is None, i.e. a fixed location)
         """
-        seed(1)
-        self.loc = [randint(int(w/3), int(2*w/3)), randint(0, h)]
+        if loc is None:
+            loc = spawn_mod.locate("agent", w, h, rng)
+        self.loc = list(loc)
         self.feasted = False
         self.alive = True
-        self.loc_trace = [list(self.loc)]
-        self.attn_trace = []
-        self.dist_trace = []
-        self.perceived_agent_trace = []
-        self.perceived_prey_trace = []
-        self.perceived_predator_trace = []
+        self.loc_trace = trace_mod.Trace(2, np.int32, rows=[self.loc])
+        self.attn_trace = trace_mod.Trace(3)
+        self.dist_trace = trace_mod.Trace(2)
+        self.perceived_agent_trace = trace_mod.Trace(2)
+        self.perceived_prey_trace = trace_mod.Trace(2)
+        self.perceived_predator_trace = trace_mod.Trace(2)
         self.w = w
         self.h = h
         return
@@ -138,9 +151,9 @@ class Agent:
             raise ValueError("bias must be a number between 0 and 1")
 
         # Track perceived locations
-        self.perceived_agent_trace.append(list(agent_perceived))
-        self.perceived_prey_trace.append(list(prey_perceived))
-        self.perceived_predator_trace.append(list(predator_perceived))
+        self.perceived_agent_trace.append(agent_perceived)
+        self.perceived_prey_trace.append(prey_perceived)
+        self.perceived_predator_trace.append(predator_perceived)
 
         # If the distance between prey and predator is less than 10 it counts as a contact
         buffer = 10
@@ -191,7 +204,7 @@ class Agent:
         self.bounce_back()
 
         # Update location trace
-        self.loc_trace.append(list(self.loc))
+        self.loc_trace.append(self.loc)
 
         # Keep track of distances
         self.track_dist([math.dist(prey_real, self.loc), math.dist(predator_real, self.loc)])
@@ -235,9 +248,9 @@ class Agent:
             raise ValueError("speed must be positive number")
 
         # Track perceived locations
-        self.perceived_agent_trace.append(list(agent_perceived))
-        self.perceived_prey_trace.append(list(prey_perceived))
-        self.perceived_predator_trace.append(list(predator_perceived))
+        self.perceived_agent_trace.append(agent_perceived)
+        self.perceived_prey_trace.append(prey_perceived)
+        self.perceived_predator_trace.append(predator_perceived)
 
         # If the distance between prey and predator is less than 10 it counts as a contact
         buffer = 10
@@ -280,7 +293,7 @@ class Agent:
         self.bounce_back()
 
         # Update location trace
-        self.loc_trace.append(list(self.loc))
+        self.loc_trace.append(self.loc)
 
         # Keep track of distances
         self.track_dist([math.dist(prey_real, self.loc), math.dist(predator_real, self.loc)])
@@ -339,60 +352,6 @@ class Agent:
     def __repr__(self):
         """Displays information about the agent
         """
-        display = ['\n===============================']
-        display.append('A G E N T')
-        display.append('Alive: ' + str(self.alive))
-        display.append('Feasted: ' + str(self.feasted))
-        display.append('Steps taken: ' + str(len(self.loc_trace)))
-
-        display.append('Location trace:')
-        loc_trace_str = ""
-        for loc in self.loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            loc_trace_str += ", " + str(loc)
-        display.append(loc_trace_str)
-
-        display.append('Agent perceived location trace:')
-        agent_str = ""
-        for loc in self.perceived_agent_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            agent_str += ", " + str(loc)
-        display.append(agent_str)
-
-        display.append('Prey perceived location trace:')
-        prey_str = ""
-        for loc in self.perceived_prey_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            prey_str += ", " + str(loc)
-        display.append(prey_str)
-
-        display.append('Predator perceived location trace:')
-        predator_str = ""
-        for loc in self.perceived_predator_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            predator_str += ", " + str(loc)
-        display.append(predator_str)
-
-        display.append('Attention trace (agent, prey, predator):')
-        attn_trace_str = ""
-        for attn in self.attn_trace:
-            attn[0] = "{:.2f}".format(attn[0])
-            attn[1] = "{:.2f}".format(attn[1])
-            attn[2] = "{:.2f}".format(attn[2])
-            attn_trace_str += ", " + str(attn)
-        display.append(attn_trace_str)
-
-        display.append('Distances trace (dist to prey, dist to predator):')
-        dist_trace_str = ""
-        for dist in self.dist_trace:
-            dist[0] = "{:.2f}".format(dist[0])
-            dist[1] = "{:.2f}".format(dist[1])
-            dist_trace_str += ", " + str(dist)
-        display.append(dist_trace_str)
-
-        display.append('===============================\n')
-        return "\n".join(display)
+        stream = io.StringIO()
+        report_mod.write_agent(self, stream)
+        return stream.getvalue()
@@ -1,5 +1,6 @@
 import numpy as np
-from random import randint, seed
+from characters import spawn as spawn_mod
+from characters import trace as trace_mod
 
 class Predator:
     """
@@ -13,7 +14,7 @@ class Predator:
         Location of the predator [x, y]
     feasted : bool
         Says whether the predator has caught the agent or not
-    loc_trace : [[float]]
+    loc_trace : Trace
         Keeps track of all the locations the predator was in
     w : int
         Width of the coordinate plane
@@ -28,7 +29,9 @@ class Predator:
         If the predator's location is outside the coordinate plane, bounce back into it.
     """
 
-    def __init__(self, w, h):
+    __slots__ = ("loc", "feasted", "loc_trace", "w", "h")
+
+    def __init__(self, w, h, loc=None, rng=None):
         """
         Parameters
         ----------
@@ -36,11 +39,17 @@ class Predator:
             Width of the coordinate plane
         h : int
             Height of the coordinate plane
+        loc : [int], optional
+            Initial location [x, y] (default is None, i.e. drawn from rng)
+        rng : np.random.Generator, optional
+            The stream the initial location is drawn from, in the right
+            third of the plane (default is None, i.e. a fixed location)
         """
-        seed(2)
-        self.loc = [randint(int(2*w/3), w), randint(0, h)]
+        if loc is None:
+            loc = spawn_mod.locate("predator", w, h, rng)
+        self.loc = list(loc)
         self.feasted = False
-        self.loc_trace = [list(self.loc)]
+        self.loc_trace = trace_mod.Trace(2, np.int32, rows=[self.loc])
         self.w = w
         self.h = h
         return
@@ -98,6 +107,6 @@ class Predator:
             self.feasted = True
 
         # Update location trace
-        self.loc_trace.append(list(self.loc))
+        self.loc_trace.append(self.loc)
         return
     
\ No newline at end of file
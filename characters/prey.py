@@ -1,5 +1,6 @@
 import numpy as np
-from random import randint, seed
+from characters import spawn as spawn_mod
+from characters import trace as trace_mod
 
 class Prey:
     """
@@ -13,7 +14,7 @@ class Prey:
         Location of the prey [x, y]
     alive : bool
         Says whether the prey is still alive (i.e. has not been caught)
-    loc_trace : [[float]]
+    loc_trace : Trace
         Keeps track of all the locations the prey was in
     w : int
         Width of the coordinate plane
@@ -28,7 +29,9 @@ class Prey:
         If the prey's location is outside the coordinate plane, bounce back into it.
     """
 
-    def __init__(self, w, h):
+    __slots__ = ("loc", "alive", "loc_trace", "w", "h")
+
+    def __init__(self, w, h, loc=None, rng=None):
         """
         Parameters
         ----------
@@ -36,11 +39,17 @@ class Prey:
             Width of the coordinate plane
         h : int
             Height of the coordinate plane
+        loc : [int], optional
+            Initial location [x, y] (default is None, i.e. drawn from rng)
+        rng : np.random.Generator, optional
+            The stream the initial location is drawn from, in the left
+            third of the plane (default is None, i.e. a fixed location)
         """
-        seed(3)
-        self.loc = [randint(0, int(w/3)), randint(0, h)]
+        if loc is None:
+            loc = spawn_mod.locate("prey", w, h, rng)
+        self.loc = list(loc)
         self.alive = True
-        self.loc_trace = [list(self.loc)]
+        self.loc_trace = trace_mod.Trace(2, np.int32, rows=[self.loc])
         self.w = w
         self.h = h
         return
@@ -99,7 +108,7 @@ class Prey:
         self.bounce_back()
 
         # Update prey's location trace
-        self.loc_trace.append(list(self.loc))
+        self.loc_trace.append(self.loc)
         return
     
     def bounce_back(self):
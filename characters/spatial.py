@@ -0,0 +1,263 @@
+import math
+
+class GridIndex:
+    """
+    The GridIndex class is a uniform-grid spatial index over the characters of a world.
+
+    The plane is split into square cells and each entry is kept in the cell that
+    holds its location, so moving an entry only touches the cells it leaves and
+    enters. Nearest-neighbour queries search rings of cells outwards from the
+    query's cell and stop as soon as no farther ring can hold a closer entry (or
+    scan the non-empty cells directly once a ring is larger than them); contact
+    queries only look at the cells that overlap the contact radius.
+
+    ...
+
+    Attributes
+    ----------
+    cell_size : float
+        Width and height of a cell
+    cells : dict
+        Keys of the entries in each non-empty cell, keyed by cell (i, j)
+    locs : dict
+        Location (x, y) of each entry, keyed by the entry's key
+
+    Methods
+    -------
+    cell(loc)
+        Gets the cell that holds a location.
+    insert(key, loc)
+        Adds an entry at a location.
+    move(key, loc)
+        Moves an entry to a new location.
+    remove(key)
+        Removes an entry.
+    discard(cell, key)
+        Drops a key from a cell, and the cell once it is empty.
+    ring(center, r)
+        Gets the cells at Chebyshev distance r from a cell.
+    nearest(loc)
+        Gets the entry closest to a location.
+    within(loc, radius)
+        Gets the entries closer to a location than a radius.
+    """
+
+    __slots__ = ("cell_size", "cells", "locs")
+
+    def __init__(self, cell_size):
+        """
+        Parameters
+        ----------
+        cell_size : float
+            Width and height of a cell
+
+        Raises
+        ------
+        ValueError
+            If the cell size is not positive.
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive number")
+
+        self.cell_size = cell_size
+        self.cells = {}
+        self.locs = {}
+        return
+
+    def cell(self, loc):
+        """Gets the cell that holds a location
+
+        Parameters
+        ----------
+        loc : [float]
+            The location [x, y].
+
+        Returns
+        -------
+        (int, int)
+            The cell.
+        """
+        return (math.floor(loc[0] / self.cell_size), math.floor(loc[1] / self.cell_size))
+
+    def insert(self, key, loc):
+        """Adds an entry at a location
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the entry.
+        loc : [float]
+            The location [x, y].
+
+        Returns
+        -------
+        void
+
+        Raises
+        ------
+        ValueError
+            If the key is already in the index.
+        """
+        if key in self.locs:
+            raise ValueError("key is already in the index")
+
+        loc = (float(loc[0]), float(loc[1]))
+        self.locs[key] = loc
+        self.cells.setdefault(self.cell(loc), set()).add(key)
+
+    def move(self, key, loc):
+        """Moves an entry to a new location
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the entry.
+        loc : [float]
+            The new location [x, y].
+
+        Returns
+        -------
+        void
+        """
+        old = self.cell(self.locs[key])
+        loc = (float(loc[0]), float(loc[1]))
+        self.locs[key] = loc
+
+        # Only re-bucket the entry if it changed cells
+        new = self.cell(loc)
+        if new != old:
+            self.discard(old, key)
+            self.cells.setdefault(new, set()).add(key)
+
+    def remove(self, key):
+        """Removes an entry
+
+        Parameters
+        ----------
+        key : hashable
+            The key of the entry.
+
+        Returns
+        -------
+        void
+        """
+        self.discard(self.cell(self.locs.pop(key)), key)
+
+    def discard(self, cell, key):
+        """Drops a key from a cell, and the cell once it is empty
+
+        Parameters
+        ----------
+        cell : (int, int)
+            The cell.
+        key : hashable
+            The key of the entry.
+
+        Returns
+        -------
+        void
+        """
+        keys = self.cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.cells[cell]
+
+    @staticmethod
+    def ring(center, r):
+        """Gets the cells at Chebyshev distance r from a cell
+
+        Parameters
+        ----------
+        center : (int, int)
+            The cell in the center of the ring.
+        r : int
+            The distance (in cells).
+
+        Returns
+        -------
+        generator
+            The cells of the ring.
+        """
+        i, j = center
+        if r == 0:
+            yield center
+            return
+        for di in range(-r, r + 1):
+            yield (i + di, j - r)
+            yield (i + di, j + r)
+        for dj in range(-r + 1, r):
+            yield (i - r, j + dj)
+            yield (i + r, j + dj)
+
+    def nearest(self, loc):
+        """Gets the entry closest to a location
+
+        Parameters
+        ----------
+        loc : [float]
+            The location [x, y].
+
+        Returns
+        -------
+        (hashable, float)
+            The key of the closest entry and its distance to the location, (None,
+            inf) if the index is empty.
+        """
+        x, y = float(loc[0]), float(loc[1])
+        center = self.cell((x, y))
+        best, best_dist = None, math.inf
+        seen = 0
+        r = 0
+
+        # Entries outside rings 0..r-1 are at least (r - 1) cells away from the location
+        while seen < len(self.locs) and best_dist > (r - 1) * self.cell_size:
+            if 8 * r > len(self.cells):
+                # Rings have more cells than the index has entries, so scan the
+                # remaining non-empty cells directly
+                cells = [keys for cell, keys in self.cells.items()
+                         if max(abs(cell[0] - center[0]), abs(cell[1] - center[1])) >= r]
+                r = math.inf
+            else:
+                cells = [keys for keys in map(self.cells.get, self.ring(center, r)) if keys is not None]
+                r += 1
+
+            for keys in cells:
+                seen += len(keys)
+                for key in keys:
+                    kx, ky = self.locs[key]
+                    dist = math.hypot(kx - x, ky - y)
+                    if dist < best_dist:
+                        best, best_dist = key, dist
+
+        return best, best_dist
+
+    def within(self, loc, radius):
+        """Gets the entries closer to a location than a radius
+
+        Parameters
+        ----------
+        loc : [float]
+            The location [x, y].
+        radius : float
+            The radius (entries exactly at the radius are not included).
+
+        Returns
+        -------
+        [hashable]
+            The keys of the entries.
+        """
+        x, y = float(loc[0]), float(loc[1])
+        i_low, j_low = self.cell((x - radius, y - radius))
+        i_high, j_high = self.cell((x + radius, y + radius))
+
+        found = []
+        for i in range(i_low, i_high + 1):
+            for j in range(j_low, j_high + 1):
+                for key in self.cells.get((i, j), ()):
+                    kx, ky = self.locs[key]
+                    if math.hypot(kx - x, ky - y) < radius:
+                        found.append(key)
+        return found
+
+    def __len__(self):
+        return len(self.locs)
@@ -0,0 +1,80 @@
+import random
+import numpy as np
+
+# Horizontal band of the plane each kind of character starts in (in thirds of the
+# width; every character can start at any height)
+REGIONS = {"agent": (1, 2), "prey": (0, 1), "predator": (2, 3)}
+# Seeds of the fixed initial locations used when no stream is given
+LEGACY_SEEDS = {"agent": 1, "prey": 3, "predator": 2}
+
+def locate(kind, w, h, rng=None, n=None):
+    """Draws initial locations for a kind of character
+
+    Parameters
+    ----------
+    kind : str
+        Either "agent", "prey", or "predator".
+    w : int
+        Width of the coordinate plane.
+    h : int
+        Height of the coordinate plane.
+    rng : np.random.Generator, optional
+        The stream the locations are drawn from (default is None, i.e. the fixed
+        location of the kind, drawn from a private random.Random so the global
+        random state is never touched)
+    n : int, optional
+        Number of locations (default is None, i.e. a single one)
+
+    Returns
+    -------
+    [int] or np.ndarray
+        The location [x, y] if n is None, otherwise the locations, shape (n, 2).
+
+    Raises
+    ------
+    ValueError
+        If the kind does not exist.
+    """
+    if kind not in REGIONS:
+        raise ValueError("unknown kind of character " + kind)
+
+    low, high = REGIONS[kind]
+    x_low, x_high = int(low*w/3), int(high*w/3)
+
+    # Same draws as random.seed followed by randint, for the legacy locations
+    if rng is None:
+        legacy = random.Random(LEGACY_SEEDS[kind])
+        loc = [legacy.randint(x_low, x_high), legacy.randint(0, h)]
+        return loc if n is None else np.tile(loc, (n, 1))
+
+    if n is None:
+        return [int(rng.integers(x_low, x_high, endpoint=True)), int(rng.integers(0, h, endpoint=True))]
+
+    return np.column_stack((rng.integers(x_low, x_high, size=n, endpoint=True),
+                            rng.integers(0, h, size=n, endpoint=True)))
+
+def streams(seed, n):
+    """Spawns independent, reproducible random streams (e.g. one per episode)
+
+    Parameters
+    ----------
+    seed : int or np.random.SeedSequence
+        The root seed.
+    n : int
+        Number of streams.
+
+    Returns
+    -------
+    [np.random.Generator]
+        The streams, each from its own child of the root SeedSequence.
+
+    Raises
+    ------
+    ValueError
+        If n is negative.
+    """
+    if n < 0:
+        raise ValueError("n must be non-negative number")
+
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.Generator(np.random.PCG64(child)) for child in root.spawn(n)]
@@ -0,0 +1,98 @@
+import numpy as np
+
+class Trace:
+    """
+    The Trace class keeps a growable trace of fixed-width rows in a NumPy buffer.
+
+    Rows are stored contiguously in a preallocated buffer that doubles in size when
+    full. Indexing and iterating give plain lists (copies), so code written for
+    the list-of-lists traces keeps working and cannot modify the stored data.
+
+    ...
+
+    Attributes
+    ----------
+    buffer : np.ndarray
+        The preallocated buffer, shape (capacity, width)
+    size : int
+        Number of rows in the trace
+
+    Methods
+    -------
+    append(row)
+        Adds a row to the end of the trace.
+    tolist()
+        Gets the trace as a list of lists.
+    """
+
+    __slots__ = ("buffer", "size")
+
+    def __init__(self, width, dtype=np.float32, capacity=64, rows=()):
+        """
+        Parameters
+        ----------
+        width : int
+            Number of values per row
+        dtype : np.dtype, optional
+            Type of the values (default is np.float32)
+        capacity : int, optional
+            Number of rows allocated up front (default is 64)
+        rows : [[float]], optional
+            Initial rows of the trace (default is no rows)
+        """
+        self.buffer = np.empty((max(capacity, len(rows), 1), width), dtype=dtype)
+        self.size = 0
+        for row in rows:
+            self.append(row)
+        return
+
+    @property
+    def array(self):
+        """np.ndarray: A view of the rows in the trace, shape (size, width)"""
+        return self.buffer[:self.size]
+
+    def append(self, row):
+        """Adds a row to the end of the trace
+
+        Parameters
+        ----------
+        row : [float]
+            The values of the row.
+
+        Returns
+        -------
+        void
+        """
+        if self.size == len(self.buffer):
+            # Double the capacity of the buffer
+            buffer = np.empty((2 * len(self.buffer), self.buffer.shape[1]), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer
+            self.buffer = buffer
+
+        self.buffer[self.size] = row
+        self.size += 1
+
+    def tolist(self):
+        """Gets the trace as a list of lists
+
+        Returns
+        -------
+        [[float]]
+            The rows in the trace.
+        """
+        return self.array.tolist()
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        return self.array[index].tolist()
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def __repr__(self):
+        return repr(self.tolist())
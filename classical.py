@@ -8,6 +8,8 @@ and decide on optimal movement direction).
 import math
 import time
 from metrics import metrics as metrics_mod
+from metrics import profiler as profiler_mod
+from models import cache as cache_mod
 from models import attention_classical as attention_mod
 from characters import agent as agent_mod
 from characters import predator as predator_mod
@@ -22,51 +24,83 @@ HEIGHT = 500
 SPEED = 30
 # Bias on pursuing over avoiding for the agent's movement
 BIAS = 0.8
+# Quantization step of the attention cache on the normalized distance (None disables it)
+ATTENTION_CACHE_STEP = None
+# Maximum number of entries in the attention cache
+ATTENTION_CACHE_SIZE = 1024
+# Time each phase of the run (attention, avoid/pursue, perceive, move)
+PROFILE = False
+# Also capture a cProfile profile and tracemalloc's peak memory (needs PROFILE)
+PROFILE_CAPTURE = False
         
-def main():
+def main(iterations=None, width=None, height=None, speed=None, bias=None, rng=None):
+    # Use the module's configuration for any parameter that is not given
+    iterations = ITERATIONS if iterations is None else iterations
+    width = WIDTH if width is None else width
+    height = HEIGHT if height is None else height
+    speed = SPEED if speed is None else speed
+    bias = BIAS if bias is None else bias
+
     # Initialize metrics instance
     metrics = metrics_mod.Metrics("Serial Classical Implementation")
 
+    # Initialize the profiler, if enabled
+    profiler = profiler_mod.Profiler(PROFILE_CAPTURE) if PROFILE else profiler_mod.NULL_PROFILER
+
     # Compute time stats
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
+    profiler.start()
+
+    # Initialize characters (at their fixed locations, or drawn from rng)
+    agent = agent_mod.Agent(width, height, rng=rng)
+    prey = prey_mod.Prey(width, height, rng=rng)
+    predator = predator_mod.Predator(width, height, rng=rng)
 
-    # Initialize characters
-    agent = agent_mod.Agent(WIDTH, HEIGHT)
-    prey = prey_mod.Prey(WIDTH, HEIGHT)
-    predator = predator_mod.Predator(WIDTH, HEIGHT)
+    # Initialize the attention cache, if enabled
+    cache = None
+    if ATTENTION_CACHE_STEP is not None:
+        cache = cache_mod.AttentionCache(ATTENTION_CACHE_STEP, ATTENTION_CACHE_SIZE)
 
     # Initialize the attention allocation model
-    attention_model = attention_mod.AttentionModelClassical(WIDTH, HEIGHT)
+    attention_model = attention_mod.AttentionModelClassical(width, height, cache=cache)
 
     # Run model for n iterations
-    for _ in range(ITERATIONS):
+    for _ in range(iterations):
 
-        start_attn_time = time.time()
+        start_attn_time = time.perf_counter_ns()
         attn_agent, attn_prey, attn_predator = attention_model.get_attention_levels(agent,
                                                                                     prey,
                                                                                     predator)
-        metrics.attention_time += (time.time() - start_attn_time) * 1000000
+        attn_time = time.perf_counter_ns() - start_attn_time
+        metrics.attention_time += attn_time / 1000
+        profiler.add("attention", attn_time)
 
-        # Prey avoids agent
-        prey.avoid(agent.loc, SPEED)
-        # Predator pursues agent
-        predator.pursue(agent.loc, SPEED)
+        with profiler.span("avoid_pursue"):
+            # Prey avoids agent
+            prey.avoid(agent.loc, speed)
+            # Predator pursues agent
+            predator.pursue(agent.loc, speed)
 
         # Get the perceived locations
-        agent_perceived = agent.perceive(agent, attn_agent)
-        prey_perceived = agent.perceive(prey, attn_prey)
-        predator_perceived = agent.perceive(predator, attn_predator)
+        with profiler.span("perceive"):
+            agent_perceived = agent.perceive(agent, attn_agent)
+            prey_perceived = agent.perceive(prey, attn_prey)
+            predator_perceived = agent.perceive(predator, attn_predator)
 
         # Move Agent
-        start_movement_time = time.time()
-        agent.move(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, SPEED, BIAS)
-        metrics.movement_time += (time.time() - start_movement_time) * 1000000 
+        start_movement_time = time.perf_counter_ns()
+        agent.move(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, speed, bias)
+        movement_time = time.perf_counter_ns() - start_movement_time
+        metrics.movement_time += movement_time / 1000
+        profiler.add("move", movement_time)
+
+    profiler.stop()
 
     # Add general metrics
-    metrics.w = WIDTH
-    metrics.h = HEIGHT
-    metrics.iterations = ITERATIONS
-    metrics.bias = BIAS
+    metrics.w = width
+    metrics.h = height
+    metrics.iterations = iterations
+    metrics.bias = bias
 
     # Add agent to metrics
     metrics.agent_alive = agent.alive
@@ -75,8 +109,8 @@ def main():
     metrics.agent_perceived_loc_trace = agent.perceived_agent_trace
     metrics.prey_perceived_loc_trace = agent.perceived_prey_trace
     metrics.predator_perceived_loc_trace = agent.perceived_predator_trace
-    metrics.dist_agent2prey_trace = [dist[0] for dist in agent.dist_trace]
-    metrics.dist_agent2predator_trace = [dist[1] for dist in agent.dist_trace]
+    metrics.dist_agent2prey_trace = agent.dist_trace.array[:, 0].tolist()
+    metrics.dist_agent2predator_trace = agent.dist_trace.array[:, 1].tolist()
 
     # Add prey to metrics
     metrics.prey_alive = prey.alive
@@ -89,8 +123,16 @@ def main():
     # Add attention trace to metrics
     metrics.attention_trace = agent.attn_trace
 
+    # Add attention cache stats to metrics
+    if cache is not None:
+        metrics.cache_stats = cache.stats()
+
+    # Add phase stats to metrics
+    metrics.phase_stats = profiler.stats()
+    metrics.capture_stats = profiler.capture_stats()
+
     # Add total time to metrics
-    metrics.total_time = (time.time() - start_time) * 1000000
+    metrics.total_time = (time.perf_counter_ns() - start_time) / 1000
 
     return metrics
 
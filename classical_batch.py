@@ -0,0 +1,368 @@
+"""Predator-Prey Task (Batched Classical Approach)
+
+This implements the classical serial approach for many independent episodes at
+once. Every character's state is kept in (n, 2)-shaped arrays and each step of
+the task (allocate attention, avoid, pursue, perceive, and move) is applied to
+all episodes with whole-array operations. A single episode follows the same
+trajectory as the Agent, Prey, and Predator classes in classical.py.
+"""
+
+import time
+import numpy as np
+from metrics import metrics as metrics_mod
+from models import attention_classical as attention_mod
+from characters import spawn as spawn_mod
+
+# Number of episodes run in lockstep
+EPISODES = 10000
+# Number of iterations in the game
+ITERATIONS = 100
+# Width and height of the game's coordinate plane
+WIDTH = 500
+HEIGHT = 500
+# For now, speed is always constant
+SPEED = 30
+# Bias on pursuing over avoiding for the agent's movement
+BIAS = 0.8
+# If the distance between two characters is less than this it counts as a contact
+BUFFER = 10
+# Seed of the episodes' initial locations (None starts every episode at the same ones)
+SEED = None
+
+def norm(v):
+    """Gets the length of each row of an array of 2-d vectors
+
+    Parameters
+    ----------
+    v : np.ndarray
+        The vectors, shape (n, 2).
+
+    Returns
+    -------
+    np.ndarray
+        The length of each vector, shape (n,).
+    """
+    return np.sqrt(v[:, 0]*v[:, 0] + v[:, 1]*v[:, 1])
+
+class BatchSimulation:
+    """
+    The BatchSimulation class advances many independent classical episodes in lockstep.
+
+    ...
+
+    Attributes
+    ----------
+    n : int
+        Number of episodes
+    w : int
+        Width of the coordinate plane
+    h : int
+        Height of the coordinate plane
+    speed : float
+        The speed of movement
+    bias : float
+        The agent's bias on pursuing over avoiding
+    iterations : int
+        Number of iterations in each episode
+    t : int
+        Number of iterations run so far
+    attention_model : AttentionModelClassical
+        The classical attention allocation model
+    agent_loc : np.ndarray
+        Location of the agent in each episode, shape (n, 2)
+    prey_loc : np.ndarray
+        Location of the prey in each episode, shape (n, 2)
+    predator_loc : np.ndarray
+        Location of the predator in each episode, shape (n, 2)
+    agent_alive : np.ndarray
+        Whether the agent is still alive in each episode
+    agent_feasted : np.ndarray
+        Whether the agent has caught the prey in each episode
+    prey_alive : np.ndarray
+        Whether the prey is still alive in each episode
+    predator_feasted : np.ndarray
+        Whether the predator has caught the agent in each episode
+    agent_loc_trace : np.ndarray
+        The agent's locations, shape (iterations + 1, n, 2)
+    prey_loc_trace : np.ndarray
+        The prey's locations, shape (iterations + 1, n, 2)
+    predator_loc_trace : np.ndarray
+        The predator's locations, shape (iterations + 1, n, 2)
+    agent_perceived_trace : np.ndarray
+        The agent's perceived locations, shape (iterations, n, 2)
+    prey_perceived_trace : np.ndarray
+        The prey's perceived locations, shape (iterations, n, 2)
+    predator_perceived_trace : np.ndarray
+        The predator's perceived locations, shape (iterations, n, 2)
+    dist_trace : np.ndarray
+        The agent's distances to the prey and to the predator, shape (iterations, n, 2)
+    attn_trace : np.ndarray
+        The attention levels (agent, prey, predator), shape (iterations, n, 3)
+
+    Methods
+    -------
+    step()
+        Advances all episodes by one iteration.
+    run()
+        Advances all episodes until they reach the number of iterations.
+    bounce_back(loc)
+        If locations are outside the coordinate plane, bounce them back into it.
+    metrics(i, name)
+        Gets the metrics of one episode.
+    """
+
+    def __init__(self, n, w, h, speed, bias, iterations, agent_loc=None, prey_loc=None, predator_loc=None,
+                 rng=None):
+        """
+        Parameters
+        ----------
+        n : int
+            Number of episodes
+        w : int
+            Width of the coordinate plane
+        h : int
+            Height of the coordinate plane
+        speed : float
+            The speed of movement
+        bias : float
+            The agent's bias on pursuing over avoiding
+        iterations : int
+            Number of iterations in each episode
+        agent_loc : np.ndarray, optional
+            Initial location of the agent in each episode (default is the Agent's)
+        prey_loc : np.ndarray, optional
+            Initial location of the prey in each episode (default is the Prey's)
+        predator_loc : np.ndarray, optional
+            Initial location of the predator in each episode (default is the Predator's)
+        rng : np.random.Generator, optional
+            The stream every initial location that is not given is drawn from, one
+            per episode (default is None, i.e. the character classes' fixed ones)
+
+        Raises
+        ------
+        ValueError
+            If given arguments are invalid.
+        """
+
+        if n <= 0:
+            raise ValueError("n must be positive number")
+
+        if speed <= 0:
+            raise ValueError("speed must be positive number")
+
+        if bias < 0 or bias > 1:
+            raise ValueError("bias must be a number between 0 and 1")
+
+        # Default to the initial locations of the character classes, or draw them
+        # for every episode at once
+        if agent_loc is None:
+            agent_loc = spawn_mod.locate("agent", w, h, rng, n)
+        if prey_loc is None:
+            prey_loc = spawn_mod.locate("prey", w, h, rng, n)
+        if predator_loc is None:
+            predator_loc = spawn_mod.locate("predator", w, h, rng, n)
+
+        self.n = n
+        self.w = w
+        self.h = h
+        self.speed = speed
+        self.bias = bias
+        self.iterations = iterations
+        self.t = 0
+        self.attention_model = attention_mod.AttentionModelClassical(w, h)
+
+        self.agent_loc = np.broadcast_to(np.asarray(agent_loc, dtype=float), (n, 2)).copy()
+        self.prey_loc = np.broadcast_to(np.asarray(prey_loc, dtype=float), (n, 2)).copy()
+        self.predator_loc = np.broadcast_to(np.asarray(predator_loc, dtype=float), (n, 2)).copy()
+
+        self.agent_alive = np.ones(n, dtype=bool)
+        self.agent_feasted = np.zeros(n, dtype=bool)
+        self.prey_alive = np.ones(n, dtype=bool)
+        self.predator_feasted = np.zeros(n, dtype=bool)
+
+        self.agent_loc_trace = np.empty((iterations + 1, n, 2))
+        self.prey_loc_trace = np.empty((iterations + 1, n, 2))
+        self.predator_loc_trace = np.empty((iterations + 1, n, 2))
+        self.agent_loc_trace[0] = self.agent_loc
+        self.prey_loc_trace[0] = self.prey_loc
+        self.predator_loc_trace[0] = self.predator_loc
+        self.agent_perceived_trace = np.empty((iterations, n, 2))
+        self.prey_perceived_trace = np.empty((iterations, n, 2))
+        self.predator_perceived_trace = np.empty((iterations, n, 2))
+        self.dist_trace = np.empty((iterations, n, 2))
+        self.attn_trace = np.empty((iterations, n, 3))
+        return
+
+    def step(self):
+        """Advances all episodes by one iteration
+
+        Returns
+        -------
+        void
+
+        Raises
+        ------
+        ValueError
+            If all iterations have already been run.
+        """
+
+        if self.t >= self.iterations:
+            raise ValueError("all iterations have already been run")
+
+        agent_v = self.agent_loc
+        speed = self.speed
+
+        # Allocate attention on the locations at the start of the iteration
+        attn = self.attention_model.get_attention_levels_array(agent_v, self.prey_loc, self.predator_loc)
+
+        with np.errstate(divide="ignore"):
+            # Prey avoids agent
+            move_v = agent_v - self.prey_loc
+            dist2agent = norm(move_v)
+            self.prey_alive &= ~(dist2agent < BUFFER)
+            d = np.minimum(speed / dist2agent, 1)
+            prey_v = np.floor(self.prey_loc - d[:, None] * move_v)
+            self.bounce_back(prey_v)
+
+            # Predator pursues agent
+            move_v = agent_v - self.predator_loc
+            dist2agent = norm(move_v)
+            d = np.minimum(speed / dist2agent, 1)
+            pred_v = np.floor(self.predator_loc + d[:, None] * move_v)
+            self.predator_feasted |= norm(agent_v - pred_v) < BUFFER
+
+            # Get the perceived locations
+            blur = 100 - attn
+            agent_perceived_v = agent_v + blur[:, 0:1]
+            prey_perceived_v = prey_v + blur[:, 1:2]
+            pred_perceived_v = pred_v + blur[:, 2:3]
+
+            # If the agent has been caught, set alive to False
+            self.agent_alive &= ~(norm(pred_v - agent_v) < BUFFER)
+
+            # Reflect the predator's location along the agent's coordinates
+            new_pred_perceived_v = agent_perceived_v - (pred_perceived_v - agent_perceived_v)
+            # Get point in between predator's and prey's (superposition of pursuit and avoidance)
+            super_v = new_pred_perceived_v + self.bias * (prey_perceived_v - new_pred_perceived_v)
+            # Vector for the direction of movement
+            move_v = super_v - agent_perceived_v
+
+            # Move agent alongside the superposition vector at a given speed
+            d = np.minimum(speed / norm(move_v), 1)
+            agent_v = np.floor(agent_v + d[:, None] * move_v)
+
+        # If the agent has reached its prey, set feasted to True
+        self.agent_feasted |= norm(prey_v - agent_v) < BUFFER
+        self.bounce_back(agent_v)
+
+        # Update locations and traces
+        self.agent_loc = agent_v
+        self.prey_loc = prey_v
+        self.predator_loc = pred_v
+        t = self.t
+        self.attn_trace[t] = attn
+        self.agent_perceived_trace[t] = agent_perceived_v
+        self.prey_perceived_trace[t] = prey_perceived_v
+        self.predator_perceived_trace[t] = pred_perceived_v
+        self.dist_trace[t, :, 0] = norm(prey_v - agent_v)
+        self.dist_trace[t, :, 1] = norm(pred_v - agent_v)
+        self.agent_loc_trace[t + 1] = agent_v
+        self.prey_loc_trace[t + 1] = prey_v
+        self.predator_loc_trace[t + 1] = pred_v
+        self.t += 1
+
+    def run(self):
+        """Advances all episodes until they reach the number of iterations
+
+        Returns
+        -------
+        void
+        """
+        while self.t < self.iterations:
+            self.step()
+
+    def bounce_back(self, loc):
+        """If locations are out of range, bounces them back into range (in place)
+
+        Parameters
+        ----------
+        loc : np.ndarray
+            The locations, shape (n, 2).
+
+        Returns
+        -------
+        void
+        """
+        # Fix x-coordinates, if needed
+        x = loc[:, 0]
+        x[x < 0] = 1
+        x[x > self.w] = self.w - 1
+
+        # Fix y-coordinates, if needed
+        y = loc[:, 1]
+        y[y < 0] = 1
+        y[y > self.h] = self.h - 1
+
+    def metrics(self, i, name="Batched Classical Implementation"):
+        """Gets the metrics of one episode
+
+        Parameters
+        ----------
+        i : int
+            The index of the episode.
+        name : str, optional
+            The name of the implementation (default is "Batched Classical Implementation")
+
+        Returns
+        -------
+        Metrics
+            The metrics of the episode, with list traces as in classical.py.
+        """
+
+        t = self.t
+        metrics = metrics_mod.Metrics(name)
+
+        # Add general metrics
+        metrics.w = self.w
+        metrics.h = self.h
+        metrics.iterations = t
+        metrics.bias = self.bias
+
+        # Add agent to metrics
+        metrics.agent_alive = bool(self.agent_alive[i])
+        metrics.agent_feasted = bool(self.agent_feasted[i])
+        metrics.agent_loc_trace = self.agent_loc_trace[:t + 1, i].tolist()
+        metrics.agent_perceived_loc_trace = self.agent_perceived_trace[:t, i].tolist()
+        metrics.prey_perceived_loc_trace = self.prey_perceived_trace[:t, i].tolist()
+        metrics.predator_perceived_loc_trace = self.predator_perceived_trace[:t, i].tolist()
+        metrics.dist_agent2prey_trace = self.dist_trace[:t, i, 0].tolist()
+        metrics.dist_agent2predator_trace = self.dist_trace[:t, i, 1].tolist()
+
+        # Add prey to metrics
+        metrics.prey_alive = bool(self.prey_alive[i])
+        metrics.prey_loc_trace = self.prey_loc_trace[:t + 1, i].tolist()
+
+        # Add predator to metrics
+        metrics.predator_feasted = bool(self.predator_feasted[i])
+        metrics.predator_loc_trace = self.predator_loc_trace[:t + 1, i].tolist()
+
+        # Add attention trace to metrics
+        metrics.attention_trace = self.attn_trace[:t, i].tolist()
+
+        return metrics
+
+def main():
+    # Initialize the batch of episodes
+    rng = None if SEED is None else np.random.default_rng(SEED)
+    simulation = BatchSimulation(EPISODES, WIDTH, HEIGHT, SPEED, BIAS, ITERATIONS, rng=rng)
+
+    # Run all episodes
+    start_time = time.perf_counter()
+    simulation.run()
+    total_time = time.perf_counter() - start_time
+
+    print("Episode-steps per second: " + "{:.0f}".format(EPISODES * ITERATIONS / total_time))
+    return simulation
+
+if __name__ == "__main__":
+    main()
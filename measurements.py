@@ -1,43 +1,39 @@
 """Comparing Quantum and Classical Implementations
 
 This runs both the classical and the quantum implementations to the Predator-Prey
-task and compares their performances using varying metrics.
+task for several seeds (i.e. initial locations) in parallel and compares their
+performances using varying metrics, each with its confidence interval over the
+seeds (see metrics/compare.py).
 """
 
-import math
-import classical as classical_mod
-import serial as serial_mod
-
-# Run classical version
-metrics_classical = classical_mod.main()
-
-# Run quantum version
-metrics_quantum = serial_mod.main()
-
-# Compare attention allocation
-correct_attention = 0
-for (c, q) in zip(metrics_classical.attention_trace, metrics_quantum.attention_trace):
-    if c == q:
-        correct_attention += 1
-
-# Compare movement
-total_distance = 0
-for (c, q) in zip(metrics_classical.agent_loc_trace[1:], metrics_quantum.agent_loc_trace[1:]):
-    total_distance += math.dist(c, q)
-average_distance = total_distance/len(metrics_quantum.agent_loc_trace[1:])
-
-# Print metrics
-print(metrics_classical)
-print(metrics_quantum)
-
-# # Print comparison metrics
-print('\n===============================')
-print("C O M P A R I S O N\n")
-print('Attention Allocation Comparison')
-print("\tNumber of equal attention allocations:             " + str(correct_attention))
-print("\tTotal number of attention allocations:             " + str(len(metrics_quantum.attention_trace)))
-print("\tAttention allocation accuracy rate:                " + str(correct_attention/len(metrics_quantum.attention_trace) * 100) + "%")
-
-print('\nMovement Comparison')
-print("\tNumber of steps taken:                             " + str(len(metrics_quantum.agent_loc_trace[1:])))
-print("\tAverage distance between step taken by each model: " + "{:.2f}".format(average_distance))
+import sys
+from metrics import compare as compare_mod
+
+# Seeds of the initial locations (None is the characters' fixed locations), e.g.
+# np.random.SeedSequence(0).spawn(32) for 32 independent episodes
+SEEDS = [None]
+# Number of worker processes (None uses all cores)
+MAX_WORKERS = None
+# Also print the metrics of each implementation for every seed
+PRINT_METRICS = False
+
+def main(seeds=None, parameters=None, sampler_factory=None, max_workers=None, print_metrics=None):
+    seeds = SEEDS if seeds is None else seeds
+    max_workers = MAX_WORKERS if max_workers is None else max_workers
+    print_metrics = PRINT_METRICS if print_metrics is None else print_metrics
+
+    # Run both implementations for every seed and compare them
+    comparison = compare_mod.run(seeds, parameters, sampler_factory, max_workers, print_metrics)
+
+    # Print metrics
+    if print_metrics:
+        for classical, quantum in zip(comparison["reports"]["classical"], comparison["reports"]["quantum"]):
+            sys.stdout.write(classical + "\n")
+            sys.stdout.write(quantum + "\n")
+
+    # Print comparison metrics
+    compare_mod.write_comparison(comparison, sys.stdout)
+    return comparison
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import io
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import classical as classical_mod
+import serial as serial_mod
+from metrics import report as report_mod
+from models import sampler as sampler_mod
+
+# z-score of the confidence intervals (95%)
+CONFIDENCE_Z = 1.96
+# Two attention allocations agree if no level differs by more than this
+ATTENTION_TOLERANCE = 1e-6
+# Two trajectories have diverged once the agents are farther apart than this
+DIVERGENCE_DISTANCE = 30
+# Timings compared between the implementations (in microseconds, but wall_time)
+TIMINGS = ["attention_time", "movement_time", "wall_time"]
+
+def run_seed(implementation, seed, parameters, sampler_factory=None, report=False):
+    """Runs one episode of an implementation (in a worker process)
+
+    Parameters
+    ----------
+    implementation : str
+        Either "classical" or "quantum".
+    seed : int or np.random.SeedSequence
+        The seed the characters' initial locations are drawn from (None for the
+        fixed locations).
+    parameters : dict
+        The iterations, width, height, and speed of the episode, and the bias
+        (classical) or num_reads (quantum).
+    sampler_factory : callable, optional
+        Creates the sampler of the quantum implementation (default is None, i.e.
+        the QPU)
+    report : bool, optional
+        Whether to also return the episode's metrics report (default is False)
+
+    Returns
+    -------
+    dict
+        The traces of the episode as arrays, its outcome, its timings, and, if
+        report is set, its metrics report.
+
+    Raises
+    ------
+    ValueError
+        If the implementation does not exist.
+    """
+    rng = None if seed is None else np.random.default_rng(seed)
+
+    # Run the episode
+    start_time = time.perf_counter()
+    if implementation == "classical":
+        metrics = classical_mod.main(rng=rng, **{k: v for k, v in parameters.items() if k != "num_reads"})
+    elif implementation == "quantum":
+        session = sampler_mod.SamplerSession() if sampler_factory is None else \
+            sampler_mod.SamplerSession(sampler_factory=sampler_factory)
+        metrics = serial_mod.main(session, rng=rng, **{k: v for k, v in parameters.items() if k != "bias"})
+    else:
+        raise ValueError("unknown implementation " + implementation)
+    wall_time = time.perf_counter() - start_time
+
+    episode = {"attention": report_mod.as_array(metrics.attention_trace),
+               "agent_loc": report_mod.as_array(metrics.agent_loc_trace),
+               "agent_alive": metrics.agent_alive,
+               "agent_feasted": metrics.agent_feasted,
+               "attention_time": metrics.attention_time,
+               "movement_time": metrics.movement_time,
+               "wall_time": wall_time}
+
+    # Render the report in the worker, so the metrics need not be sent back
+    if report:
+        stream = io.StringIO()
+        metrics.write(stream)
+        episode["report"] = stream.getvalue()
+
+    return episode
+
+def align(arrays):
+    """Stacks traces of possibly different lengths, padding the short ones with NaN
+
+    Parameters
+    ----------
+    arrays : [np.ndarray]
+        The traces, each of shape (T_i, ...).
+
+    Returns
+    -------
+    np.ndarray
+        The traces, shape (M, max T_i, ...).
+    """
+    length = max(len(array) for array in arrays)
+    aligned = np.full((len(arrays), length) + arrays[0].shape[1:], np.nan)
+    for i, array in enumerate(arrays):
+        aligned[i, :len(array)] = array
+    return aligned
+
+def interval(values):
+    """Gets the mean of samples with its normal-approximation confidence interval
+
+    Only for unbounded quantities; rates use wilson, whose interval stays in [0, 1].
+
+    Parameters
+    ----------
+    values : np.ndarray
+        The samples (NaN are ignored).
+
+    Returns
+    -------
+    dict
+        The mean and the low and high ends of its confidence interval.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {"mean": None, "low": None, "high": None}
+
+    mean = float(values.mean())
+    half = CONFIDENCE_Z * float(values.std(ddof=1)) / np.sqrt(len(values)) if len(values) > 1 else 0.0
+    return {"mean": mean, "low": mean - half, "high": mean + half}
+
+def wilson(rates):
+    """Gets the mean of rates with its Wilson score confidence interval
+
+    The mean is taken as the success rate of one trial per sample, so the interval
+    stays within [0, 1] and is not degenerate at rates of 0 or 1 or for few samples.
+
+    Parameters
+    ----------
+    rates : np.ndarray
+        The samples, each a rate in [0, 1] or a bool (NaN are ignored).
+
+    Returns
+    -------
+    dict
+        The mean and the low and high ends of its confidence interval.
+    """
+    rates = np.asarray(rates, dtype=float)
+    rates = rates[~np.isnan(rates)]
+    if len(rates) == 0:
+        return {"mean": None, "low": None, "high": None}
+
+    n = len(rates)
+    p = float(rates.mean())
+    z2 = CONFIDENCE_Z ** 2
+    center = (p + z2 / (2 * n)) / (1 + z2 / n)
+    half = CONFIDENCE_Z / (1 + z2 / n) * float(np.sqrt(p * (1 - p) / n + z2 / (4 * n * n)))
+    return {"mean": p, "low": max(0.0, center - half), "high": min(1.0, center + half)}
+
+def compare(classical, quantum):
+    """Compares the episodes of both implementations, seed by seed
+
+    Parameters
+    ----------
+    classical : [dict]
+        The classical episodes (see run_seed).
+    quantum : [dict]
+        The quantum episodes, for the same seeds in the same order.
+
+    Returns
+    -------
+    dict
+        The attention agreement rate, trajectory divergence, survival and feast
+        rates, and timing ratios (quantum over classical), each as a mean with
+        its confidence interval over the seeds, and the mean divergence at each
+        step.
+
+    Raises
+    ------
+    ValueError
+        If the numbers of episodes differ or there are none.
+    """
+    if len(classical) != len(quantum) or not classical:
+        raise ValueError("both implementations must have the same positive number of episodes")
+
+    # Traces as (M, T, ...) arrays
+    attn_c = align([e["attention"] for e in classical])
+    attn_q = align([e["attention"] for e in quantum])
+    loc_c = align([e["agent_loc"] for e in classical])
+    loc_q = align([e["agent_loc"] for e in quantum])
+    steps = min(attn_c.shape[1], attn_q.shape[1])
+    locs = min(loc_c.shape[1], loc_q.shape[1])
+
+    # Attention agreement rate of each seed
+    agree = np.all(np.abs(attn_c[:, :steps] - attn_q[:, :steps]) <= ATTENTION_TOLERANCE, axis=2)
+    valid = ~np.isnan(attn_c[:, :steps, 0]) & ~np.isnan(attn_q[:, :steps, 0])
+    agreement = np.where(valid.any(axis=1), (agree & valid).sum(axis=1) / np.maximum(valid.sum(axis=1), 1),
+                         np.nan)
+
+    # Distance between the agents at each step after the first
+    divergence = np.linalg.norm(loc_c[:, 1:locs] - loc_q[:, 1:locs], axis=2)
+
+    # First step at which the trajectories are farther apart than DIVERGENCE_DISTANCE
+    diverged = divergence > DIVERGENCE_DISTANCE
+    first = np.where(diverged.any(axis=1), diverged.argmax(axis=1) + 1, np.nan)
+
+    comparison = {"seeds": len(classical),
+                  "attention_agreement": wilson(agreement),
+                  "mean_divergence": interval(np.nanmean(divergence, axis=1) if divergence.shape[1]
+                                              else np.full(len(classical), np.nan)),
+                  "final_divergence": interval(divergence[:, -1] if divergence.shape[1]
+                                               else np.full(len(classical), np.nan)),
+                  "first_divergence": interval(first),
+                  "divergence_by_step": np.nanmean(divergence, axis=0).tolist() if divergence.shape[1] else []}
+
+    # Survival and feast rates of each implementation
+    for name, episodes in (("classical", classical), ("quantum", quantum)):
+        comparison[name + "_survival"] = wilson([e["agent_alive"] for e in episodes])
+        comparison[name + "_feast"] = wilson([e["agent_feasted"] for e in episodes])
+
+    # Timing ratios, averaged on a log scale so they are symmetric
+    for timing in TIMINGS:
+        c = np.array([e[timing] for e in classical], dtype=float)
+        q = np.array([e[timing] for e in quantum], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_ratio = np.log(q / c)
+        log_ratio[~np.isfinite(log_ratio)] = np.nan
+        ratio = interval(log_ratio)
+        comparison[timing + "_ratio"] = {k: None if v is None else float(np.exp(v)) for k, v in ratio.items()}
+
+    return comparison
+
+def run(seeds, parameters=None, sampler_factory=None, max_workers=None, reports=False):
+    """Runs both implementations for every seed in parallel and compares them
+
+    Parameters
+    ----------
+    seeds : [int or np.random.SeedSequence]
+        The seeds (see run_seed), e.g. spawned with np.random.SeedSequence.spawn.
+    parameters : dict, optional
+        Parameters of the episodes (see run_seed; default is each module's)
+    sampler_factory : callable, optional
+        Creates the sampler of the quantum implementation (default is None, i.e.
+        the QPU)
+    max_workers : int, optional
+        Number of worker processes (default is None, i.e. all cores)
+    reports : bool, optional
+        Whether to also return the metrics report of every episode (default is
+        False)
+
+    Returns
+    -------
+    dict
+        The comparison (see compare) over the seeds whose episodes both finished,
+        the indices of the seeds that failed, and the reports of the classical and
+        the quantum episodes (in the order of the seeds) if reports is set.
+
+    Raises
+    ------
+    ValueError
+        If there are no seeds.
+    Exception
+        The error of the first seed, if every seed failed.
+    """
+    if not seeds:
+        raise ValueError("seeds must not be empty")
+
+    parameters = {} if parameters is None else parameters
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(executor.submit(run_seed, "classical", seed, parameters, None, reports),
+                    executor.submit(run_seed, "quantum", seed, parameters, sampler_factory, reports))
+                   for seed in seeds]
+
+        # Keep going with the other seeds if an episode fails, leaving its seed out
+        classical = []
+        quantum = []
+        failed = []
+        error = None
+        for i, pair in enumerate(futures):
+            try:
+                episodes = [f.result() for f in pair]
+            except Exception as e:
+                print("Failed seed " + str(i) + " (" + repr(seeds[i]) + "): " + repr(e), file=sys.stderr)
+                failed.append(i)
+                error = e if error is None else error
+                continue
+            classical.append(episodes[0])
+            quantum.append(episodes[1])
+
+    if not classical:
+        raise error
+
+    comparison = compare(classical, quantum)
+    comparison["failed"] = failed
+    if reports:
+        comparison["reports"] = {"classical": [e["report"] for e in classical],
+                                 "quantum": [e["report"] for e in quantum]}
+    return comparison
+
+def write_comparison(comparison, stream):
+    """Writes the report of a comparison
+
+    Parameters
+    ----------
+    comparison : dict
+        The comparison (see compare).
+    stream : file-like
+        Where the report is written.
+
+    Returns
+    -------
+    void
+    """
+    def fmt(value, scale=1, suffix=""):
+        if value["mean"] is None:
+            return "n/a"
+        return "{:.2f}{} [{:.2f}, {:.2f}]".format(value["mean"] * scale, suffix, value["low"] * scale,
+                                                 value["high"] * scale)
+
+    stream.write('\n===============================\n')
+    stream.write("C O M P A R I S O N\n\n")
+    report_mod.write_line(stream, "Number of seeds:", comparison["seeds"])
+    if comparison.get("failed"):
+        report_mod.write_line(stream, "Number of failed seeds:", len(comparison["failed"]))
+    stream.write('\nAttention Allocation Comparison\n')
+    report_mod.write_line(stream, "Attention allocation agreement rate:",
+                          fmt(comparison["attention_agreement"], 100, "%"))
+    stream.write('\nMovement Comparison\n')
+    report_mod.write_line(stream, "Mean distance between the agents:", fmt(comparison["mean_divergence"]))
+    report_mod.write_line(stream, "Final distance between the agents:", fmt(comparison["final_divergence"]))
+    report_mod.write_line(stream, "First step farther apart than " + str(DIVERGENCE_DISTANCE) + ":",
+                          fmt(comparison["first_divergence"]))
+    stream.write('\nOutcome Comparison\n')
+    for name in ("classical", "quantum"):
+        report_mod.write_line(stream, name.capitalize() + " survival rate:",
+                              fmt(comparison[name + "_survival"], 100, "%"))
+        report_mod.write_line(stream, name.capitalize() + " feast rate:",
+                              fmt(comparison[name + "_feast"], 100, "%"))
+    stream.write('\nTiming Comparison (quantum / classical)\n')
+    for timing in TIMINGS:
+        report_mod.write_line(stream, timing.replace("_", " ").capitalize() + " ratio:",
+                              fmt(comparison[timing + "_ratio"], suffix="x"))
@@ -1,3 +1,37 @@
+import io
+import json
+import numpy as np
+from metrics import report as report_mod
+
+# Traces stored as one contiguous array each by Metrics.save
+TRACES = ["attention_trace", "agent_loc_trace", "agent_perceived_loc_trace",
+          "dist_agent2prey_trace", "dist_agent2predator_trace", "prey_loc_trace",
+          "prey_perceived_loc_trace", "predator_loc_trace", "predator_perceived_loc_trace"]
+# First bytes of a file written by Metrics.save
+MAGIC = b"PPMETRIC"
+# Arrays in a file written by Metrics.save start at multiples of this many bytes
+ALIGNMENT = 64
+
+def plain(value):
+    """Converts NumPy values (possibly nested in lists and dicts) to plain Python values
+
+    Parameters
+    ----------
+    value : object
+        The value to be converted.
+
+    Returns
+    -------
+    object
+        The converted value.
+    """
+    if isinstance(value, dict):
+        return {key: plain(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
 
 class Metrics:
 
@@ -14,6 +48,16 @@ class Metrics:
 
     Methods
     -------
+    to_dict()
+        Gets the metrics as a dict of plain Python values.
+    from_dict(data)
+        Builds a Metrics instance from a dict made by to_dict.
+    save(path)
+        Writes the metrics to a columnar binary file.
+    load(path, mmap)
+        Reads the metrics from a columnar binary file.
+    write(stream, max_items, summary)
+        Writes the report of the implementation to a file-like object.
     """
 
     def __init__(self, name):
@@ -45,88 +89,151 @@ class Metrics:
         self.predator_feasted = False
         self.predator_loc_trace = []
         self.predator_perceived_loc_trace = []
+        self.sampler_stats = {}
+        self.cache_stats = {}
+        self.speculation_stats = {}
+        self.telemetry_stats = {}
+        self.read_stats = {}
+        self.phase_stats = {}
+        self.capture_stats = {}
         return
+
+    def to_dict(self):
+        """Gets the metrics as a dict of plain Python values (e.g. to write them as JSON)
+
+        Returns
+        -------
+        dict
+            The metrics, keyed by attribute name.
+        """
+        return {key: plain(value) for key, value in vars(self).items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Metrics instance from a dict made by to_dict
+
+        Parameters
+        ----------
+        data : dict
+            The metrics, keyed by attribute name.
+
+        Returns
+        -------
+        Metrics
+            The metrics.
+        """
+        metrics = cls(data["name"])
+        for key, value in data.items():
+            setattr(metrics, key, value)
+        return metrics
+
+    def save(self, path):
+        """Writes the metrics to a columnar binary file
+
+        The file holds a small JSON header with the scalar fields and the layout of
+        the traces, followed by one contiguous, aligned array per trace.
+
+        Parameters
+        ----------
+        path : str
+            The file to write.
+
+        Returns
+        -------
+        void
+        """
+        # One contiguous array per trace (Trace objects keep their compact dtype)
+        arrays = {}
+        for key in TRACES:
+            trace = getattr(self, key)
+            arrays[key] = np.ascontiguousarray(getattr(trace, "array", trace))
+
+        # Lay out the arrays one after the other, aligned
+        columns = {}
+        offset = 0
+        for key, array in arrays.items():
+            columns[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        scalars = {key: plain(value) for key, value in vars(self).items() if key not in TRACES}
+        header = json.dumps({"version": 1, "scalars": scalars, "columns": columns}).encode()
+        # Pad the header so that the arrays start aligned
+        header += b" " * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            start = f.tell()
+            for key, array in arrays.items():
+                f.seek(start + columns[key]["offset"])
+                f.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Reads the metrics from a columnar binary file written by save
+
+        Parameters
+        ----------
+        path : str
+            The file to read.
+        mmap : bool, optional
+            Whether to memory-map the traces (read-only) instead of reading them
+            into memory (default is True)
+
+        Returns
+        -------
+        Metrics
+            The metrics, with one NumPy array per trace.
+
+        Raises
+        ------
+        ValueError
+            If the file was not written by save.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("not a metrics file")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len))
+            start = f.tell()
+            data = None if mmap else f.read()
+
+        if mmap:
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=start)
+        else:
+            data = np.frombuffer(data, dtype=np.uint8)
+
+        metrics = cls.from_dict(header["scalars"])
+        for key, column in header["columns"].items():
+            dtype = np.dtype(column["dtype"])
+            count = int(np.prod(column["shape"]))
+            offset = column["offset"]
+            array = data[offset:offset + count * dtype.itemsize].view(dtype)
+            setattr(metrics, key, array.reshape(column["shape"]))
+        return metrics
     
+    def write(self, stream, max_items=None, summary=False):
+        """Writes the report of the implementation to a file-like object, in chunks
+
+        Parameters
+        ----------
+        stream : file-like
+            Where the report is written.
+        max_items : int, optional
+            Maximum number of elements written per trace (default is None, i.e. all)
+        summary : bool, optional
+            Whether to summarize the traces instead of writing them (default is False)
+
+        Returns
+        -------
+        void
+        """
+        report_mod.write_metrics(self, stream, max_items, summary)
+
     def __repr__(self):
         """Displays information about the implementation
         """
-        display = ['\n===============================']
-        display.append(" ".join(self.name.upper()) + "\n")
-        display.append('General Metrics')
-        display.append("\tWidth x Height:                                    " + str(self.w) + " x " + str(self.h))
-        display.append("\tIterations:                                        " + str(self.iterations))
-        if self.num_reads != -1:
-            display.append("\tAnnealer reads per iteration:                      " + str(self.num_reads))
-        if self.bias != -1:
-            display.append("\tPursuit bias:                                      " + str(self.bias))
-
-        display.append('\nTime Metrics')
-        display.append("\tTotal time (in microseconds):                      " + "{:.2f}".format(self.total_time))      
-        display.append("\t\tAttention time:                            " + "{:.2f}".format(self.attention_time))
-        display.append("\t\tMovement time:                             " + "{:.2f}".format(self.movement_time))
-
-        display.append('\nAttention Allocation Metrics')
-        trace_str = "\tTrace:                                             "
-        for attn in self.attention_trace:
-            trace_str += ", " + str(attn)
-        display.append(trace_str.replace(", ","",1))
-
-        display.append('\nAgent Metrics')
-        display.append('\tAlive:                                             ' + str(self.agent_alive))
-        display.append('\tFeasted:                                           ' + str(self.agent_feasted))
-        display.append('\tSteps taken:                                       ' + str(len(self.agent_loc_trace) - 1))
-        trace_str = "\tLocation trace:                                    "
-        for loc in self.agent_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-        trace_str = "\tAgent perceived location trace:                    "
-        for loc in self.agent_perceived_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-        trace_str = "\tDistance to prey trace:                            "
-        for dist in self.dist_agent2prey_trace:
-            trace_str += ", " + "{:.2f}".format(dist)
-        display.append(trace_str.replace(", ","",1))
-        trace_str = "\tDistance to predator trace:                        "
-        for dist in self.dist_agent2predator_trace:
-            trace_str += ", " + "{:.2f}".format(dist)
-        display.append(trace_str.replace(", ","",1))
-
-        display.append('\nPrey Metrics')
-        display.append('\tAlive:                                             ' + str(self.prey_alive))
-        display.append('\tSteps taken:                                       ' + str(len(self.prey_loc_trace) - 1))
-        trace_str = "\tLocation trace:                                    "
-        for loc in self.prey_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-        trace_str = "\tAgent's perceived prey location trace:             "
-        for loc in self.prey_perceived_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-
-        display.append('\nPredator Metrics')
-        display.append('\tFeasted:                                           ' + str(self.predator_feasted))
-        display.append('\tSteps taken:                                       ' + str(len(self.predator_loc_trace) - 1))
-        trace_str = "\tLocation trace:                                    "
-        for loc in self.predator_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-        trace_str = "\tAgent's perceived predator location trace:         "
-        for loc in self.predator_perceived_loc_trace:
-            loc[0] = "{:.2f}".format(loc[0])
-            loc[1] = "{:.2f}".format(loc[1])
-            trace_str += ", " + str(loc)
-        display.append(trace_str.replace(", ","",1))
-
-        display.append('===============================\n')
-        return "\n".join(display)
+        stream = io.StringIO()
+        self.write(stream)
+        return stream.getvalue()
@@ -0,0 +1,397 @@
+import cProfile
+import math
+import pstats
+import time
+import tracemalloc
+
+# Percentiles reported for each phase
+PERCENTILES = (50, 95, 99)
+# Log-scale bins per decade of nanoseconds (the percentiles are within about 6% of the real values)
+BINS_PER_DECADE = 20
+# Number of bins, covering durations from 1 ns to 1000 s
+NUM_BINS = 12 * BINS_PER_DECADE
+# Number of functions reported by a cProfile capture
+TOP_FUNCTIONS = 10
+
+class Phase:
+    """
+    The Phase class keeps the durations of one phase of a run as a histogram.
+
+    Each duration is counted in a fixed log-scale bin, so a phase takes the same
+    memory however many times it runs, and its percentiles are read from the bins.
+
+    ...
+
+    Attributes
+    ----------
+    bins : list
+        Number of durations in each bin
+    count : int
+        Number of runs of the phase
+    total : int
+        Total duration (in nanoseconds)
+    max : int
+        Longest duration (in nanoseconds)
+
+    Methods
+    -------
+    add(duration)
+        Records the duration of one run of the phase.
+    percentile(p)
+        Estimates a percentile of the durations.
+    """
+
+    __slots__ = ("bins", "count", "total", "max")
+
+    def __init__(self):
+        self.bins = [0] * NUM_BINS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, duration):
+        """Records the duration of one run of the phase
+
+        Parameters
+        ----------
+        duration : int
+            The duration in nanoseconds.
+
+        Returns
+        -------
+        void
+        """
+        index = int(math.log10(duration) * BINS_PER_DECADE) if duration > 1 else 0
+        self.bins[min(index, NUM_BINS - 1)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def percentile(self, p):
+        """Estimates a percentile of the durations
+
+        Parameters
+        ----------
+        p : float
+            The percentile, between 0 and 100.
+
+        Returns
+        -------
+        float
+            The geometric center of the bin the percentile falls in (at most the
+            longest duration), in nanoseconds.
+        """
+        # Find the bin of the nearest-rank duration
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.bins):
+            seen += count
+            if seen >= rank:
+                break
+
+        return min(10 ** ((index + 0.5) / BINS_PER_DECADE), self.max)
+
+class Span:
+    """
+    The Span class times one phase of a run as a context manager.
+
+    ...
+
+    Attributes
+    ----------
+    phase : Phase
+        Where the duration of the span (in nanoseconds) is recorded
+    start : int
+        perf_counter_ns when the span was entered
+    """
+
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.phase.add(time.perf_counter_ns() - self.start)
+        return False
+
+class Profiler:
+    """
+    The Profiler class collects the duration of each phase of a run.
+
+    Every time a phase runs inside span(phase) its duration is recorded with
+    perf_counter_ns in the phase's histogram; stats() summarizes them per phase. If capture is set, the
+    run between start() and stop() is also profiled with cProfile and tracemalloc.
+
+    ...
+
+    Attributes
+    ----------
+    phases : dict
+        Histogram of the durations of each phase, keyed by phase
+    capture : bool
+        Whether start() and stop() capture a cProfile profile and tracemalloc's peak
+    profile : cProfile.Profile
+        The captured profile, None if not captured
+    peak_memory : int
+        Peak memory traced by tracemalloc (in bytes), None if not captured
+
+    Methods
+    -------
+    span(phase)
+        Gets a context manager that times one run of a phase.
+    add(phase, duration)
+        Records the duration of one run of a phase.
+    start()
+        Starts the capture, if enabled.
+    stop()
+        Stops the capture, if enabled.
+    stats()
+        Summarizes the durations of each phase.
+    capture_stats()
+        Summarizes the capture.
+    """
+
+    def __init__(self, capture=False):
+        """
+        Parameters
+        ----------
+        capture : bool, optional
+            Whether start() and stop() capture a cProfile profile and tracemalloc's
+            peak memory (default is False)
+        """
+        self.phases = {}
+        self.capture = capture
+        self.profile = None
+        self.peak_memory = None
+
+    def span(self, phase):
+        """Gets a context manager that times one run of a phase
+
+        Parameters
+        ----------
+        phase : str
+            The name of the phase.
+
+        Returns
+        -------
+        Span
+            The context manager.
+        """
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Phase()
+        return Span(histogram)
+
+    def add(self, phase, duration):
+        """Records the duration of one run of a phase
+
+        Parameters
+        ----------
+        phase : str
+            The name of the phase.
+        duration : int
+            The duration in nanoseconds.
+
+        Returns
+        -------
+        void
+        """
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Phase()
+        histogram.add(duration)
+
+    def start(self):
+        """Starts the capture, if enabled
+
+        Returns
+        -------
+        void
+        """
+        if not self.capture:
+            return
+
+        tracemalloc.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        """Stops the capture, if enabled
+
+        Returns
+        -------
+        void
+        """
+        if not self.capture or self.profile is None:
+            return
+
+        self.profile.disable()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    def stats(self):
+        """Summarizes the durations of each phase
+
+        Returns
+        -------
+        dict
+            The number of runs and the total, maximum, and percentile durations
+            (in microseconds) of each phase, keyed by phase.
+        """
+        stats = {}
+        for phase, histogram in self.phases.items():
+            if not histogram.count:
+                continue
+            stats[phase] = {"count": histogram.count, "total": histogram.total / 1000,
+                            "max": histogram.max / 1000}
+            for p in PERCENTILES:
+                stats[phase]["p" + str(p)] = histogram.percentile(p) / 1000
+        return stats
+
+    def capture_stats(self):
+        """Summarizes the capture
+
+        Returns
+        -------
+        dict
+            The peak memory (in bytes) and the functions with the highest cumulative
+            time (in microseconds), empty if nothing was captured.
+        """
+        if self.profile is None:
+            return {}
+
+        profile = pstats.Stats(self.profile)
+        functions = sorted(profile.stats.items(), key=lambda item: item[1][3], reverse=True)
+        top = [[pstats.func_std_string(function), timing[3] * 1000000]
+               for function, timing in functions[:TOP_FUNCTIONS]]
+        return {"peak_memory": self.peak_memory, "top_functions": top}
+
+class NullSpan:
+    """
+    The NullSpan class is a context manager that does nothing (for NullProfiler).
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        """Enters the span, timing nothing
+
+        Returns
+        -------
+        NullSpan
+            The span.
+        """
+        return self
+
+    def __exit__(self, *exc):
+        """Exits the span, recording nothing
+
+        Returns
+        -------
+        bool
+            False, so exceptions are not suppressed.
+        """
+        return False
+
+class NullProfiler:
+    """
+    The NullProfiler class has the interface of Profiler but records nothing, so
+    instrumented code costs almost nothing when profiling is disabled.
+
+    ...
+
+    Methods
+    -------
+    span(phase)
+        Gets a context manager that times nothing.
+    add(phase, duration)
+        Records nothing.
+    start()
+        Starts nothing.
+    stop()
+        Stops nothing.
+    stats()
+        Summarizes no durations.
+    capture_stats()
+        Summarizes no capture.
+    """
+
+    span_instance = NullSpan()
+
+    def span(self, phase):
+        """Gets a context manager that times nothing
+
+        Parameters
+        ----------
+        phase : str
+            The name of the phase.
+
+        Returns
+        -------
+        NullSpan
+            The shared context manager.
+        """
+        return self.span_instance
+
+    def add(self, phase, duration):
+        """Records nothing
+
+        Parameters
+        ----------
+        phase : str
+            The name of the phase.
+        duration : int
+            The duration in nanoseconds.
+
+        Returns
+        -------
+        void
+        """
+        return
+
+    def start(self):
+        """Starts nothing
+
+        Returns
+        -------
+        void
+        """
+        return
+
+    def stop(self):
+        """Stops nothing
+
+        Returns
+        -------
+        void
+        """
+        return
+
+    def stats(self):
+        """Summarizes no durations
+
+        Returns
+        -------
+        dict
+            An empty dict.
+        """
+        return {}
+
+    def capture_stats(self):
+        """Summarizes no capture
+
+        Returns
+        -------
+        dict
+            An empty dict.
+        """
+        return {}
+
+# Shared profiler for disabled profiling
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,257 @@
+import numpy as np
+
+# Formats of one element of each kind of trace
+LOC_FORMAT = "['%.2f', '%.2f']"
+ATTN_FORMAT = "[%.2f, %.2f, %.2f]"
+DIST_FORMAT = "%.2f"
+# Number of trace elements formatted and written at a time
+CHUNK_SIZE = 4096
+# Column where the values of a report start
+LABEL_WIDTH = 51
+
+def as_array(trace):
+    """Gets a trace as a NumPy array without copying it, if possible
+
+    Parameters
+    ----------
+    trace : Trace, np.ndarray, or [[float]]
+        The trace.
+
+    Returns
+    -------
+    np.ndarray
+        The trace's values.
+    """
+    return np.asarray(getattr(trace, "array", trace), dtype=float)
+
+def write_line(stream, label, value, indent=1):
+    """Writes a line with a label and a value, aligned with the other lines
+
+    Parameters
+    ----------
+    stream : file-like
+        Where the report is written.
+    label : str
+        The label of the line.
+    value : object
+        The value of the line.
+    indent : int, optional
+        Number of tabs before the label (default is 1)
+
+    Returns
+    -------
+    void
+    """
+    stream.write("\t" * indent + label.ljust(LABEL_WIDTH - 8 * (indent - 1)) + str(value) + "\n")
+
+def write_trace(stream, label, trace, fmt, max_items=None, summary=False, chunk_size=CHUNK_SIZE):
+    """Writes a trace in chunks, never modifying it
+
+    Parameters
+    ----------
+    stream : file-like
+        Where the report is written.
+    label : str
+        The label of the trace.
+    trace : Trace, np.ndarray, or [[float]]
+        The trace.
+    fmt : str
+        The %-format of one element of the trace.
+    max_items : int, optional
+        Maximum number of elements written; the first and last max_items / 2 are
+        written if the trace is longer (default is None, i.e. all elements)
+    summary : bool, optional
+        Whether to write the length, minimum, mean, and maximum of the trace
+        instead of its elements (default is False)
+    chunk_size : int, optional
+        Number of elements formatted and written at a time (default is CHUNK_SIZE)
+
+    Returns
+    -------
+    void
+
+    Raises
+    ------
+    ValueError
+        If max_items is less than 1.
+    """
+    if max_items is not None and max_items < 1:
+        raise ValueError("max_items must be a positive number")
+
+    values = as_array(trace)
+    stream.write("\t" + label.ljust(LABEL_WIDTH))
+
+    if summary:
+        if len(values) == 0:
+            stream.write("0 elements\n")
+        else:
+            stream.write("%d elements, min %.2f, mean %.2f, max %.2f\n"
+                         % (len(values), values.min(), values.mean(), values.max()))
+        return
+
+    n = len(values)
+    if max_items is None or n <= max_items:
+        parts = [(0, n)]
+    else:
+        head = max_items - max_items // 2
+        parts = [(0, head), (n - max_items // 2, n)]
+
+    separator = ""
+    for (start, end) in parts:
+        if start > 0:
+            stream.write(", ... (%d more) ..." % (start - parts[0][1]))
+        # Format whole chunks with a single %-operation
+        for chunk_start in range(start, end, chunk_size):
+            chunk = values[chunk_start:min(chunk_start + chunk_size, end)]
+            stream.write(separator + ", ".join([fmt] * len(chunk)) % tuple(chunk.ravel().tolist()))
+            separator = ", "
+    stream.write("\n")
+
+def write_metrics(metrics, stream, max_items=None, summary=False):
+    """Writes the report of a Metrics instance
+
+    Parameters
+    ----------
+    metrics : Metrics
+        The metrics to be reported.
+    stream : file-like
+        Where the report is written.
+    max_items : int, optional
+        Maximum number of elements written per trace (default is None, i.e. all)
+    summary : bool, optional
+        Whether to summarize the traces instead of writing them (default is False)
+
+    Returns
+    -------
+    void
+    """
+    options = {"max_items": max_items, "summary": summary}
+
+    stream.write('\n===============================\n')
+    stream.write(" ".join(metrics.name.upper()) + "\n\n")
+    stream.write('General Metrics\n')
+    write_line(stream, "Width x Height:", str(metrics.w) + " x " + str(metrics.h))
+    write_line(stream, "Iterations:", metrics.iterations)
+    if metrics.num_reads != -1:
+        write_line(stream, "Annealer reads per iteration:", metrics.num_reads)
+    if metrics.bias != -1:
+        write_line(stream, "Pursuit bias:", metrics.bias)
+
+    stream.write('\nTime Metrics\n')
+    write_line(stream, "Total time (in microseconds):", "{:.2f}".format(metrics.total_time))
+    write_line(stream, "Attention time:", "{:.2f}".format(metrics.attention_time), indent=2)
+    write_line(stream, "Movement time:", "{:.2f}".format(metrics.movement_time), indent=2)
+
+    if metrics.sampler_stats:
+        stream.write('\nSampler Session Metrics\n')
+        write_line(stream, "Client constructions:", metrics.sampler_stats["clients_built"])
+        write_line(stream, "Client constructions avoided:", metrics.sampler_stats["clients_avoided"])
+        write_line(stream, "Embedding searches:", metrics.sampler_stats["embeddings_found"])
+        write_line(stream, "Embedding searches avoided:", metrics.sampler_stats["embeddings_avoided"])
+        if "embeddings_loaded" in metrics.sampler_stats:
+            write_line(stream, "Embeddings loaded from the store:", metrics.sampler_stats["embeddings_loaded"])
+
+    if metrics.cache_stats:
+        stream.write('\nAttention Cache Metrics\n')
+        write_line(stream, "Hits:", metrics.cache_stats["hits"])
+        write_line(stream, "Misses:", metrics.cache_stats["misses"])
+        write_line(stream, "Evictions:", metrics.cache_stats["evictions"])
+
+    if metrics.speculation_stats:
+        stream.write('\nSpeculation Metrics\n')
+        write_line(stream, "Speculated attention requests:", metrics.speculation_stats["speculated"])
+        write_line(stream, "Hits:", metrics.speculation_stats["hits"])
+        write_line(stream, "Wasted:", metrics.speculation_stats["wasted"])
+        write_line(stream, "Sampling time (in microseconds):", "{:.2f}".format(metrics.speculation_stats["sampling_time"]))
+        write_line(stream, "Mean step latency (in microseconds):", "{:.2f}".format(metrics.speculation_stats["mean_step_latency"]))
+        write_line(stream, "Max step latency (in microseconds):", "{:.2f}".format(metrics.speculation_stats["max_step_latency"]))
+
+    if metrics.telemetry_stats:
+        stream.write('\nSampler Telemetry Metrics (in microseconds unless noted: mean, total)\n')
+        for model, stats in metrics.telemetry_stats.items():
+            write_line(stream, model.capitalize() + " sampler calls:", "%d (last %d kept)"
+                       % (stats["calls"], stats["records"]))
+            for field, value in stats.items():
+                if isinstance(value, dict):
+                    write_line(stream, field + ":", "%.2f, %.2f" % (value["mean"], value["total"]), indent=2)
+
+    if metrics.read_stats:
+        stream.write('\nAdaptive Read Metrics\n')
+        for model, stats in metrics.read_stats.items():
+            write_line(stream, model.capitalize() + " decisions:", stats["decisions"])
+            write_line(stream, "Mean reads per decision:", "{:.2f}".format(stats["mean_reads"]), indent=2)
+            write_line(stream, "Total reads:", stats["total_reads"], indent=2)
+            write_line(stream, "Reads saved:", stats["reads_saved"], indent=2)
+            write_line(stream, "Time saved (in microseconds):", "{:.2f}".format(stats["time_saved"]), indent=2)
+
+    if metrics.phase_stats:
+        stream.write('\nPhase Metrics (in microseconds: count, total, p50, p95, p99, max)\n')
+        for phase, stats in metrics.phase_stats.items():
+            write_line(stream, phase + ":", "%d, %.2f, %.2f, %.2f, %.2f, %.2f"
+                       % (stats["count"], stats["total"], stats["p50"], stats["p95"], stats["p99"], stats["max"]))
+
+    if metrics.capture_stats:
+        stream.write('\nCapture Metrics\n')
+        write_line(stream, "Peak traced memory (in bytes):", metrics.capture_stats["peak_memory"])
+        for function, cumulative_time in metrics.capture_stats["top_functions"]:
+            write_line(stream, "{:.2f}".format(cumulative_time), function, indent=2)
+
+    stream.write('\nAttention Allocation Metrics\n')
+    write_trace(stream, "Trace:", metrics.attention_trace, ATTN_FORMAT, **options)
+
+    stream.write('\nAgent Metrics\n')
+    write_line(stream, "Alive:", metrics.agent_alive)
+    write_line(stream, "Feasted:", metrics.agent_feasted)
+    write_line(stream, "Steps taken:", len(metrics.agent_loc_trace) - 1)
+    write_trace(stream, "Location trace:", metrics.agent_loc_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Agent perceived location trace:", metrics.agent_perceived_loc_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Distance to prey trace:", metrics.dist_agent2prey_trace, DIST_FORMAT, **options)
+    write_trace(stream, "Distance to predator trace:", metrics.dist_agent2predator_trace, DIST_FORMAT, **options)
+
+    stream.write('\nPrey Metrics\n')
+    write_line(stream, "Alive:", metrics.prey_alive)
+    write_line(stream, "Steps taken:", len(metrics.prey_loc_trace) - 1)
+    write_trace(stream, "Location trace:", metrics.prey_loc_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Agent's perceived prey location trace:", metrics.prey_perceived_loc_trace, LOC_FORMAT, **options)
+
+    stream.write('\nPredator Metrics\n')
+    write_line(stream, "Feasted:", metrics.predator_feasted)
+    write_line(stream, "Steps taken:", len(metrics.predator_loc_trace) - 1)
+    write_trace(stream, "Location trace:", metrics.predator_loc_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Agent's perceived predator location trace:", metrics.predator_perceived_loc_trace, LOC_FORMAT, **options)
+
+    stream.write('===============================\n')
+
+def write_agent(agent, stream, max_items=None, summary=False):
+    """Writes the report of an Agent
+
+    Parameters
+    ----------
+    agent : Agent
+        The agent to be reported.
+    stream : file-like
+        Where the report is written.
+    max_items : int, optional
+        Maximum number of elements written per trace (default is None, i.e. all)
+    summary : bool, optional
+        Whether to summarize the traces instead of writing them (default is False)
+
+    Returns
+    -------
+    void
+    """
+    options = {"max_items": max_items, "summary": summary}
+
+    stream.write('\n===============================\n')
+    stream.write('A G E N T\n')
+    write_line(stream, "Alive:", agent.alive)
+    write_line(stream, "Feasted:", agent.feasted)
+    # Unlike the metrics' report, the agent's has always counted the initial location
+    write_line(stream, "Steps taken:", len(agent.loc_trace))
+    write_trace(stream, "Location trace:", agent.loc_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Agent perceived location trace:", agent.perceived_agent_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Prey perceived location trace:", agent.perceived_prey_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Predator perceived location trace:", agent.perceived_predator_trace, LOC_FORMAT, **options)
+    write_trace(stream, "Attention trace (agent, prey, predator):", agent.attn_trace, ATTN_FORMAT, **options)
+    write_trace(stream, "Distances trace (dist to prey, dist to predator):", agent.dist_trace, "[%.2f, %.2f]", **options)
+    stream.write('===============================\n')
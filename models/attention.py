@@ -1,6 +1,12 @@
+import asyncio
+import copy
+import functools
 import math
 from numpy import sqrt
-from dwave.system import EmbeddingComposite, DWaveSampler
+from metrics import profiler as profiler_mod
+from models import reads as reads_mod
+from models import sampler as sampler_mod
+from models import telemetry as telemetry_mod
 
 class AttentionModel:
     """
@@ -20,6 +26,18 @@ class AttentionModel:
         Number of reads in the annealer
     total_time : floar
         Total sampling time for this model
+    session : SamplerSession
+        The sampler session shared with other models
+    fused : bool
+        Whether the three attention levels are allocated in a single sampler call
+    cache : AttentionCache
+        Memoizes attention levels on the quantized distance, None if disabled
+    profiler : Profiler
+        Times the phases of each allocation (a NullProfiler if disabled)
+    telemetry : Telemetry
+        Records the most recent sampler calls
+    reads : AdaptiveReads
+        Decides how many reads each sampler call takes, None for always num_reads
     name : str, optional
         The name of the model
 
@@ -27,13 +45,42 @@ class AttentionModel:
     -------
     qubo(dist)
         Updates the QUBO formulation given a distance.
+    qubo_fused(dists)
+        Packs the QUBO formulations for several distances on disjoint variables.
+    lookup(dist)
+        Looks up the attention level for a distance in the cache.
+    read_attn(sampler_output, key)
+        Reads the attention level from the output of the sampler.
     alloc_attn(dist)
         Allocates attention an attention level given a distance.
+    alloc_attn_async(dist)
+        Submits the attention allocation for a distance, without waiting for the sampler.
+    lookup_fused(dists)
+        Looks up the attention levels for several distances in the cache.
+    read_attn_fused(sampler_output, attns, keys)
+        Reads the missing attention levels from the output of the sampler.
+    alloc_attn_fused(dists)
+        Allocates one attention level per distance with a single sampler call.
+    alloc_attn_fused_async(dists)
+        Submits the fused attention allocation for several distances, without waiting.
+    alloc_attns_async(dists)
+        Submits the allocation of the agent's, prey's, and predator's attention levels.
+    distances(agent, prey, predator)
+        Gets the distances that guide the attention levels.
+    distances_between(agent_loc, prey_loc, predator_loc)
+        Gets the distances that guide the attention levels for the given locations.
+    normalize(attns, agent)
+        Normalizes the attention levels and keeps track of them.
     get_attn_levels(model, agent, prey, predator)
         Gets the attention level for the agent, the prey, and the predator.
+    get_attention_levels_async(agent, prey, predator)
+        Submits the attention allocation for the agent, the prey, and the predator.
+    speculator()
+        Gets a view of the model for speculative allocations.
     """
 
-    def __init__(self, w, h, num_reads, name="AttentionModel"):
+    def __init__(self, w, h, num_reads, name="AttentionModel", session=None, fused=False, cache=None,
+                 profiler=None, telemetry=None, reads=None):
         """
         Parameters
         ----------
@@ -45,6 +92,20 @@ class AttentionModel:
             Number of reads in the annealer
         name : str, optional
             The name of the model (default is "AttentionModel")
+        session : SamplerSession, optional
+            The sampler session to use (default is a new session on the QPU)
+        fused : bool, optional
+            Whether to allocate the three attention levels in a single sampler
+            call (default is False)
+        cache : AttentionCache, optional
+            Memoizes attention levels on the quantized distance (default is None)
+        profiler : Profiler, optional
+            Times the phases of each allocation (default is None, i.e. disabled)
+        telemetry : Telemetry, optional
+            Records the sampler calls (default is a new Telemetry)
+        reads : AdaptiveReads, optional
+            Decides how many reads each sampler call takes, up to num_reads
+            (default is None, i.e. always num_reads)
         """
 
         self.w = w
@@ -52,6 +113,12 @@ class AttentionModel:
         self.max_dist = sqrt(w**2 + h**2)
         self.num_reads = num_reads
         self.total_time = 0
+        self.session = session if session is not None else sampler_mod.SamplerSession()
+        self.fused = fused
+        self.cache = cache
+        self.profiler = profiler if profiler is not None else profiler_mod.NULL_PROFILER
+        self.telemetry = telemetry if telemetry is not None else telemetry_mod.Telemetry()
+        self.reads = reads
         self.name = name
     
     def qubo(self, dist):
@@ -108,9 +175,36 @@ class AttentionModel:
             Q_complete[key] = Q_cost[key] + Q_dist[key]
 
         return Q_complete
+
+    def qubo_fused(self, dists):
+        """Packs the QUBO formulations for several distances on disjoint variables
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances that will guide each of the QUBO formulations.
+
+        Returns
+        -------
+        dict
+            A dict with the combined QUBO formulation. The variable for attention
+            level l of the i-th distance is labelled (i, l).
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        Q_fused = {}
+        for i, dist in enumerate(dists):
+            for (u, v), bias in self.qubo(dist).items():
+                Q_fused[((i, u), (i, v))] = bias
+
+        return Q_fused
     
-    def alloc_attn(self, dist):
-        """Allocates attention to a character given the distance to their target
+    def lookup(self, dist):
+        """Looks up the attention level for a distance in the cache
 
         Parameters
         ----------
@@ -119,8 +213,9 @@ class AttentionModel:
 
         Returns
         -------
-        float
-            The allocated attention level.
+        (int, float)
+            The cache key of the distance and the cached attention level, or None
+            for either if there is no cache or the distance is not cached.
 
         Raises
         ------
@@ -131,34 +226,312 @@ class AttentionModel:
         if dist is None or dist < 0:
             raise ValueError("dist must be a non-zero number")
 
-        # Get the QUBO formulation for the given distance
-        Q = self.qubo(dist)
+        if self.cache is None:
+            return None, None
 
-        # Define sampler
-        sampler = EmbeddingComposite(DWaveSampler())
-        
-        # Run sampler
-        sampler_output = sampler.sample_qubo(Q, num_reads = self.num_reads)
+        key = self.cache.key(dist/self.max_dist)
+        return key, self.cache.get(key)
+
+    def read_attn(self, sampler_output, key=None):
+        """Reads the attention level from the output of the sampler
+
+        Parameters
+        ----------
+        sampler_output : dimod.SampleSet
+            The samples for the QUBO formulation of a distance.
+        key : int, optional
+            The cache key of the distance (default is None, i.e. not cached)
+
+        Returns
+        -------
+        float
+            The allocated attention level.
+        """
 
         # Time statistics in microseconds
         sampling_time = sampler_output.info["timing"]["qpu_sampling_time"]
         self.total_time += sampling_time
+        self.telemetry.record(sampler_output, sampler_output.info.get("num_reads", self.num_reads))
 
-        # Get the attention
-        attn = sampler_output.record.sample[0]
-        if attn[0] == 1:
+        # Get the attention from the lowest-energy sample
+        sample = sampler_output.first.sample
+        if sample['100'] == 1:
             attn = 100
-        elif attn[1] == 1:
+        elif sample['25'] == 1:
             attn = 25
-        elif attn[2] == 1:
+        elif sample['50'] == 1:
             attn = 50
         else:
             attn = 75
 
+        if key is not None:
+            self.cache.put(key, attn)
+
         return attn
-    
-    def get_attention_levels(self, agent, prey, predator):
-        """Gets the attention level for the agent, the prey, and the predator
+
+    def alloc_attn(self, dist):
+        """Allocates attention to a character given the distance to their target
+
+        Parameters
+        ----------
+        dist : float
+            The distance that will guide the QUBO formulation.
+
+        Returns
+        -------
+        float
+            The allocated attention level.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        # Serve the attention level from the cache, if possible
+        key, attn = self.lookup(dist)
+        if attn is not None:
+            return attn
+
+        # Get the QUBO formulation for the given distance
+        with self.profiler.span("attention_qubo"):
+            Q = self.qubo(dist)
+
+        # Run sampler
+        with self.profiler.span("attention_sampler"):
+            sampler_output = reads_mod.sample(self.reads, functools.partial(self.session.sample_qubo, Q),
+                                              self.num_reads)
+
+        with self.profiler.span("attention_decode"):
+            return self.read_attn(sampler_output, key)
+
+    def alloc_attn_async(self, dist):
+        """Submits the attention allocation for a distance, without waiting for the sampler
+
+        Must be called from a running event loop.
+
+        Parameters
+        ----------
+        dist : float
+            The distance that will guide the QUBO formulation.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the allocated attention level.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        # Serve the attention level from the cache, if possible
+        key, attn = self.lookup(dist)
+        if attn is not None:
+            request = asyncio.get_running_loop().create_future()
+            request.set_result(attn)
+            return request
+
+        # Submit the QUBO formulation for the given distance
+        with self.profiler.span("attention_qubo"):
+            Q = self.qubo(dist)
+        request = reads_mod.sample_async(self.reads, functools.partial(self.session.sample_qubo_async, Q),
+                                         self.num_reads)
+
+        return asyncio.ensure_future(sampler_mod.resolve(request, self.read_attn, key))
+
+    def lookup_fused(self, dists):
+        """Looks up the attention levels for several distances in the cache
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances that will guide each of the QUBO formulations.
+
+        Returns
+        -------
+        ([int], [float])
+            The cache keys of the distances (None if there is no cache) and their
+            attention levels, None for the ones that are not cached.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        lookups = [self.lookup(dist) for dist in dists]
+        return [key for (key, _) in lookups], [attn for (_, attn) in lookups]
+
+    def read_attn_fused(self, sampler_output, attns, keys):
+        """Reads the missing attention levels from the output of the sampler
+
+        Parameters
+        ----------
+        sampler_output : dimod.SampleSet
+            The samples for the fused QUBO formulation of the missing distances.
+        attns : [float]
+            The attention levels, None for the ones that are missing.
+        keys : [int]
+            The cache keys of the distances (None if there is no cache).
+
+        Returns
+        -------
+        [float]
+            The allocated attention levels, in the order of the distances.
+        """
+
+        # Time statistics in microseconds
+        sampling_time = sampler_output.info["timing"]["qpu_sampling_time"]
+        self.total_time += sampling_time
+        self.telemetry.record(sampler_output, sampler_output.info.get("num_reads", self.num_reads))
+
+        # Get the attention for each block from the lowest-energy sample, decoded in
+        # the same order as alloc_attn
+        sample = sampler_output.first.sample
+        attns = list(attns)
+        missing = [i for i in range(len(attns)) if attns[i] is None]
+        for block, i in enumerate(missing):
+            if sample[(block, '100')] == 1:
+                attns[i] = 100
+            elif sample[(block, '25')] == 1:
+                attns[i] = 25
+            elif sample[(block, '50')] == 1:
+                attns[i] = 50
+            else:
+                attns[i] = 75
+
+            if keys[i] is not None:
+                self.cache.put(keys[i], attns[i])
+
+        return attns
+
+    def alloc_attn_fused(self, dists):
+        """Allocates one attention level per distance with a single sampler call
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances that will guide each of the QUBO formulations.
+
+        Returns
+        -------
+        [float]
+            The allocated attention levels, in the order of the distances.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        # Serve attention levels from the cache, if possible
+        keys, attns = self.lookup_fused(dists)
+        missing = [dists[i] for i in range(len(dists)) if attns[i] is None]
+        if not missing:
+            return attns
+
+        # Get the QUBO formulation with one block of variables per missing distance
+        with self.profiler.span("attention_qubo"):
+            Q = self.qubo_fused(missing)
+
+        # Run sampler
+        with self.profiler.span("attention_sampler"):
+            sampler_output = reads_mod.sample(self.reads, functools.partial(self.session.sample_qubo, Q),
+                                              self.num_reads)
+
+        with self.profiler.span("attention_decode"):
+            return self.read_attn_fused(sampler_output, attns, keys)
+
+    def alloc_attn_fused_async(self, dists):
+        """Submits the fused attention allocation for several distances, without waiting
+
+        Must be called from a running event loop.
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances that will guide each of the QUBO formulations.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the allocated attention levels, in the order of the distances.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        # Serve attention levels from the cache, if possible
+        keys, attns = self.lookup_fused(dists)
+        missing = [dists[i] for i in range(len(dists)) if attns[i] is None]
+        if not missing:
+            request = asyncio.get_running_loop().create_future()
+            request.set_result(attns)
+            return request
+
+        # Submit the QUBO formulation with one block of variables per missing distance
+        with self.profiler.span("attention_qubo"):
+            Q = self.qubo_fused(missing)
+        request = reads_mod.sample_async(self.reads, functools.partial(self.session.sample_qubo_async, Q),
+                                         self.num_reads)
+
+        return asyncio.ensure_future(sampler_mod.resolve(request, self.read_attn_fused, attns, keys))
+
+    def alloc_attns_async(self, dists):
+        """Submits the allocation of the agent's, prey's, and predator's attention levels
+
+        The levels are neither normalized nor tracked, so the result can be thrown
+        away (e.g. if the distances were speculative). Must be called from a
+        running event loop.
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances for the agent, the prey, and the predator (see distances).
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the three allocated attention levels, before normalization.
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        if self.fused:
+            # All three attention levels from a single sampler call
+            return self.alloc_attn_fused_async(dists)
+
+        # One sampler call per attention level, all in flight at once; a distance
+        # whose cache key is already in flight shares that call, since alloc_attn
+        # would serve it from the cache entry the first call fills
+        requests = []
+        in_flight = {}
+        for dist in dists:
+            key = None
+            if self.cache is not None and dist is not None and dist >= 0:
+                key = self.cache.key(dist/self.max_dist)
+
+            if key is not None and key in in_flight:
+                self.cache.hits += 1
+                requests.append(in_flight[key])
+                continue
+
+            request = self.alloc_attn_async(dist)
+            if key is not None:
+                in_flight[key] = request
+            requests.append(request)
+
+        return asyncio.gather(*requests)
+
+    def distances(self, agent, prey, predator):
+        """Gets the distances that guide the attention levels
 
         Parameters
         ----------
@@ -172,7 +545,9 @@ class AttentionModel:
         Returns
         -------
         [float]
-            The three allocated attention levels (agent, prey, and predator).
+            The distances for the agent (average between its distance to the prey
+            and to the predator), the prey, and the predator (their distance to the
+            agent).
 
         Raises
         ------
@@ -183,19 +558,50 @@ class AttentionModel:
         if agent is None or prey is None or predator is None:
             raise ValueError("all character must be passed to the function")
 
-        dist2prey = math.dist(agent.loc, prey.loc)
-        dist2predator = math.dist(agent.loc, predator.loc)
+        return self.distances_between(agent.loc, prey.loc, predator.loc)
+
+    @staticmethod
+    def distances_between(agent_loc, prey_loc, predator_loc):
+        """Gets the distances that guide the attention levels for the given locations
+
+        Parameters
+        ----------
+        agent_loc : [float]
+            The agent's location [x, y]
+        prey_loc : [float]
+            The prey's location [x, y]
+        predator_loc : [float]
+            The predator's location [x, y]
+
+        Returns
+        -------
+        [float]
+            The distances for the agent, the prey, and the predator (see distances).
+        """
+
+        dist2prey = math.dist(agent_loc, prey_loc)
+        dist2predator = math.dist(agent_loc, predator_loc)
         avg_dist = (dist2prey + dist2predator)/2
 
-        # Agent's attention level using the average between its distance to the
-        # prey and its distance to the predator.
-        attn_agent = self.alloc_attn(avg_dist)
+        return [avg_dist, dist2prey, dist2predator]
 
-        # Prey's attention level using its distance to the agent.
-        attn_prey = self.alloc_attn(dist2prey) 
+    def normalize(self, attns, agent):
+        """Normalizes the attention levels and keeps track of them
 
-        # Predator's attention level using its distance to the agent.
-        attn_predator = self.alloc_attn(dist2predator)
+        Parameters
+        ----------
+        attns : [float]
+            The allocated attention levels (agent, prey, and predator).
+        agent : Agent
+            Agent that keeps track of the attention levels.
+
+        Returns
+        -------
+        [float]
+            The normalized attention levels (agent, prey, and predator).
+        """
+
+        attn_agent, attn_prey, attn_predator = attns
 
         # Normalize attention levels so that they don't exceed 100
         total_attn = attn_agent + attn_prey + attn_predator
@@ -204,6 +610,101 @@ class AttentionModel:
         attn_predator = attn_predator/total_attn * 100
 
         # Keep track of attention levels
-        agent.track_attn([attn_agent, attn_prey, attn_predator])
+        with self.profiler.span("bookkeeping"):
+            agent.track_attn([attn_agent, attn_prey, attn_predator])
 
         return [attn_agent, attn_prey, attn_predator]
+    
+    def get_attention_levels(self, agent, prey, predator):
+        """Gets the attention level for the agent, the prey, and the predator
+
+        Parameters
+        ----------
+        agent : Agent
+            Agent in the predator-prey environment.
+        prey : Prey
+            Prey in the predator-prey environment.
+        predator : Predator
+            Predator in the predator-prey environment.
+
+        Returns
+        -------
+        [float]
+            The three allocated attention levels (agent, prey, and predator).
+
+        Raises
+        ------
+        ValueError
+            If characters are not passed.
+        """
+
+        avg_dist, dist2prey, dist2predator = self.distances(agent, prey, predator)
+
+        if self.fused:
+            # All three attention levels from a single sampler call
+            attns = self.alloc_attn_fused([avg_dist, dist2prey, dist2predator])
+        else:
+            # Agent's attention level using the average between its distance to the
+            # prey and its distance to the predator.
+            attn_agent = self.alloc_attn(avg_dist)
+
+            # Prey's attention level using its distance to the agent.
+            attn_prey = self.alloc_attn(dist2prey) 
+
+            # Predator's attention level using its distance to the agent.
+            attn_predator = self.alloc_attn(dist2predator)
+
+            attns = [attn_agent, attn_prey, attn_predator]
+
+        return self.normalize(attns, agent)
+
+    def get_attention_levels_async(self, agent, prey, predator):
+        """Submits the attention allocation for the agent, the prey, and the predator
+
+        The distances are read and the sampler calls submitted before returning,
+        so the characters may move while the sampler is busy. Must be called from
+        a running event loop.
+
+        Parameters
+        ----------
+        agent : Agent
+            Agent in the predator-prey environment.
+        prey : Prey
+            Prey in the predator-prey environment.
+        predator : Predator
+            Predator in the predator-prey environment.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the three allocated attention levels (agent, prey, and predator).
+
+        Raises
+        ------
+        ValueError
+            If characters are not passed.
+        """
+
+        request = self.alloc_attns_async(self.distances(agent, prey, predator))
+
+        return asyncio.ensure_future(sampler_mod.resolve(request, self.normalize, agent))
+
+    def speculator(self):
+        """Gets a view of the model for speculative allocations
+
+        The view shares the model's sampler session, profiler, and read policy,
+        but has no cache and its own telemetry and sampling time, so requests
+        that may be thrown away neither evict the model's cache entries nor count
+        as the model's sampler calls.
+
+        Returns
+        -------
+        AttentionModel
+            The view.
+        """
+
+        speculator = copy.copy(self)
+        speculator.cache = None
+        speculator.telemetry = telemetry_mod.Telemetry()
+        speculator.total_time = 0
+        return speculator
@@ -1,5 +1,5 @@
 import math
-from numpy import sqrt
+import numpy as np
 
 class AttentionModelClassical:
     """
@@ -15,18 +15,38 @@ class AttentionModelClassical:
         Height of the coordinate plane
     max_dist : float
         Maximum possible distance in the coordinate plane
+    cache : AttentionCache
+        Memoizes attention levels on the quantized distance, None if disabled
+    levels : np.ndarray
+        The possible attention levels
+    slopes : np.ndarray
+        Slope of each level's cost on the normalized distance
+    intercepts : np.ndarray
+        Cost of each level at a normalized distance of zero
+    breakpoints : np.ndarray
+        Normalized distances where the minimum-cost level changes
+    breakpoint_levels : np.ndarray
+        Minimum-cost level before, between, and after the breakpoints
     name : str, optional
         The name of the model
 
     Methods
     -------
+    envelope()
+        Gets the breakpoints of the lower envelope of the piecewise-linear costs.
     alloc_attn(dist)
         Allocates attention an attention level given a distance.
+    costs(d)
+        Gets the cost of each attention level given an array of normalized distances.
+    alloc_attn_array(dists)
+        Allocates attention levels given an array of distances.
     get_attn_levels(model, agent, prey, predator)
         Gets the attention level for the agent, the prey, and the predator.
+    get_attention_levels_array(agent_locs, prey_locs, predator_locs)
+        Gets the attention levels for many agent, prey, and predator locations.
     """
 
-    def __init__(self, w, h, name="AttentionModelClassical"):
+    def __init__(self, w, h, name="AttentionModelClassical", cache=None):
         """
         Parameters
         ----------
@@ -36,13 +56,58 @@ class AttentionModelClassical:
             Height of the coordinate plane
         name : str, optional
             The name of the model (default is "AttentionModelClassical")
+        cache : AttentionCache, optional
+            Memoizes attention levels on the quantized distance (default is None)
         """
 
         self.w = w
         self.h = h
         self.max_dist = math.sqrt(w**2 + h**2)
+        self.cache = cache
         self.name = name
 
+        # Each level's cost is linear on the normalized distance d: slope * d + intercept
+        self.levels = np.array([25, 50, 75, 100])
+        self.slopes = np.array([-1, -0.5, 0.5, 1])
+        self.intercepts = -(1 - self.levels/100) + np.array([0, -0.4, -0.9, -1])
+
+        # Precompute the lower envelope of the costs over d >= 0
+        self.breakpoints, self.breakpoint_levels = self.envelope()
+
+    def envelope(self):
+        """Gets the breakpoints of the lower envelope of the piecewise-linear costs
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            The normalized distances where the minimum-cost level changes, and the
+            minimum-cost level on each of the resulting intervals. On a breakpoint
+            the lower level is chosen, as in alloc_attn.
+        """
+
+        breakpoints = []
+        current = int(np.argmin(self.intercepts))
+        envelope_levels = [self.levels[current]]
+        x = 0
+
+        while True:
+            # Only levels with a smaller slope can become cheaper as d grows
+            candidates = np.flatnonzero(self.slopes < self.slopes[current])
+            if len(candidates) == 0:
+                break
+            crossings = (self.intercepts[candidates] - self.intercepts[current]) / \
+                        (self.slopes[current] - self.slopes[candidates])
+            crossings = np.maximum(crossings, x)
+
+            # On simultaneous crossings, the smallest slope stays cheapest afterwards
+            order = np.lexsort((self.slopes[candidates], crossings))
+            x = crossings[order[0]]
+            current = candidates[order[0]]
+            breakpoints.append(x)
+            envelope_levels.append(self.levels[current])
+
+        return np.array(breakpoints), np.array(envelope_levels)
+
     def alloc_attn(self, dist):
         """Allocates attention to a character given the distance to their target
 
@@ -67,6 +132,13 @@ class AttentionModelClassical:
         
         d = dist/self.max_dist
 
+        # Serve the attention level from the cache, if possible
+        if self.cache is not None:
+            key = self.cache.key(d)
+            attention = self.cache.get(key)
+            if attention is not None:
+                return attention
+
         attention_levels = [25, 50, 75, 100]
 
         minimum = math.inf
@@ -83,15 +155,77 @@ class AttentionModelClassical:
                 cost += -0.5*d - 0.4
             elif level == 75:
                 cost += 0.5*d - 0.9
-            elif level == 50:
+            elif level == 100:
                 cost += d - 1
 
             if cost < minimum:
                 minimum = cost
                 attention = level
+
+        if self.cache is not None:
+            self.cache.put(key, attention)
         
         return attention
 
+    def costs(self, d):
+        """Gets the cost of each attention level given an array of normalized distances
+
+        The costs are computed with the same floating-point operations as in
+        alloc_attn, so that their comparisons round the same way.
+
+        Parameters
+        ----------
+        d : np.ndarray
+            The normalized distances.
+
+        Returns
+        -------
+        np.ndarray
+            The cost of each level (in the order of levels), shape d.shape + (4,).
+        """
+
+        base = -(1 - self.levels/100)
+        return np.stack([base[0] + -d,
+                         base[1] + (-0.5*d - 0.4),
+                         base[2] + (0.5*d - 0.9),
+                         base[3] + (d - 1)], axis=-1)
+
+    def alloc_attn_array(self, dists):
+        """Allocates attention levels given an array of distances
+
+        Parameters
+        ----------
+        dists : np.ndarray
+            The distances that will guide the allocation.
+
+        Returns
+        -------
+        np.ndarray
+            The allocated attention levels, with the same shape as dists.
+
+        Raises
+        ------
+        ValueError
+            If a negative distance is passed.
+        """
+
+        dists = np.asarray(dists, dtype=float)
+        if np.any(dists < 0):
+            raise ValueError("dist must be a non-zero number")
+
+        d = dists/self.max_dist
+
+        # Look up the interval of the lower envelope each distance falls in
+        attention = np.array(self.breakpoint_levels[np.searchsorted(self.breakpoints, d, side="right")])
+
+        # Next to a breakpoint the rounding of the costs decides the level, so
+        # compare them as alloc_attn does (argmin keeps the first, i.e. lowest, level)
+        near = np.any(np.isclose(d[..., None], self.breakpoints, rtol=1e-9, atol=0), axis=-1)
+        if np.any(near):
+            attention[near] = self.levels[np.argmin(self.costs(d[near]), axis=-1)]
+
+        return attention
+
     def get_attention_levels(self, agent, prey, predator):
         """Gets the attention level for the agent, the prey, and the predator
 
@@ -142,4 +276,43 @@ class AttentionModelClassical:
         agent.track_attn([attn_agent, attn_prey, attn_predator])
 
         return [attn_agent, attn_prey, attn_predator]
-        
\ No newline at end of file
+
+    def get_attention_levels_array(self, agent_locs, prey_locs, predator_locs):
+        """Gets the attention levels for many agent, prey, and predator locations
+
+        Parameters
+        ----------
+        agent_locs : np.ndarray
+            The agents' locations, shape (n, 2).
+        prey_locs : np.ndarray
+            The preys' locations, shape (n, 2).
+        predator_locs : np.ndarray
+            The predators' locations, shape (n, 2).
+
+        Returns
+        -------
+        np.ndarray
+            The allocated attention levels (agent, prey, and predator), shape (n, 3).
+
+        Raises
+        ------
+        ValueError
+            If the locations do not have the same shape.
+        """
+
+        agent_locs = np.asarray(agent_locs, dtype=float)
+        prey_locs = np.asarray(prey_locs, dtype=float)
+        predator_locs = np.asarray(predator_locs, dtype=float)
+
+        if agent_locs.shape != prey_locs.shape or agent_locs.shape != predator_locs.shape:
+            raise ValueError("all locations must have the same shape")
+
+        dist2prey = np.hypot(*(agent_locs - prey_locs).T)
+        dist2predator = np.hypot(*(agent_locs - predator_locs).T)
+        avg_dist = (dist2prey + dist2predator)/2
+
+        # Attention levels for the agent, the prey, and the predator
+        attn = self.alloc_attn_array(np.stack([avg_dist, dist2prey, dist2predator], axis=-1))
+
+        # Normalize attention levels so that they don't exceed 100
+        return attn/attn.sum(axis=-1, keepdims=True) * 100
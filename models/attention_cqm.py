@@ -0,0 +1,238 @@
+import math
+import numpy as np
+import dimod
+from dwave.system import LeapHybridCQMSampler
+from models import sampler as sampler_mod
+
+# The characters, in the order of the attention levels
+CHARACTERS = ("agent", "prey", "predator")
+
+class AttentionModelCQM:
+    """
+    The AttentionModelCQM class represents the quantum model for attention alloc
+    as a single constrained quadratic model (CQM).
+
+    The agent's, prey's, and predator's attention levels are chosen together: one
+    binary variable per character and level, a one-hot constraint per character,
+    and a constraint that the levels add up to at most 100. The constraints are
+    built once; each step only updates the objective's coefficients. Since the
+    levels already add up to at most 100, they are not normalized.
+
+    ...
+
+    Attributes
+    ----------
+    w : int
+        Width of the coordinate plane
+    h : int
+        Height of the coordinate plane
+    max_dist : float
+        Maximum possible distance in the coordinate plane
+    total_time : float
+        Total solve time for this model
+    session : SamplerSession
+        The sampler session, on a CQM solver
+    time_limit : float
+        Time limit of each solve in seconds, None for the solver's default
+    levels : np.ndarray
+        The possible attention levels
+    slopes : np.ndarray
+        Slope of each level's cost on the normalized distance
+    intercepts : np.ndarray
+        Cost of each level at a normalized distance of zero
+    cqm : dimod.ConstrainedQuadraticModel
+        The constrained quadratic model, variables labelled (character, level)
+    name : str, optional
+        The name of the model
+
+    Methods
+    -------
+    build()
+        Builds the constrained quadratic model with a zero objective.
+    update(dists)
+        Updates the objective's coefficients given the distances.
+    alloc_attn(dists)
+        Allocates the three attention levels given the distances with a single solve.
+    get_attention_levels(agent, prey, predator)
+        Gets the attention level for the agent, the prey, and the predator.
+    """
+
+    def __init__(self, w, h, name="AttentionModelCQM", session=None, time_limit=None):
+        """
+        Parameters
+        ----------
+        w : int
+            Width of the coordinate plane
+        h : int
+            Height of the coordinate plane
+        name : str, optional
+            The name of the model (default is "AttentionModelCQM")
+        session : SamplerSession, optional
+            The sampler session to use (default is a new session on Leap's
+            hybrid CQM solver)
+        time_limit : float, optional
+            Time limit of each solve in seconds (default is None, i.e. the
+            solver's default)
+        """
+
+        if session is None:
+            session = sampler_mod.SamplerSession(sampler_factory=LeapHybridCQMSampler)
+
+        self.w = w
+        self.h = h
+        self.max_dist = math.sqrt(w**2 + h**2)
+        self.total_time = 0
+        self.session = session
+        self.time_limit = time_limit
+        self.name = name
+
+        # Each level's cost is linear on the normalized distance d: slope * d + intercept
+        # (the diagonal of AttentionModel's QUBO)
+        self.levels = np.array([25, 50, 75, 100])
+        self.slopes = np.array([-1, -0.5, 0.5, 1])
+        self.intercepts = -(1 - self.levels/100) + np.array([0, -0.4, -0.9, -1])
+
+        self.cqm = self.build()
+
+    def build(self):
+        """Builds the constrained quadratic model with a zero objective
+
+        Returns
+        -------
+        dimod.ConstrainedQuadraticModel
+            The model, with one binary variable (character, level) per character
+            and attention level.
+        """
+
+        cqm = dimod.ConstrainedQuadraticModel()
+        levels = self.levels.tolist()
+
+        # Objective function: cost of the allocated attention, set at each step
+        objective = dimod.QuadraticModel()
+        for c in CHARACTERS:
+            for level in levels:
+                objective.add_variable("BINARY", (c, level))
+        cqm.set_objective(objective)
+
+        # Constraint #1: only one attention level per character
+        for c in CHARACTERS:
+            cqm.add_discrete([(c, level) for level in levels], label="one-hot " + c)
+
+        # Constraint #2: total of attention levels cannot exceed 100
+        total = [((c, level), level) for c in CHARACTERS for level in levels]
+        cqm.add_constraint_from_iterable(total, "<=", rhs=100, label="total")
+
+        return cqm
+
+    def update(self, dists):
+        """Updates the objective's coefficients given the distances
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances for the agent, the prey, and the predator.
+
+        Returns
+        -------
+        void
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed.
+        """
+
+        for dist in dists:
+            if dist is None or dist < 0:
+                raise ValueError("dist must be a non-zero number")
+
+        # Cost of every level for every character at once
+        d = np.asarray(dists, dtype=float)[:, None]/self.max_dist
+        costs = (self.slopes * d + self.intercepts).tolist()
+
+        levels = self.levels.tolist()
+        objective = self.cqm.objective
+        for c, row in zip(CHARACTERS, costs):
+            for level, cost in zip(levels, row):
+                objective.set_linear((c, level), cost)
+
+    def alloc_attn(self, dists):
+        """Allocates the three attention levels given the distances with a single solve
+
+        Parameters
+        ----------
+        dists : [float]
+            The distances for the agent, the prey, and the predator.
+
+        Returns
+        -------
+        [float]
+            The allocated attention levels (agent, prey, and predator).
+
+        Raises
+        ------
+        ValueError
+            If no distance or a negative distance are passed, or the solver
+            returns no feasible allocation.
+        """
+
+        # Update the objective for the given distances
+        self.update(dists)
+
+        # Run sampler
+        parameters = {}
+        if self.time_limit is not None:
+            parameters["time_limit"] = self.time_limit
+        sampler_output = self.session.sample_cqm(self.cqm, **parameters)
+
+        # Time statistics in microseconds
+        self.total_time += sampler_output.info["timing"]["run_time"]
+
+        # Get the best feasible allocation
+        feasible = sampler_output.filter(lambda datum: datum.is_feasible)
+        if len(feasible) == 0:
+            raise ValueError("no feasible attention allocation found")
+        sample = feasible.first.sample
+
+        attns = []
+        for c in CHARACTERS:
+            attns.append(next(level for level in self.levels.tolist() if sample[(c, level)] == 1))
+
+        return attns
+
+    def get_attention_levels(self, agent, prey, predator):
+        """Gets the attention level for the agent, the prey, and the predator
+
+        Parameters
+        ----------
+        agent : Agent
+            Agent in the predator-prey environment.
+        prey : Prey
+            Prey in the predator-prey environment.
+        predator : Predator
+            Predator in the predator-prey environment.
+
+        Returns
+        -------
+        [float]
+            The three allocated attention levels (agent, prey, and predator).
+
+        Raises
+        ------
+        ValueError
+            If characters are not passed.
+        """
+
+        if agent is None or prey is None or predator is None:
+            raise ValueError("all character must be passed to the function")
+
+        dist2prey = math.dist(agent.loc, prey.loc)
+        dist2predator = math.dist(agent.loc, predator.loc)
+        avg_dist = (dist2prey + dist2predator)/2
+
+        attns = self.alloc_attn([avg_dist, dist2prey, dist2predator])
+
+        # Keep track of attention levels
+        agent.track_attn(attns)
+
+        return attns
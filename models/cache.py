@@ -0,0 +1,142 @@
+from collections import OrderedDict
+
+class AttentionCache:
+    """
+    The AttentionCache class memoizes attention levels on a quantized normalized distance.
+
+    The attention decision only depends on dist / max_dist, so distances that fall
+    in the same bucket of width step share one solution. The least recently used
+    bucket is evicted once the cache holds maxsize entries.
+
+    ...
+
+    Attributes
+    ----------
+    step : float
+        Width of a bucket of normalized distance
+    maxsize : int
+        Maximum number of entries kept in the cache
+    entries : OrderedDict
+        Attention levels keyed by bucket, from least to most recently used
+    hits : int
+        Number of lookups served from the cache
+    misses : int
+        Number of lookups that were not in the cache
+    evictions : int
+        Number of entries evicted to respect maxsize
+
+    Methods
+    -------
+    key(d)
+        Gets the bucket of a normalized distance.
+    get(key)
+        Gets the attention level of a bucket, if cached.
+    put(key, attn)
+        Caches the attention level of a bucket.
+    stats()
+        Reports the cache's counters.
+    """
+
+    def __init__(self, step=0.01, maxsize=1024):
+        """
+        Parameters
+        ----------
+        step : float, optional
+            Width of a bucket of normalized distance (default is 0.01)
+        maxsize : int, optional
+            Maximum number of entries kept in the cache (default is 1024)
+
+        Raises
+        ------
+        ValueError
+            If step or maxsize are not positive.
+        """
+
+        if step <= 0:
+            raise ValueError("step must be positive number")
+
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive number")
+
+        self.step = step
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, d):
+        """Gets the bucket of a normalized distance
+
+        Parameters
+        ----------
+        d : float
+            The normalized distance (dist / max_dist).
+
+        Returns
+        -------
+        int
+            The bucket the distance falls in.
+        """
+
+        return int(round(d / self.step))
+
+    def get(self, key):
+        """Gets the attention level of a bucket, if cached
+
+        Parameters
+        ----------
+        key : int
+            The bucket.
+
+        Returns
+        -------
+        float
+            The cached attention level, or None if the bucket is not cached.
+        """
+
+        attn = self.entries.get(key)
+        if attn is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return attn
+
+    def put(self, key, attn):
+        """Caches the attention level of a bucket
+
+        Parameters
+        ----------
+        key : int
+            The bucket.
+        attn : float
+            The attention level.
+
+        Returns
+        -------
+        void
+        """
+
+        self.entries[key] = attn
+        self.entries.move_to_end(key)
+
+        # Evict the least recently used bucket
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Reports the cache's counters
+
+        Returns
+        -------
+        dict
+            The number of hits, misses, and evictions, and the current size.
+        """
+
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.entries)}
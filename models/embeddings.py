@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import tempfile
+
+class EmbeddingStore:
+    """
+    The EmbeddingStore class keeps minor-embeddings on disk so they can be shared
+    by many processes and runs.
+
+    Each embedding is one JSON file, keyed by a fingerprint of the solver graph and
+    a hash of the problem graph: <path>/<solver fingerprint>/<problem hash>.json.
+    Files are written to a temporary file in the same directory and renamed into
+    place with os.replace, so readers never see a partial file and concurrent
+    writers of the same embedding simply leave one of them. Embeddings are only
+    read when a problem graph is first needed.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Directory the embeddings are stored in
+    hits : int
+        Number of embeddings read from the store
+    misses : int
+        Number of embeddings that were not in the store
+    writes : int
+        Number of embeddings written to the store
+
+    Methods
+    -------
+    fingerprint(sampler)
+        Gets the fingerprint of a structured sampler's graph.
+    problem_key(topology)
+        Gets the key of a problem graph.
+    file(fingerprint, topology)
+        Gets the file of an embedding.
+    get(fingerprint, topology)
+        Reads the embedding of a problem graph onto a solver graph.
+    put(fingerprint, topology, embedding)
+        Writes the embedding of a problem graph onto a solver graph.
+    stats()
+        Reports the store's counters.
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Directory the embeddings are stored in (created if needed)
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def fingerprint(sampler):
+        """Gets the fingerprint of a structured sampler's graph
+
+        Parameters
+        ----------
+        sampler : dimod.Structured
+            The sampler (e.g. a DWaveSampler).
+
+        Returns
+        -------
+        str
+            A hash of the sampler's qubits and couplers, so the fingerprint changes
+            whenever the working graph does.
+        """
+        nodes = sorted(sampler.nodelist, key=repr)
+        edges = sorted((tuple(sorted(edge, key=repr)) for edge in sampler.edgelist), key=repr)
+        return hashlib.sha256(repr((nodes, edges)).encode()).hexdigest()
+
+    @staticmethod
+    def problem_key(topology):
+        """Gets the key of a problem graph
+
+        Parameters
+        ----------
+        topology : tuple
+            The sorted variables and interactions of the problem (see
+            SamplerSession.topology).
+
+        Returns
+        -------
+        str
+            A hash of the problem graph.
+        """
+        return hashlib.sha256(repr(topology).encode()).hexdigest()
+
+    def file(self, fingerprint, topology):
+        """Gets the file of an embedding
+
+        Parameters
+        ----------
+        fingerprint : str
+            The fingerprint of the solver graph.
+        topology : tuple
+            The problem graph (see SamplerSession.topology).
+
+        Returns
+        -------
+        str
+            The path of the file.
+        """
+        return os.path.join(self.path, fingerprint, self.problem_key(topology) + ".json")
+
+    def get(self, fingerprint, topology):
+        """Reads the embedding of a problem graph onto a solver graph
+
+        Parameters
+        ----------
+        fingerprint : str
+            The fingerprint of the solver graph.
+        topology : tuple
+            The problem graph (see SamplerSession.topology).
+
+        Returns
+        -------
+        dict
+            The chain of qubits of each variable, None if the embedding is not in
+            the store (or its file is unreadable or for another problem graph).
+        """
+        try:
+            with open(self.file(fingerprint, topology)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Guard against hash collisions; chains are stored in the order of the variables
+        if data.get("problem") != repr(topology) or len(data.get("chains", ())) != len(topology[0]):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(zip(topology[0], data["chains"]))
+
+    def put(self, fingerprint, topology, embedding):
+        """Writes the embedding of a problem graph onto a solver graph
+
+        Parameters
+        ----------
+        fingerprint : str
+            The fingerprint of the solver graph.
+        topology : tuple
+            The problem graph (see SamplerSession.topology).
+        embedding : dict
+            The chain of qubits of each variable.
+
+        Returns
+        -------
+        void
+        """
+        path = self.file(fingerprint, topology)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        data = {"problem": repr(topology), "chains": [list(embedding[v]) for v in topology[0]]}
+
+        # Write to a temporary file next to the target, then rename it into place
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.writes += 1
+
+    def stats(self):
+        """Reports the store's counters
+
+        Returns
+        -------
+        dict
+            The number of hits, misses, and writes.
+        """
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes}
@@ -1,6 +1,12 @@
-import math
+import asyncio
+import functools
+import time
 import numpy as np
-from dwave.system import EmbeddingComposite, DWaveSampler
+import dimod
+from metrics import profiler as profiler_mod
+from models import reads as reads_mod
+from models import sampler as sampler_mod
+from models import telemetry as telemetry_mod
 
 class MovementModel:
     """
@@ -20,20 +26,53 @@ class MovementModel:
         Number of reads in the annealer
     total_time : floar
         Total sampling time for this model
+    session : SamplerSession
+        The sampler session shared with other models
+    profiler : Profiler
+        Times the phases of each decision (a NullProfiler if disabled)
+    telemetry : Telemetry
+        Records the most recent sampler calls
+    reads : AdaptiveReads
+        Decides how many reads each sampler call takes, None for always num_reads
     name : str, optional
         The name of the model
+    num_directions : int
+        Number of possible directions of movement
+    units : np.ndarray
+        Unit vector of each direction of movement, shape (num_directions, 2)
+    upper : np.ndarray
+        Mask of the upper triangle (one entry per pair of directions)
+    quadratic : np.ndarray
+        Buffer for the quadratic biases of the QUBO formulation
+    bqm : dimod.BinaryQuadraticModel
+        The QUBO formulation, allocated once and refreshed at each step
 
     Methods
     -------
+    template()
+        Builds the BQM template with every variable and interaction.
+    linear(dist2prey, dist2predator)
+        Gets the linear biases of the QUBO given the distances to the targets.
     qubo(dist2prey, dist2pred)
         Updates the QUBO formulation given distance to the prey and to the predator.
+    formulate(agent_perceived, prey_perceived, predator_perceived, speed)
+        Gets the possible directions of movement and the QUBO formulation to choose one.
+    read_movement(sampler_output, directions)
+        Reads the direction of movement from the output of the sampler.
     decide_movement(agent, agent_perceived, prey_perceived, predator_perceived, speed)
         Decide on the direction of movement given perceived locations and movement.
+    decide_movement_async(agent, agent_perceived, prey_perceived, predator_perceived, speed)
+        Submits the decision on the direction of movement, without waiting for the sampler.
+    decide_movement_batch(agents_perceived, preys_perceived, predators_perceived, speed)
+        Decides on many directions of movement at once by solving the QUBOs exactly.
     move(agent, agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed)
         Moves the agent into the direction decided by the quantum model.
+    move_async(agent, agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed)
+        Moves the agent into the direction decided by the quantum model, awaiting the sampler.
     """
 
-    def __init__(self, w, h, num_reads, name="MovementModel"):
+    def __init__(self, w, h, num_reads, name="MovementModel", session=None, num_directions=8, profiler=None,
+                 telemetry=None, reads=None):
         """
         Parameters
         ----------
@@ -45,15 +84,93 @@ class MovementModel:
             Number of reads in the annealer
         name : str, optional
             The name of the model (default is "MovementModel")
+        session : SamplerSession, optional
+            The sampler session to use (default is a new session on the QPU)
+        num_directions : int, optional
+            Number of possible directions of movement, evenly spaced around the
+            agent (default is 8). The QUBO has one interaction per pair of
+            directions, so on a QPU large values need a large clique embedding.
+        profiler : Profiler, optional
+            Times the phases of each decision (default is None, i.e. disabled)
+        telemetry : Telemetry, optional
+            Records the sampler calls (default is a new Telemetry)
+        reads : AdaptiveReads, optional
+            Decides how many reads each sampler call takes, up to num_reads
+            (default is None, i.e. always num_reads)
+
+        Raises
+        ------
+        ValueError
+            If num_directions is less than 2.
         """
 
+        if num_directions < 2:
+            raise ValueError("num_directions must be at least 2")
+
         self.w = w
         self.h = h
         self.max_dist = np.sqrt(w**2 + h**2)
         self.num_reads = num_reads
         self.total_time = 0
+        self.session = session if session is not None else sampler_mod.SamplerSession()
+        self.profiler = profiler if profiler is not None else profiler_mod.NULL_PROFILER
+        self.telemetry = telemetry if telemetry is not None else telemetry_mod.Telemetry()
+        self.reads = reads
         self.name = name
 
+        # Precompute the unit vector of each direction of movement
+        self.num_directions = num_directions
+        angles = np.radians(np.arange(num_directions) * 360 / num_directions)
+        self.units = np.column_stack((np.cos(angles), np.sin(angles)))
+
+        # Allocate the QUBO formulation once; each step only refreshes its biases
+        self.upper = np.triu(np.ones((self.num_directions, self.num_directions), dtype=bool), 1)
+        self.quadratic = np.zeros((self.num_directions, self.num_directions))
+        self.bqm = self.template()
+
+    def template(self):
+        """Builds the BQM template with every variable and interaction (all biases zero)
+
+        Returns
+        -------
+        dimod.BinaryQuadraticModel
+            The template, with the direction of movement i labelled i.
+        """
+
+        bqm = dimod.BinaryQuadraticModel(self.num_directions, dimod.BINARY)
+        bqm.add_quadratic_from_dense(self.upper.astype(float))
+        bqm.scale(0)
+        return bqm
+
+    def linear(self, dist2prey, dist2predator):
+        """Gets the linear biases of the QUBO given the distances to the targets
+
+        The QUBO's quadratic biases are -(q_i + q_j) for linear biases q_i <= 0, so
+        its minimum is the single direction with the lowest linear bias.
+
+        Parameters
+        ----------
+        dist2prey : np.ndarray
+            The distances between the prey and each of the possible directions,
+            shape (..., num_directions).
+        dist2predator : np.ndarray
+            The distances between the predator and each of the possible directions,
+            shape (..., num_directions).
+
+        Returns
+        -------
+        np.ndarray
+            The linear bias of each direction, shape (..., num_directions).
+        """
+
+        dist2prey = np.asarray(dist2prey, dtype=float)
+        dist2predator = np.asarray(dist2predator, dtype=float)
+
+        # Linear biases on the prey's and the predator's perceived locations, combined
+        max_dist_prey = dist2prey.max(axis=-1, keepdims=True)
+        max_dist_predator = dist2predator.max(axis=-1, keepdims=True)
+        return -(1 - dist2prey/max_dist_prey) - (1 - dist2predator/max_dist_predator)
+
     def qubo(self, dist2prey, dist2predator):
         """Updates the QUBO given the distance to the target
 
@@ -66,34 +183,85 @@ class MovementModel:
 
         Returns
         -------
-        dict
-            A dict with with the updated QUBO formulation.
+        dimod.BinaryQuadraticModel
+            The model's BQM template, refreshed with the updated QUBO formulation.
+            It is rewritten in place by the next call, so callers must not keep it
+            (decide_movement_async sends a copy).
+        """
+
+        linear = self.linear(dist2prey, dist2predator)
+
+        # Quadratic biases between each pair of directions (upper triangle only)
+        quadratic = self.quadratic
+        np.add.outer(linear, linear, out=quadratic)
+        np.negative(quadratic, out=quadratic)
+        quadratic *= self.upper
+
+        # Refresh the template's biases in place
+        self.bqm.scale(0)
+        self.bqm.add_linear_from_array(linear)
+        self.bqm.add_quadratic_from_dense(quadratic)
+
+        return self.bqm
+
+    def formulate(self, agent_perceived, prey_perceived, predator_perceived, speed):
+        """Gets the possible directions of movement and the QUBO formulation to choose one
+
+        Parameters
+        ----------
+        agent_perceived : [float]
+            The agent's perceived location [x, y]
+        prey_perceived : [float]
+            The prey's perceived location [x, y]
+        predator_perceived : [float]
+            The predator's perceived location [x, y]
+        speed : float
+            The speed of movement
+
+        Returns
+        -------
+        (np.ndarray, dimod.BinaryQuadraticModel)
+            The possible directions of movement, shape (num_directions, 2), and
+            the QUBO formulation (the model's BQM template, see qubo).
         """
+        # Calculate the possible directions of movement from the unit vectors
+        directions = np.asarray(agent_perceived, dtype=float) + speed * self.units
+
+        # Calculate distance between prey and predator and directions of movement
+        dist2prey = np.hypot(*(directions - np.asarray(prey_perceived, dtype=float)).T)
+        dist2predator = np.hypot(*(directions - np.asarray(predator_perceived, dtype=float)).T)
+
+        # Update QUBO formulation
+        bqm = self.qubo(dist2prey, dist2predator)
+
+        return directions, bqm
 
-        # Build the QUBO on the prey's perceived location
-        Q_prey = {}
-        max_dist_prey = max(dist2prey)
-        for i in range(8):
-            Q_prey[(str(i),str(i))] = -(1 - dist2prey[i]/max_dist_prey)
-        for i in range(8):
-            for j in range(i+1, 8):
-                Q_prey[(str(i),str(j))] = -(Q_prey[(str(i),str(i))] + Q_prey[(str(j),str(j))])
-
-        # Build the QUBO on the predator's perceived location
-        Q_predator = {}
-        max_dist_predator = max(dist2predator)
-        for i in range(8):
-            Q_predator[(str(i),str(i))] = -(1 - dist2predator[i]/max_dist_predator)
-        for i in range(8):
-            for j in range(i+1, 8):
-                Q_predator[(str(i),str(j))] = -(Q_predator[(str(i),str(i))] + Q_predator[(str(j),str(j))])
-
-        # Combine both QUBO formulations
-        Q_complete = {}
-        for key in list(Q_prey.keys()):
-            Q_complete[key] = Q_prey[key] + Q_predator[key]
-
-        return Q_complete
+    def read_movement(self, sampler_output, directions):
+        """Reads the direction of movement from the output of the sampler
+
+        Parameters
+        ----------
+        sampler_output : dimod.SampleSet
+            The samples for the QUBO formulation.
+        directions : np.ndarray
+            The possible directions of movement, shape (num_directions, 2).
+
+        Returns
+        -------
+        [float]
+            The target position that guides the direction of movement
+        """
+        # Time statistics in microseconds
+        sampling_time = sampler_output.info["timing"]["qpu_sampling_time"]
+        self.total_time += sampling_time
+        self.telemetry.record(sampler_output, sampler_output.info.get("num_reads", self.num_reads))
+
+        # Get the movement direction from the lowest-energy sample (the first one
+        # selected, if any)
+        selected = [v for v, value in sampler_output.first.sample.items() if value == 1]
+        idx = int(min(selected)) if selected else 0
+        move_dir = directions[idx].tolist()
+        return move_dir
 
     def decide_movement(self, agent, agent_perceived, prey_perceived, predator_perceived, speed):
         """Decide on the direction of movement given perceived locations and movement
@@ -116,49 +284,96 @@ class MovementModel:
         [float]
             The target position that guides the direction of movement
         """
-        # Calculate the possible directions of movement
-        center = agent_perceived
-        radius = speed
-        angles = [0, 45, 90, 135, 180, 225, 270, 315]
-        directions = []
-
-        for angle in angles:
-            x = radius * np.cos(np.radians(angle)) + center[0]
-            y = radius * np.sin(np.radians(angle)) + center[1]
-            directions.append([x, y])
-
-        # Calculate distance between prey and directions of movement
-        dist2prey = []
-        for p in directions:
-            dist2prey.append(math.dist(p, prey_perceived))
-        
-        # Calculate distance between predator and directions of movement
-        dist2predator = []
-        for p in directions:
-            dist2predator.append(math.dist(p, predator_perceived))
+        with self.profiler.span("movement_qubo"):
+            directions, bqm = self.formulate(agent_perceived, prey_perceived, predator_perceived, speed)
 
-        # Update QUBO formulation
-        Q = self.qubo(dist2prey, dist2predator)
-
-        # Define sampler
-        sampler = EmbeddingComposite(DWaveSampler())
-        
         # Run sampler
-        sampler_output = sampler.sample_qubo(Q, num_reads = self.num_reads)
+        with self.profiler.span("movement_sampler"):
+            sampler_output = reads_mod.sample(self.reads, functools.partial(self.session.sample, bqm),
+                                              self.num_reads)
+
+        with self.profiler.span("movement_decode"):
+            return self.read_movement(sampler_output, directions)
+
+    def decide_movement_async(self, agent, agent_perceived, prey_perceived, predator_perceived, speed):
+        """Submits the decision on the direction of movement, without waiting for the sampler
+
+        Must be called from a running event loop.
+
+        Parameters
+        ----------
+        agent : Agent
+            Agent in the predator-prey environment.
+        agent_perceived : [float]
+            The agent's perceived location [x, y]
+        prey_perceived : [float]
+            The prey's perceived location [x, y]
+        predator_perceived : [float]
+            The predator's perceived location [x, y]
+        speed : float
+            The speed of movement
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the target position that guides the direction of movement
+        """
+        # The request outlives this call, so it gets its own copy of the BQM template
+        with self.profiler.span("movement_qubo"):
+            directions, bqm = self.formulate(agent_perceived, prey_perceived, predator_perceived, speed)
+            bqm = bqm.copy()
+
+        # Submit sampler call
+        request = reads_mod.sample_async(self.reads, functools.partial(self.session.sample_async, bqm),
+                                         self.num_reads)
+
+        return asyncio.ensure_future(sampler_mod.resolve(request, self.read_movement, directions))
+
+    def decide_movement_batch(self, agents_perceived, preys_perceived, predators_perceived, speed):
+        """Decides on many directions of movement at once by solving the QUBOs exactly
+
+        Each decision is the direction with the lowest linear bias, which is the
+        QUBO's exact minimum (see linear). No sampler is called; the time taken is
+        added to total_time.
+
+        Parameters
+        ----------
+        agents_perceived : np.ndarray
+            The agent's perceived locations, shape (n, 2)
+        preys_perceived : np.ndarray
+            The prey's perceived locations, shape (n, 2)
+        predators_perceived : np.ndarray
+            The predator's perceived locations, shape (n, 2)
+        speed : float or np.ndarray
+            The speed of movement, shared or one per decision
+
+        Returns
+        -------
+        np.ndarray
+            The target positions that guide the directions of movement, shape (n, 2)
+        """
+        start_time = time.perf_counter()
+
+        agents_perceived = np.asarray(agents_perceived, dtype=float).reshape(-1, 2)
+        preys_perceived = np.asarray(preys_perceived, dtype=float).reshape(-1, 2)
+        predators_perceived = np.asarray(predators_perceived, dtype=float).reshape(-1, 2)
+        speed = np.asarray(speed, dtype=float).reshape(-1, 1, 1)
+
+        # Possible directions of movement of every decision, shape (n, num_directions, 2)
+        directions = agents_perceived[:, None, :] + speed * self.units
+
+        # Distances to the prey and to the predator, shape (n, num_directions)
+        dist2prey = np.hypot(*np.moveaxis(directions - preys_perceived[:, None, :], -1, 0))
+        dist2predator = np.hypot(*np.moveaxis(directions - predators_perceived[:, None, :], -1, 0))
+
+        # Exact minimum of each QUBO
+        idx = np.argmin(self.linear(dist2prey, dist2predator), axis=1)
+        move_dirs = directions[np.arange(len(directions)), idx]
 
         # Time statistics in microseconds
-        sampling_time = sampler_output.info["timing"]["qpu_sampling_time"]
-        self.total_time += sampling_time
+        self.total_time += (time.perf_counter() - start_time) * 1000000
 
-        # Get the movement direction
-        move_dir_idx = sampler_output.record.sample[0]
-        idx = 0
-        for i in range(8):
-            if move_dir_idx[i] == 1:
-                idx = i
-                break
-        move_dir = directions[idx]
-        return move_dir
+        return move_dirs
 
     def move(self, agent, agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed):
         """Moves the agent into the direction decided by the quantum model
@@ -188,5 +403,36 @@ class MovementModel:
         move_dir = self.decide_movement(agent, agent_perceived, prey_perceived, predator_perceived, speed)
 
         # Move the agent in the given direction
-        agent.move_quantum(agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed, move_dir)
+        with self.profiler.span("move"):
+            agent.move_quantum(agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed, move_dir)
+
+    async def move_async(self, agent, agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed):
+        """Moves the agent into the direction decided by the quantum model, awaiting the sampler
+
+        Parameters
+        ----------
+        agent : Agent
+            Agent in the predator-prey environment.
+        agent_perceived : [float]
+            The agent's perceived location [x, y]
+        prey_perceived : [float]
+            The prey's perceived location [x, y]
+        predator_perceived : [float]
+            The predator's perceived location [x, y]
+        prey_real : [float]
+            The prey's real location [x, y]
+        predator_real : [float]
+            The predator's real location [x, y]
+        speed : float
+            The speed of movement
 
+        Returns
+        -------
+        void
+        """
+        # Get the point to move to, letting other episodes run while the sampler is busy
+        move_dir = await self.decide_movement_async(agent, agent_perceived, prey_perceived, predator_perceived, speed)
+
+        # Move the agent in the given direction
+        with self.profiler.span("move"):
+            agent.move_quantum(agent_perceived, prey_perceived, predator_perceived, prey_real, predator_real, speed, move_dir)
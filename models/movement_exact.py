@@ -0,0 +1,128 @@
+import numpy as np
+import dimod
+
+class ExactMovementSolver(dimod.Sampler):
+    """
+    The ExactMovementSolver class solves the movement QUBO exactly without a QPU.
+
+    The movement QUBO's minimum has a single direction selected (see
+    MovementModel.linear), so by default only the states with one variable
+    selected per connected component are evaluated, which takes one energy per
+    direction. The attention QUBOs (fused or not) have the same structure. Small
+    problems of any structure can instead be solved by enumerating every state.
+    As a dimod sampler it can stand in for the QPU in a SamplerSession, e.g.
+    SamplerSession(sampler_factory=ExactMovementSolver).
+
+    ...
+
+    Attributes
+    ----------
+    max_enumeration : int
+        Maximum number of variables of a problem solved by enumerating every state
+
+    Methods
+    -------
+    one_hot_states(bqm, variables, num_reads)
+        Gets the lowest-energy states with one variable selected per connected component.
+    sample(bqm, num_reads, exhaustive)
+        Samples the lowest-energy states of a binary quadratic model.
+    """
+
+    def __init__(self, max_enumeration=16):
+        """
+        Parameters
+        ----------
+        max_enumeration : int, optional
+            Maximum number of variables of a problem solved by enumerating every
+            state (default is 16)
+        """
+        self.max_enumeration = max_enumeration
+
+    @property
+    def parameters(self):
+        return {"num_reads": [], "exhaustive": []}
+
+    @property
+    def properties(self):
+        return {"max_enumeration": self.max_enumeration}
+
+    @staticmethod
+    def one_hot_states(bqm, variables, num_reads):
+        """Gets the lowest-energy states with one variable selected per connected component
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+        variables : list
+            The variables of the problem, in the order of the states' columns.
+        num_reads : int
+            Maximum number of states.
+
+        Returns
+        -------
+        np.ndarray
+            The states, one per row. The first row selects the variable with the
+            lowest linear bias in every component, and the r-th row the one with
+            the r-th lowest (or the highest, for smaller components).
+        """
+
+        index = {v: i for i, v in enumerate(variables)}
+        linear = np.array([bqm.linear[v] for v in variables], dtype=float)
+        components = [np.array([index[v] for v in component]) for component in dimod.connected_components(bqm)]
+
+        rows = min(num_reads, max(len(component) for component in components))
+        states = np.zeros((rows, len(variables)), dtype=np.int8)
+        for component in components:
+            # Variables of the component from the lowest linear bias to the highest
+            ranked = component[np.argsort(linear[component], kind="stable")]
+            states[np.arange(rows), ranked[np.minimum(np.arange(rows), len(ranked) - 1)]] = 1
+
+        return states
+
+    def sample(self, bqm, num_reads=1, exhaustive=False):
+        """Samples the lowest-energy states of a binary quadratic model
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+        num_reads : int, optional
+            Number of states returned, lowest energy first (default is 1)
+        exhaustive : bool, optional
+            Whether to enumerate every state instead of only the one-hot states
+            (default is False)
+
+        Returns
+        -------
+        dimod.SampleSet
+            The lowest-energy states.
+
+        Raises
+        ------
+        ValueError
+            If num_reads is not positive or the problem is too large to enumerate.
+        """
+
+        if num_reads <= 0:
+            raise ValueError("num_reads must be positive number")
+
+        if bqm.vartype is not dimod.BINARY:
+            bqm = bqm.change_vartype(dimod.BINARY, inplace=False)
+
+        variables = list(bqm.variables)
+        n = len(variables)
+
+        if exhaustive:
+            if n > self.max_enumeration:
+                raise ValueError("problem is too large to enumerate")
+            # Every state, one per row
+            states = (np.arange(2**n)[:, None] >> np.arange(n)) & 1
+        else:
+            states = self.one_hot_states(bqm, variables, num_reads)
+
+        # Keep the lowest-energy states (ties in the order of the states)
+        energies = bqm.energies((states, variables))
+        order = np.argsort(energies, kind="stable")[:num_reads]
+
+        return dimod.SampleSet.from_samples((states[order], variables), dimod.BINARY, energies[order])
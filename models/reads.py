@@ -0,0 +1,285 @@
+import asyncio
+import dimod
+import numpy as np
+
+# Number of reads of the first batch of a decision
+INITIAL_READS = 2
+# Share of the reads the lowest-energy state needs to stop reading
+CONFIDENCE = 0.6
+
+class AdaptiveReads:
+    """
+    The AdaptiveReads class decides how many reads each sampler call of a model takes.
+
+    Every decision starts with a small batch of reads. If the lowest-energy state
+    has at least the confidence share of the reads so far, the decision stops;
+    otherwise as many reads as taken so far are requested again, until max_reads.
+    The batches are merged into one aggregated sample set whose timing is the sum
+    of the calls'. The reads taken are kept as a histogram, so the log does not
+    grow with the number of decisions, along with the sampling time saved against
+    always taking max_reads (estimated from each decision's time per read, minus
+    the programming time of the extra calls).
+
+    ...
+
+    Attributes
+    ----------
+    max_reads : int
+        Maximum number of reads per decision (i.e. the fixed num_reads it replaces)
+    initial_reads : int
+        Number of reads of the first batch
+    confidence : float
+        Share of the reads the lowest-energy state needs to stop reading
+    decisions : int
+        Number of decisions taken
+    total_reads : int
+        Number of reads taken by all decisions
+    histogram : [int]
+        Number of decisions that took each number of reads (indexed by the reads)
+    time_saved : float
+        Estimated sampling time saved (in microseconds)
+
+    Methods
+    -------
+    confident(sampleset)
+        Checks whether the lowest-energy state has enough of the reads.
+    merge(samplesets)
+        Merges the batches of a decision into one aggregated sample set.
+    account(sampleset, calls)
+        Logs the reads and the time saved by a decision.
+    sample(submit)
+        Samples a problem, taking reads until the result is confident.
+    sample_async(submit)
+        Submits a problem, taking reads until the result is confident, without waiting.
+    stats()
+        Summarizes the reads taken.
+    """
+
+    def __init__(self, max_reads, initial_reads=INITIAL_READS, confidence=CONFIDENCE):
+        """
+        Parameters
+        ----------
+        max_reads : int
+            Maximum number of reads per decision
+        initial_reads : int, optional
+            Number of reads of the first batch (default is INITIAL_READS)
+        confidence : float, optional
+            Share of the reads the lowest-energy state needs to stop reading
+            (default is CONFIDENCE)
+
+        Raises
+        ------
+        ValueError
+            If given arguments are invalid.
+        """
+        if max_reads <= 0 or initial_reads <= 0:
+            raise ValueError("max_reads and initial_reads must be positive numbers")
+
+        if confidence <= 0 or confidence > 1:
+            raise ValueError("confidence must be a number between 0 (exclusive) and 1")
+
+        self.max_reads = max_reads
+        self.initial_reads = min(initial_reads, max_reads)
+        self.confidence = confidence
+        self.decisions = 0
+        self.total_reads = 0
+        self.histogram = [0] * (max_reads + 1)
+        self.time_saved = 0.0
+
+    def confident(self, sampleset):
+        """Checks whether the lowest-energy state has enough of the reads
+
+        Parameters
+        ----------
+        sampleset : dimod.SampleSet
+            The aggregated samples of the decision so far.
+
+        Returns
+        -------
+        bool
+            Whether the decision can stop reading.
+        """
+        record = sampleset.record
+        share = record.num_occurrences[np.argmin(record.energy)] / record.num_occurrences.sum()
+        return share >= self.confidence
+
+    def merge(self, samplesets):
+        """Merges the batches of a decision into one aggregated sample set
+
+        Parameters
+        ----------
+        samplesets : [dimod.SampleSet]
+            The samples of each call of the decision.
+
+        Returns
+        -------
+        dimod.SampleSet
+            The aggregated samples, lowest energy first. Its timing and the
+            client-side wall-clock and embedding times are the sums of the calls',
+            and num_reads is the total number of reads.
+        """
+        sampleset = samplesets[0] if len(samplesets) == 1 else dimod.concatenate(samplesets)
+        sampleset = sampleset.aggregate()
+        order = np.argsort(sampleset.record.energy, kind="stable")
+        merged = dimod.SampleSet(sampleset.record[order], sampleset.variables, {}, sampleset.vartype)
+
+        # Sum the timing of the calls (and the client-side times)
+        timing = {}
+        telemetry = dict(samplesets[0].info.get("telemetry", {}))
+        for s in samplesets:
+            for field, value in s.info.get("timing", {}).items():
+                if isinstance(value, (int, float)):
+                    timing[field] = timing.get(field, 0) + value
+        for field in ("wall_time", "embedding_time"):
+            if field in telemetry:
+                telemetry[field] = sum(s.info["telemetry"][field] for s in samplesets)
+
+        merged.info.update(timing=timing, telemetry=telemetry,
+                           num_reads=int(sampleset.record.num_occurrences.sum()))
+        return merged
+
+    def account(self, sampleset, calls):
+        """Logs the reads and the time saved by a decision
+
+        Parameters
+        ----------
+        sampleset : dimod.SampleSet
+            The merged samples of the decision.
+        calls : int
+            Number of sampler calls of the decision.
+
+        Returns
+        -------
+        void
+        """
+        reads = sampleset.info["num_reads"]
+        timing = sampleset.info["timing"]
+        self.decisions += 1
+        self.total_reads += reads
+        self.histogram[min(reads, self.max_reads)] += 1
+
+        # Reads not taken, at this decision's time per read, minus the overhead of
+        # programming the QPU again for every extra call
+        per_read = timing.get("qpu_sampling_time", 0) / reads
+        overhead = timing.get("qpu_programming_time", 0) / calls * (calls - 1)
+        self.time_saved += (self.max_reads - reads) * per_read - overhead
+
+    def sample(self, submit):
+        """Samples a problem, taking reads until the result is confident
+
+        Parameters
+        ----------
+        submit : callable
+            Samples the problem given num_reads (e.g. a partial of
+            SamplerSession.sample).
+
+        Returns
+        -------
+        dimod.SampleSet
+            The merged samples (see merge).
+        """
+        samplesets = [submit(num_reads=self.initial_reads)]
+        sampleset = self.merge(samplesets)
+
+        # Take as many reads again as taken so far, until confident or at the cap
+        while not self.confident(sampleset) and sampleset.info["num_reads"] < self.max_reads:
+            reads = sampleset.info["num_reads"]
+            samplesets.append(submit(num_reads=min(reads, self.max_reads - reads)))
+            sampleset = self.merge(samplesets)
+
+        self.account(sampleset, len(samplesets))
+        return sampleset
+
+    def sample_async(self, submit):
+        """Submits a problem, taking reads until the result is confident, without waiting
+
+        Must be called from a running event loop. The first batch is submitted
+        before returning.
+
+        Parameters
+        ----------
+        submit : callable
+            Submits the problem given num_reads (e.g. a partial of
+            SamplerSession.sample_async).
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the merged samples (see merge).
+        """
+        first = submit(num_reads=self.initial_reads)
+
+        async def read():
+            samplesets = [await first]
+            sampleset = self.merge(samplesets)
+
+            # Take as many reads again as taken so far, until confident or at the cap
+            while not self.confident(sampleset) and sampleset.info["num_reads"] < self.max_reads:
+                reads = sampleset.info["num_reads"]
+                samplesets.append(await submit(num_reads=min(reads, self.max_reads - reads)))
+                sampleset = self.merge(samplesets)
+
+            self.account(sampleset, len(samplesets))
+            return sampleset
+
+        return asyncio.ensure_future(read())
+
+    def stats(self):
+        """Summarizes the reads taken
+
+        Returns
+        -------
+        dict
+            The number of decisions, the histogram of their reads (the number of
+            decisions that took each number of reads), the mean and total reads,
+            the reads saved against always taking max_reads, and the estimated
+            sampling time saved (in microseconds).
+        """
+        return {"decisions": self.decisions,
+                "histogram": list(self.histogram),
+                "mean_reads": self.total_reads / self.decisions if self.decisions else 0.0,
+                "total_reads": self.total_reads,
+                "reads_saved": self.max_reads * self.decisions - self.total_reads,
+                "time_saved": self.time_saved}
+
+def sample(policy, submit, num_reads):
+    """Samples a problem with a read policy, or a fixed number of reads
+
+    Parameters
+    ----------
+    policy : AdaptiveReads
+        The read policy (None for a fixed number of reads).
+    submit : callable
+        Samples the problem given num_reads.
+    num_reads : int
+        The fixed number of reads.
+
+    Returns
+    -------
+    dimod.SampleSet
+        The samples.
+    """
+    if policy is None:
+        return submit(num_reads=num_reads)
+    return policy.sample(submit)
+
+def sample_async(policy, submit, num_reads):
+    """Submits a problem with a read policy, or a fixed number of reads, without waiting
+
+    Parameters
+    ----------
+    policy : AdaptiveReads
+        The read policy (None for a fixed number of reads).
+    submit : callable
+        Submits the problem given num_reads.
+    num_reads : int
+        The fixed number of reads.
+
+    Returns
+    -------
+    asyncio.Future
+        Resolves to the samples.
+    """
+    if policy is None:
+        return submit(num_reads=num_reads)
+    return policy.sample_async(submit)
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import threading
+import dimod
+from models import sampler as sampler_mod
+
+# Modes of a RecordingSampler
+MODES = ("record", "replay")
+# Number of bytes read at a time when looking for the last complete line of the file
+TAIL_BLOCK = 65536
+
+def request_key(bqm, parameters):
+    """Gets the content hash that identifies a sampler request
+
+    Parameters
+    ----------
+    bqm : dimod.BinaryQuadraticModel
+        The problem.
+    parameters : dict
+        Parameters for the sampler (e.g. num_reads).
+
+    Returns
+    -------
+    str
+        The SHA-256 hex digest of the problem's variables and biases (bit for bit)
+        and of the parameters.
+    """
+    order = sorted(bqm.variables, key=repr)
+    linear, (row, col, quadratic), offset = bqm.to_numpy_vectors(variable_order=order, sort_indices=True)
+
+    h = hashlib.sha256()
+    h.update(json.dumps([[repr(v) for v in order], bqm.vartype.name, repr(float(offset)),
+                         sorted((key, repr(value)) for key, value in parameters.items())]).encode())
+    for array in (linear, row, col, quadratic):
+        h.update(array.tobytes())
+    return h.hexdigest()
+
+class RecordingSampler(dimod.Sampler):
+    """
+    The RecordingSampler class records the samples of every request to a file and
+    replays them later without a sampler.
+
+    Each line of the file holds the content hash of a request (the problem and its
+    parameters), its occurrence (how many requests with the same hash came before
+    it in the run), and the sampleset returned for it, timing information included.
+    In "record" mode every request goes to the child sampler, so a run stays as
+    stochastic as the sampler, and is appended to the file; in "replay" mode the
+    n-th request with a given hash is served the n-th sampleset recorded for it,
+    so no sampler is needed at all. If a file holds several recordings, the last
+    one of each (hash, occurrence) is replayed.
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        The file the samplesets are recorded to
+    child : dimod.Sampler or SamplerSession
+        The sampler that solves requests that were not recorded yet, None in replay mode
+    mode : str
+        Either "record" or "replay"
+    records : dict
+        Serialized samplesets keyed by (hash, occurrence), None until first used
+        (only loaded in replay mode)
+    occurrences : dict
+        Number of requests made so far in this run, keyed by hash
+    recorded : int
+        Number of requests sent to the child sampler and recorded
+    replayed : int
+        Number of requests served from the file
+    lock : threading.Lock
+        Guards the records and the file against concurrent requests
+
+    Methods
+    -------
+    repair()
+        Truncates a trailing partial line left by an interrupted run.
+    load()
+        Reads the recorded samplesets from the file.
+    sample(bqm, **parameters)
+        Samples a binary quadratic model, or replays it from the file.
+    stats()
+        Reports how many requests were recorded and replayed.
+    """
+
+    def __init__(self, path, child=None, mode="record"):
+        """
+        Parameters
+        ----------
+        path : str
+            The file the samplesets are recorded to
+        child : dimod.Sampler or SamplerSession, optional
+            The sampler that solves requests that were not recorded yet (default
+            is None, only valid in replay mode)
+        mode : str, optional
+            Either "record" or "replay" (default is "record")
+
+        Raises
+        ------
+        ValueError
+            If the mode is invalid, or no child is given in record mode.
+        """
+
+        if mode not in MODES:
+            raise ValueError("mode must be one of " + ", ".join(MODES))
+
+        if mode == "record" and child is None:
+            raise ValueError("a child sampler must be passed in record mode")
+
+        self.path = path
+        self.child = child
+        self.mode = mode
+        self.records = None
+        self.occurrences = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.lock = threading.Lock()
+
+    @property
+    def parameters(self):
+        return {"num_reads": []}
+
+    @property
+    def properties(self):
+        return {"mode": self.mode}
+
+    def repair(self):
+        """Truncates a trailing partial line left by an interrupted run
+
+        Returns
+        -------
+        void
+        """
+        if not os.path.exists(self.path):
+            return
+
+        # Find the end of the last complete line by reading blocks back from the end
+        with open(self.path, "rb+") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            while end > 0:
+                start = max(0, end - TAIL_BLOCK)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end != size:
+                f.truncate(end)
+
+    def load(self):
+        """Reads the recorded samplesets from the file
+
+        A trailing partial line (left by an interrupted run) is skipped.
+
+        Returns
+        -------
+        dict
+            Serialized samplesets keyed by (hash, occurrence).
+        """
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                records[(record["key"], record.get("occurrence", 0))] = record["sampleset"]
+        return records
+
+    def sample(self, bqm, **parameters):
+        """Samples a binary quadratic model, or replays it from the file
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+        **parameters
+            Parameters for the sampler (e.g. num_reads).
+
+        Returns
+        -------
+        dimod.SampleSet
+            The samples (in replay mode, with the timing information of the
+            original call).
+
+        Raises
+        ------
+        ValueError
+            If the request was not recorded and the sampler is in replay mode.
+        """
+        key = request_key(bqm, parameters)
+
+        with self.lock:
+            occurrence = self.occurrences.get(key, 0)
+            self.occurrences[key] = occurrence + 1
+
+            if self.mode == "replay":
+                if self.records is None:
+                    self.records = self.load()
+                if (key, occurrence) not in self.records:
+                    raise ValueError("no recorded sampleset for the request")
+                self.replayed += 1
+                return dimod.SampleSet.from_serializable(self.records[(key, occurrence)])
+
+            if self.records is None:
+                self.repair()
+                self.records = {}
+
+        # Solve the request on the child sampler
+        sampleset = self.child.sample(bqm, **parameters)
+        sampleset.resolve()
+        serializable = sampleset.to_serializable()
+
+        with self.lock:
+            self.recorded += 1
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "occurrence": occurrence, "sampleset": serializable}) + "\n")
+
+        return sampleset
+
+    def stats(self):
+        """Reports how many requests were recorded and replayed
+
+        Returns
+        -------
+        dict
+            The sampler's counters.
+        """
+        return {"recorded": self.recorded, "replayed": self.replayed}
+
+def recording_session(path, mode="record", child=None):
+    """Builds a sampler session that records to (or replays from) a file
+
+    Parameters
+    ----------
+    path : str
+        The file the samplesets are recorded to.
+    mode : str, optional
+        Either "record" or "replay" (default is "record")
+    child : SamplerSession, optional
+        The session that solves requests that were not recorded yet (default is
+        a new session on the QPU in record mode, None in replay mode)
+
+    Returns
+    -------
+    SamplerSession
+        The session, with a RecordingSampler as its child.
+    """
+    if child is None and mode == "record":
+        child = sampler_mod.SamplerSession()
+
+    recorder = RecordingSampler(path, child, mode)
+    return sampler_mod.SamplerSession(sampler_factory=lambda: recorder)
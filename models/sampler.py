@@ -0,0 +1,406 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import dimod
+import minorminer
+import networkx as nx
+from dwave.system import DWaveSampler, FixedEmbeddingComposite
+
+class SamplerSession:
+    """
+    The SamplerSession class keeps one long-lived sampler that the models share.
+
+    The child sampler (and therefore its solver client and connections) is built
+    once, on first use. If the child is structured (e.g. a QPU), the minor-embedding
+    is searched once per QUBO topology and reused for every later problem with the
+    same variables and interactions. With an embedding store, embeddings are read
+    from (and written to) disk, so other processes and later runs skip the search.
+    Building a model does not touch the store: an embedding is read on the first
+    sample of its topology, together with the child sampler's construction.
+
+    ...
+
+    Attributes
+    ----------
+    sampler_factory : callable
+        Builds the child sampler (e.g. DWaveSampler or a local stand-in)
+    embedding_parameters : dict
+        Extra parameters for the minor-embedding search
+    sampler : dimod.Sampler
+        The child sampler, None until the first call
+    embeddings : dict
+        Embeddings found so far, keyed by QUBO topology
+    composites : dict
+        Composites over the child sampler with a fixed embedding, keyed by QUBO topology
+    clients_built : int
+        Number of times the child sampler was constructed
+    client_requests : int
+        Number of times the child sampler was requested
+    embeddings_found : int
+        Number of minor-embedding searches that were run
+    embedding_requests : int
+        Number of times an embedding was requested
+    store : EmbeddingStore
+        Keeps embeddings on disk across processes and runs, None if disabled
+    fingerprint : str
+        Fingerprint of the child sampler's graph, None until the store needs it
+    max_workers : int
+        Maximum number of sampler calls in flight for the async methods
+    executor : ThreadPoolExecutor
+        Runs the sampler calls of the async methods, None until the first one
+    lock : threading.RLock
+        Guards the session's state against concurrent sampler calls
+    name : str, optional
+        The name of the session
+
+    Methods
+    -------
+    child()
+        Gets the child sampler, building it on first use.
+    topology(bqm)
+        Gets the key that identifies the topology of a problem.
+    sampler_for(bqm)
+        Gets the sampler that solves the given problem on the child.
+    sample(bqm, **parameters)
+        Samples a binary quadratic model.
+    sample_qubo(Q, **parameters)
+        Samples a QUBO given as a dict.
+    sample_cqm(cqm, **parameters)
+        Samples a constrained quadratic model.
+    sample_async(bqm, **parameters)
+        Submits a binary quadratic model to be sampled in the background.
+    sample_qubo_async(Q, **parameters)
+        Submits a QUBO to be sampled in the background.
+    stats()
+        Reports how many client constructions and embedding searches were avoided.
+    close()
+        Closes the child sampler's client, if it has one.
+    """
+
+    def __init__(self, sampler_factory=DWaveSampler, embedding_parameters=None, max_workers=32,
+                 name="SamplerSession", store=None):
+        """
+        Parameters
+        ----------
+        sampler_factory : callable, optional
+            Builds the child sampler (default is DWaveSampler)
+        embedding_parameters : dict, optional
+            Extra parameters for minorminer.find_embedding (default is None)
+        max_workers : int, optional
+            Maximum number of sampler calls in flight for the async methods (default is 32)
+        name : str, optional
+            The name of the session (default is "SamplerSession")
+        store : EmbeddingStore, optional
+            Keeps embeddings on disk across processes and runs (default is None)
+        """
+
+        self.sampler_factory = sampler_factory
+        self.embedding_parameters = embedding_parameters if embedding_parameters is not None else {}
+        self.sampler = None
+        self.embeddings = {}
+        self.composites = {}
+        self.clients_built = 0
+        self.client_requests = 0
+        self.embeddings_found = 0
+        self.embedding_requests = 0
+        self.store = store
+        self.fingerprint = None
+        self.max_workers = max_workers
+        self.executor = None
+        self.lock = threading.RLock()
+        self.name = name
+
+    def child(self):
+        """Gets the child sampler, building it on first use
+
+        Returns
+        -------
+        dimod.Sampler
+            The child sampler.
+        """
+
+        with self.lock:
+            self.client_requests += 1
+            if self.sampler is None:
+                self.sampler = self.sampler_factory()
+                self.clients_built += 1
+            return self.sampler
+
+    @staticmethod
+    def topology(bqm):
+        """Gets the key that identifies the topology of a problem
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem.
+
+        Returns
+        -------
+        tuple
+            The sorted variables and interactions of the problem.
+        """
+
+        variables = tuple(sorted(bqm.variables, key=str))
+        edges = tuple(sorted(tuple(sorted((u, v), key=str)) for (u, v) in bqm.quadratic))
+        return (variables, edges)
+
+    def sampler_for(self, bqm):
+        """Gets the sampler that solves the given problem on the child sampler
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+
+        Returns
+        -------
+        dimod.Sampler
+            The child itself if it is unstructured, otherwise a composite with the
+            cached embedding for the problem's topology.
+
+        Raises
+        ------
+        ValueError
+            If no embedding can be found for the problem.
+        """
+
+        sampler = self.child()
+
+        # Unstructured samplers (e.g. local stand-ins) take the problem as it is
+        if not isinstance(sampler, dimod.Structured):
+            return sampler
+
+        key = self.topology(bqm)
+        with self.lock:
+            self.embedding_requests += 1
+            if key not in self.embeddings and self.store is not None:
+                # Read the embedding from the store, if another process or run found it
+                if self.fingerprint is None:
+                    self.fingerprint = self.store.fingerprint(sampler)
+                embedding = self.store.get(self.fingerprint, key)
+                if embedding is not None:
+                    self.embeddings[key] = embedding
+
+            if key not in self.embeddings:
+                # Search for an embedding of the problem graph onto the solver graph
+                source = nx.Graph()
+                source.add_nodes_from(key[0])
+                source.add_edges_from(key[1])
+                embedding = minorminer.find_embedding(source, sampler.edgelist, **self.embedding_parameters)
+                self.embeddings_found += 1
+                if len(embedding) != len(key[0]):
+                    raise ValueError("no embedding found for the problem")
+                self.embeddings[key] = embedding
+
+                # Share it with other processes and later runs
+                if self.store is not None:
+                    self.store.put(self.fingerprint, key, embedding)
+
+            if key not in self.composites:
+                self.composites[key] = FixedEmbeddingComposite(sampler, self.embeddings[key])
+
+            return self.composites[key]
+
+    def sample(self, bqm, **parameters):
+        """Samples a binary quadratic model
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+        **parameters
+            Parameters for the sampler (e.g. num_reads).
+
+        Returns
+        -------
+        dimod.SampleSet
+            The samples. If the sampler reports no timing information, the
+            wall-clock time of the call (in microseconds) is reported as
+            qpu_sampling_time. The client-side wall-clock and embedding time (in
+            microseconds), the size of the problem, and the chain lengths of its
+            embedding are reported as telemetry.
+        """
+
+        # Get the sampler, finding the problem's embedding if needed
+        start_time = time.perf_counter()
+        sampler = self.sampler_for(bqm)
+        embedding_time = (time.perf_counter() - start_time) * 1000000
+
+        # Run sampler
+        start_time = time.perf_counter()
+        sampleset = sampler.sample(bqm, **parameters)
+        sampleset.resolve()
+        wall_time = (time.perf_counter() - start_time) * 1000000
+
+        # Local stand-ins do not report timing, so use the wall-clock time instead
+        timing = sampleset.info.setdefault("timing", {})
+        timing.setdefault("qpu_sampling_time", wall_time)
+
+        # Client-side measurements (kept if a recorded call already has them)
+        embedding = getattr(sampler, "embedding", None)
+        sampleset.info.setdefault("telemetry", {
+            "wall_time": wall_time,
+            "embedding_time": embedding_time,
+            "num_variables": bqm.num_variables,
+            "num_interactions": bqm.num_interactions,
+            "chain_lengths": [len(chain) for chain in embedding.values()] if embedding else []})
+
+        return sampleset
+
+    def sample_qubo(self, Q, **parameters):
+        """Samples a QUBO given as a dict
+
+        Parameters
+        ----------
+        Q : dict
+            The QUBO formulation.
+        **parameters
+            Parameters for the sampler (e.g. num_reads).
+
+        Returns
+        -------
+        dimod.SampleSet
+            The samples.
+        """
+
+        return self.sample(dimod.BinaryQuadraticModel.from_qubo(Q), **parameters)
+
+    def sample_cqm(self, cqm, **parameters):
+        """Samples a constrained quadratic model on the child sampler
+
+        The child sampler must solve CQMs (e.g. LeapHybridCQMSampler or a local
+        stand-in such as dimod.ExactCQMSolver).
+
+        Parameters
+        ----------
+        cqm : dimod.ConstrainedQuadraticModel
+            The problem to be solved.
+        **parameters
+            Parameters for the sampler (e.g. time_limit).
+
+        Returns
+        -------
+        dimod.SampleSet
+            The samples. The solver's run time (in microseconds) is reported as
+            run_time in the timing information, or the wall-clock time of the
+            call if the sampler reports none.
+        """
+
+        sampler = self.child()
+
+        # Run sampler
+        start_time = time.perf_counter()
+        sampleset = sampler.sample_cqm(cqm, **parameters)
+        sampleset.resolve()
+        wall_time = (time.perf_counter() - start_time) * 1000000
+
+        # Hybrid solvers report their run time, local stand-ins do not
+        timing = sampleset.info.setdefault("timing", {})
+        timing.setdefault("run_time", sampleset.info.get("run_time", wall_time))
+
+        return sampleset
+
+    def sample_async(self, bqm, **parameters):
+        """Submits a binary quadratic model to be sampled in the background
+
+        Must be called from a running event loop. The call is submitted before
+        returning, so other work can be done while the sampler is busy.
+
+        Parameters
+        ----------
+        bqm : dimod.BinaryQuadraticModel
+            The problem to be solved.
+        **parameters
+            Parameters for the sampler (e.g. num_reads).
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the samples (see sample).
+        """
+
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(self.sample, bqm, **parameters))
+
+    def sample_qubo_async(self, Q, **parameters):
+        """Submits a QUBO given as a dict to be sampled in the background
+
+        Parameters
+        ----------
+        Q : dict
+            The QUBO formulation.
+        **parameters
+            Parameters for the sampler (e.g. num_reads).
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves to the samples (see sample).
+        """
+
+        return self.sample_async(dimod.BinaryQuadraticModel.from_qubo(Q), **parameters)
+
+    def stats(self):
+        """Reports how many client constructions and embedding searches were avoided
+
+        Returns
+        -------
+        dict
+            The session's counters, and the number of embeddings read from the
+            store (if enabled).
+        """
+
+        stats = {"clients_built": self.clients_built,
+                 "clients_avoided": self.client_requests - self.clients_built,
+                 "embeddings_found": self.embeddings_found,
+                 "embeddings_avoided": self.embedding_requests - self.embeddings_found}
+
+        # Add the embedding store's counters, if enabled
+        if self.store is not None:
+            stats["embeddings_loaded"] = self.store.hits
+        return stats
+
+    def close(self):
+        """Closes the child sampler's client, if it has one
+
+        Returns
+        -------
+        void
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        client = getattr(self.sampler, "client", None)
+        if client is not None:
+            client.close()
+        self.sampler = None
+        self.composites = {}
+
+async def resolve(request, read, *args):
+    """Awaits a request and reads its result
+
+    Parameters
+    ----------
+    request : awaitable
+        The request (e.g. from SamplerSession.sample_async).
+    read : callable
+        Called with the request's result followed by args.
+    *args
+        Extra arguments for read.
+
+    Returns
+    -------
+    object
+        What read returns.
+    """
+
+    return read(await request, *args)
@@ -0,0 +1,142 @@
+import csv
+from collections import deque
+
+# Number of sampler calls kept by default
+MAXLEN = 1024
+
+class Telemetry:
+    """
+    The Telemetry class keeps a record of the most recent sampler calls of a model.
+
+    Each record has every timing field reported by the sampler (e.g. QPU access,
+    programming, and sampling time), the client-side wall-clock and embedding time
+    measured by SamplerSession, the chain lengths of the embedding, the number of
+    reads, and the size of the problem. Only the last maxlen records are kept as a
+    time series, but the sum and count of each numeric field are kept over every
+    call, so the summaries cover the whole run.
+
+    ...
+
+    Attributes
+    ----------
+    records : deque
+        The most recent records, oldest first
+    calls : int
+        Number of sampler calls recorded so far (including the ones dropped)
+    totals : dict
+        Sum of each numeric field over every call, keyed by field
+    counts : dict
+        Number of calls that reported each numeric field, keyed by field
+
+    Methods
+    -------
+    record(sampler_output, num_reads)
+        Records a sampler call from its output.
+    columns()
+        Gets the records as a time series, one list per field.
+    stats()
+        Summarizes every call.
+    export(path)
+        Writes the records as a time series to a CSV file.
+    """
+
+    __slots__ = ("records", "calls", "totals", "counts")
+
+    def __init__(self, maxlen=MAXLEN):
+        """
+        Parameters
+        ----------
+        maxlen : int, optional
+            Number of sampler calls kept (default is MAXLEN)
+        """
+        self.records = deque(maxlen=maxlen)
+        self.calls = 0
+        self.totals = {}
+        self.counts = {}
+
+    def record(self, sampler_output, num_reads):
+        """Records a sampler call from its output
+
+        Parameters
+        ----------
+        sampler_output : dimod.SampleSet
+            The samples returned by SamplerSession.
+        num_reads : int
+            Number of reads requested.
+
+        Returns
+        -------
+        void
+        """
+        info = sampler_output.info
+        record = {"call": self.calls, "num_reads": num_reads}
+
+        # Client-side measurements, then every timing field of the sampler
+        for field, value in info.get("telemetry", {}).items():
+            if field == "chain_lengths":
+                if value:
+                    record["chain_length_max"] = max(value)
+                    record["chain_length_mean"] = sum(value) / len(value)
+            else:
+                record[field] = value
+        record.update(info.get("timing", {}))
+
+        # Keep running sums of the numeric fields over every call
+        for field, value in record.items():
+            if field != "call" and isinstance(value, (int, float)):
+                self.totals[field] = self.totals.get(field, 0) + value
+                self.counts[field] = self.counts.get(field, 0) + 1
+
+        self.records.append(record)
+        self.calls += 1
+
+    def columns(self):
+        """Gets the records as a time series, one list per field
+
+        Returns
+        -------
+        dict
+            One list per field, in the order of the records (None where a record
+            lacks the field).
+        """
+        fields = []
+        for record in self.records:
+            for field in record:
+                if field not in fields:
+                    fields.append(field)
+        return {field: [record.get(field) for record in self.records] for field in fields}
+
+    def stats(self):
+        """Summarizes every call
+
+        Returns
+        -------
+        dict
+            The number of calls, the number of records kept, and the mean and
+            total of each numeric field over every call that reported it.
+        """
+        stats = {"calls": self.calls, "records": len(self.records)}
+        for field, total in self.totals.items():
+            stats[field] = {"mean": total / self.counts[field], "total": float(total)}
+        return stats
+
+    def export(self, path):
+        """Writes the records as a time series to a CSV file
+
+        Parameters
+        ----------
+        path : str
+            The file to write.
+
+        Returns
+        -------
+        void
+        """
+        columns = self.columns()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(columns))
+            writer.writerows(zip(*columns.values()))
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,262 @@
+"""Predator-Prey Task (Pipelined Approach)
+
+This implements the Predator-Prey task within quantum computing with the steps of
+the serial approach pipelined. Once the agent's movement has been submitted to the
+sampler, the prey's and the predator's next locations are already known, so the
+attention allocation for the next time step is submitted right away from the
+agent's predicted location (constant velocity, bounced back into the plane). When
+the movement resolves, the speculative request is used if the predicted distances
+match the real ones and re-issued otherwise, so a single episode follows the same
+trajectory as serial.py. Speculative requests bypass the attention cache and the
+model's telemetry; their sampler calls and sampling time are reported separately. Setting SPECULATION_STEP also accepts speculative requests
+whose distances only match after quantizing them, which lowers the latency of a step
+at the cost of allocating attention for slightly different distances.
+"""
+
+import asyncio
+import time
+import numpy as np
+import serial as serial_mod
+from characters import agent as agent_mod
+from characters import predator as predator_mod
+from characters import prey as prey_mod
+
+# Quantization step on the normalized distances for a speculative request to count
+# as a hit (None only accepts identical distances; a step trades fidelity for latency)
+SPECULATION_STEP = None
+
+def predict(agent):
+    """Predicts the agent's next location assuming it keeps its last velocity
+
+    Parameters
+    ----------
+    agent : Agent
+        Agent in the predator-prey environment.
+
+    Returns
+    -------
+    [float]
+        The predicted location [x, y], bounced back into the coordinate plane.
+    """
+    locs = agent.loc_trace.array
+    if len(locs) < 2:
+        return list(agent.loc)
+
+    x, y = (2 * locs[-1] - locs[-2]).tolist()
+
+    # Bounce back into the coordinate plane as Agent.bounce_back does
+    if x < 0:
+        x = 1
+    elif x > agent.w:
+        x = agent.w - 1
+    if y < 0:
+        y = 1
+    elif y > agent.h:
+        y = agent.h - 1
+
+    return [x, y]
+
+def matches(dists, predicted, max_dist, step):
+    """Checks whether speculative distances match the real ones
+
+    Parameters
+    ----------
+    dists : [float]
+        The real distances.
+    predicted : [float]
+        The distances the speculative request was made for.
+    max_dist : float
+        Maximum possible distance in the coordinate plane.
+    step : float
+        Quantization step on the normalized distances (None for exact matches).
+
+    Returns
+    -------
+    bool
+        Whether the speculative request can be used for the real distances.
+    """
+    if step is None:
+        return list(dists) == list(predicted)
+
+    return all(int(round(d/max_dist/step)) == int(round(p/max_dist/step))
+               for d, p in zip(dists, predicted))
+
+def adopt(attention_model, dists, attns):
+    """Serves the levels of a speculative hit through the model's cache
+
+    Speculative requests bypass the cache, so a hit is looked up as a regular
+    request would have been: cached levels are used instead of the speculative
+    ones, and the others are put in the cache.
+
+    Parameters
+    ----------
+    attention_model : AttentionModel
+        The attention model.
+    dists : [float]
+        The distances of the step.
+    attns : [float]
+        The levels allocated by the speculative request.
+
+    Returns
+    -------
+    [float]
+        The levels of the step.
+    """
+    cache = attention_model.cache
+    if cache is None:
+        return attns
+
+    if attention_model.fused:
+        # Every distance is looked up before any is put, as in alloc_attn_fused
+        keys, cached = attention_model.lookup_fused(dists)
+        for key, level, attn in zip(keys, cached, attns):
+            if level is None:
+                cache.put(key, attn)
+        return [attn if level is None else level for attn, level in zip(attns, cached)]
+
+    levels = []
+    for dist, attn in zip(dists, attns):
+        key, level = attention_model.lookup(dist)
+        if level is None:
+            cache.put(key, attn)
+            level = attn
+        levels.append(level)
+    return levels
+
+async def run_episode(session=None, iterations=None, width=None, height=None, speed=None, num_reads=None,
+                      speculation_step=SPECULATION_STEP, rng=None):
+    """Runs one episode of the pipelined approach
+
+    Parameters
+    ----------
+    session : SamplerSession, optional
+        The sampler session shared by both models (default is a new session on the QPU)
+    iterations : int, optional
+        Number of iterations in the game (default is serial.ITERATIONS)
+    width : int, optional
+        Width of the coordinate plane (default is serial.WIDTH)
+    height : int, optional
+        Height of the coordinate plane (default is serial.HEIGHT)
+    speed : float, optional
+        The speed of movement (default is serial.SPEED)
+    num_reads : int, optional
+        Number of reads in the annealer (default is serial.NUM_READS)
+    speculation_step : float, optional
+        Quantization step for speculative hits (default is SPECULATION_STEP)
+    rng : np.random.Generator, optional
+        The stream the initial locations are drawn from (default is None, i.e.
+        the characters' fixed locations)
+
+    Returns
+    -------
+    Metrics
+        The metrics of the episode, with the speculation stats and step latencies.
+    """
+    # Use serial.py's configuration for any parameter that is not given
+    iterations = serial_mod.ITERATIONS if iterations is None else iterations
+    width = serial_mod.WIDTH if width is None else width
+    height = serial_mod.HEIGHT if height is None else height
+    speed = serial_mod.SPEED if speed is None else speed
+    num_reads = serial_mod.NUM_READS if num_reads is None else num_reads
+
+    # Initialize characters
+    agent = agent_mod.Agent(width, height, rng=rng)
+    prey = prey_mod.Prey(width, height, rng=rng)
+    predator = predator_mod.Predator(width, height, rng=rng)
+
+    # Initialize the models
+    attention_model, movement_model, cache = serial_mod.init_models(session, width, height, num_reads)
+    profiler = attention_model.profiler
+    profiler.start()
+
+    # Speculative requests go through a view of the model without cache or telemetry
+    speculator = attention_model.speculator()
+
+    speculated = 0
+    hits = 0
+    wasted = 0
+    in_flight = set()
+    latencies = []
+    speculation = None
+
+    # Run model for n iterations
+    for i in range(iterations):
+        start_time = time.perf_counter()
+
+        # Use the speculative attention request if it was made for the right distances
+        dists = attention_model.distances(agent, prey, predator)
+        hit = speculation is not None and matches(dists, speculation[0], attention_model.max_dist,
+                                                  speculation_step)
+        if hit:
+            hits += 1
+            attention = speculation[1]
+        else:
+            if speculation is not None:
+                # Keep a wasted request only until it finishes (its sampling time is
+                # accounted for as it resolves)
+                wasted += 1
+                in_flight.add(speculation[1])
+                speculation[1].add_done_callback(in_flight.discard)
+            attention = attention_model.alloc_attns_async(dists)
+
+        # Prey avoids agent and predator pursues agent while the sampler is busy
+        with profiler.span("avoid_pursue"):
+            prey.avoid(agent.loc, speed)
+            predator.pursue(agent.loc, speed)
+
+        attns = await attention
+        if hit:
+            attns = adopt(attention_model, dists, attns)
+
+        attn_agent, attn_prey, attn_predator = attention_model.normalize(attns, agent)
+
+        # Get the perceived locations
+        with profiler.span("perceive"):
+            agent_perceived = agent.perceive(agent, attn_agent)
+            prey_perceived = agent.perceive(prey, attn_prey)
+            predator_perceived = agent.perceive(predator, attn_predator)
+
+        # Submit the agent's movement
+        movement = movement_model.decide_movement_async(agent, agent_perceived, prey_perceived,
+                                                        predator_perceived, speed)
+
+        # Speculate on the next step's attention while the movement is in flight
+        speculation = None
+        if i < iterations - 1:
+            predicted = attention_model.distances_between(predict(agent), prey.loc, predator.loc)
+            speculation = (predicted, speculator.alloc_attns_async(predicted))
+            speculated += 1
+
+        # Move the agent in the given direction
+        move_dir = await movement
+        with profiler.span("move"):
+            agent.move_quantum(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc,
+                               speed, move_dir)
+
+        latencies.append((time.perf_counter() - start_time) * 1000000)
+
+    # Let wasted requests still in flight finish so their sampling time is accounted for
+    await asyncio.gather(*in_flight)
+
+    profiler.stop()
+
+    metrics = serial_mod.collect_metrics("Pipelined Quantum Implementation", agent, prey, predator,
+                                         attention_model, movement_model, cache, iterations)
+
+    # Add speculation stats to metrics (the speculative sampler calls, hit or
+    # wasted, are not in the attention model's time or telemetry)
+    metrics.telemetry_stats["speculation"] = speculator.telemetry.stats()
+    metrics.speculation_stats = {"speculated": speculated,
+                                 "hits": hits,
+                                 "wasted": wasted,
+                                 "sampling_time": speculator.total_time,
+                                 "mean_step_latency": float(np.mean(latencies)) if latencies else 0.0,
+                                 "max_step_latency": float(np.max(latencies)) if latencies else 0.0}
+
+    return metrics
+
+def main(session=None, iterations=None, width=None, height=None, speed=None, num_reads=None):
+    return asyncio.run(run_episode(session, iterations, width, height, speed, num_reads))
+
+if __name__ == "__main__":
+    main()
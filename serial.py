@@ -7,8 +7,14 @@ and decide on optimal movement direction).
 
 import math
 from metrics import metrics as metrics_mod
+from metrics import profiler as profiler_mod
+from models import cache as cache_mod
 from models import attention as attention_mod
+from models import embeddings as embeddings_mod
 from models import movement as movement_mod
+from models import reads as reads_mod
+from models import recording as recording_mod
+from models import sampler as sampler_mod
 from characters import agent as agent_mod
 from characters import predator as predator_mod
 from characters import prey as prey_mod
@@ -17,57 +23,124 @@ from characters import prey as prey_mod
 ITERATIONS = 1
 # Number of reads in the annealer
 NUM_READS = 5
+# Take reads in batches until the lowest-energy state is confident (up to NUM_READS)
+ADAPTIVE_READS = False
 # Width and height of the game's coordinate plane
 WIDTH = 500
 HEIGHT = 500
 # For now, speed (how fast a character moves at each time step) is always constant
 SPEED = 30
-
-def main():
-    # Initialize metrics instance
-    metrics = metrics_mod.Metrics("Serial Quantum Implementation")
-
-    # Initialize characters
-    agent = agent_mod.Agent(WIDTH, HEIGHT)
-    prey = prey_mod.Prey(WIDTH, HEIGHT)
-    predator = predator_mod.Predator(WIDTH, HEIGHT)
+# Number of possible directions of movement for the agent
+NUM_DIRECTIONS = 8
+# Allocate the three attention levels with a single sampler call per step (one
+# 12-variable QUBO instead of three 4-variable ones, so off by default)
+FUSED_ATTENTION = False
+# Quantization step of the attention cache on the normalized distance (None disables it)
+ATTENTION_CACHE_STEP = None
+# Maximum number of entries in the attention cache
+ATTENTION_CACHE_SIZE = 1024
+# File the sampler's results are recorded to or replayed from (None disables it)
+RECORDING_PATH = None
+# Either "record" (sample and record new requests) or "replay" (no sampler at all)
+RECORDING_MODE = "record"
+# Directory minor-embeddings are kept in across processes and runs (None disables it;
+# each embedding is read on the first sample of its QUBO, not when the models are built)
+EMBEDDING_STORE = None
+# Time each phase of the run (QUBO build, sampler, decode, perceive, move, ...)
+PROFILE = False
+# Also capture a cProfile profile and tracemalloc's peak memory (needs PROFILE)
+PROFILE_CAPTURE = False
+
+def init_models(session, width, height, num_reads, profiler=None):
+    """Initializes the attention and movement models on a shared sampler session
+
+    Parameters
+    ----------
+    session : SamplerSession
+        The sampler session shared by both models (None for a new session on the QPU,
+        recorded to RECORDING_PATH and on the EMBEDDING_STORE if set).
+    width : int
+        Width of the coordinate plane.
+    height : int
+        Height of the coordinate plane.
+    num_reads : int
+        Number of reads in the annealer.
+    profiler : Profiler, optional
+        Times the phases of the run, shared by both models (default is None, i.e.
+        a new Profiler if PROFILE is set)
+
+    Returns
+    -------
+    (AttentionModel, MovementModel, AttentionCache)
+        The models and the attention cache (None if disabled).
+    """
+    # Initialize the sampler session shared by both models (on the embedding store, if set)
+    if session is None:
+        store = embeddings_mod.EmbeddingStore(EMBEDDING_STORE) if EMBEDDING_STORE is not None else None
+        if RECORDING_PATH is None:
+            session = sampler_mod.SamplerSession(store=store)
+        else:
+            child = sampler_mod.SamplerSession(store=store) if RECORDING_MODE == "record" else None
+            session = recording_mod.recording_session(RECORDING_PATH, RECORDING_MODE, child)
+
+    # Initialize the profiler, if enabled
+    if profiler is None:
+        profiler = profiler_mod.Profiler(PROFILE_CAPTURE) if PROFILE else profiler_mod.NULL_PROFILER
+
+    # Initialize the attention cache, if enabled
+    cache = None
+    if ATTENTION_CACHE_STEP is not None:
+        cache = cache_mod.AttentionCache(ATTENTION_CACHE_STEP, ATTENTION_CACHE_SIZE)
 
     # Initialize the attention allocation model
-    attention_model = attention_mod.AttentionModel(WIDTH, HEIGHT, NUM_READS)
+    attention_reads = reads_mod.AdaptiveReads(num_reads) if ADAPTIVE_READS else None
+    attention_model = attention_mod.AttentionModel(width, height, num_reads, session=session,
+                                                 fused=FUSED_ATTENTION, cache=cache, profiler=profiler,
+                                                 reads=attention_reads)
 
     # Initialize the movement model
-    movement_model = movement_mod.MovementModel(WIDTH, HEIGHT, NUM_READS)
-
-    # Run model for n iterations
-    for _ in range(ITERATIONS):
-
-        attn_agent, attn_prey, attn_predator = attention_model.get_attention_levels(agent,
-                                                                                prey,
-                                                                                predator)
-        
-        # Prey avoids agent
-        prey.avoid(agent.loc, SPEED)
-        # Predator pursues agent
-        predator.pursue(agent.loc, SPEED)
-
-        # Use the quantum model for the agent's movement
-        # call the movement model
-
-        # Get the perceived locations
-        agent_perceived = agent.perceive(agent, attn_agent)
-        prey_perceived = agent.perceive(prey, attn_prey)
-        predator_perceived = agent.perceive(predator, attn_predator)
-
-        movement_model.move(agent, agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, SPEED)
-
-        # Move Agent
-        # agent.move(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, SPEED, BIAS)
+    movement_reads = reads_mod.AdaptiveReads(num_reads) if ADAPTIVE_READS else None
+    movement_model = movement_mod.MovementModel(width, height, num_reads, session=session,
+                                                num_directions=NUM_DIRECTIONS, profiler=profiler,
+                                                reads=movement_reads)
+
+    return attention_model, movement_model, cache
+
+def collect_metrics(name, agent, prey, predator, attention_model, movement_model, cache, iterations):
+    """Collects the metrics of an episode
+
+    Parameters
+    ----------
+    name : str
+        The name of the implementation.
+    agent : Agent
+        Agent in the predator-prey environment.
+    prey : Prey
+        Prey in the predator-prey environment.
+    predator : Predator
+        Predator in the predator-prey environment.
+    attention_model : AttentionModel
+        The attention allocation model.
+    movement_model : MovementModel
+        The movement model.
+    cache : AttentionCache
+        The attention cache (None if disabled).
+    iterations : int
+        Number of iterations run.
+
+    Returns
+    -------
+    Metrics
+        The metrics of the episode.
+    """
+    # Initialize metrics instance
+    metrics = metrics_mod.Metrics(name)
 
     # Add general metrics
-    metrics.w = WIDTH
-    metrics.h = HEIGHT
-    metrics.iterations = ITERATIONS
-    metrics.num_reads = NUM_READS
+    metrics.w = agent.w
+    metrics.h = agent.h
+    metrics.iterations = iterations
+    metrics.num_reads = attention_model.num_reads
 
     # Add agent to metrics
     metrics.agent_alive = agent.alive
@@ -76,8 +149,8 @@ def main():
     metrics.agent_perceived_loc_trace = agent.perceived_agent_trace
     metrics.prey_perceived_loc_trace = agent.perceived_prey_trace
     metrics.predator_perceived_loc_trace = agent.perceived_predator_trace
-    metrics.dist_agent2prey_trace = [dist[0] for dist in agent.dist_trace]
-    metrics.dist_agent2predator_trace = [dist[1] for dist in agent.dist_trace]
+    metrics.dist_agent2prey_trace = agent.dist_trace.array[:, 0].tolist()
+    metrics.dist_agent2predator_trace = agent.dist_trace.array[:, 1].tolist()
 
     # Add prey to metrics
     metrics.prey_alive = prey.alive
@@ -95,8 +168,78 @@ def main():
     metrics.movement_time = movement_model.total_time
     metrics.total_time = attention_model.total_time + movement_model.total_time
 
+    # Add sampler session stats to metrics
+    metrics.sampler_stats = attention_model.session.stats()
+
+    # Add attention cache stats to metrics
+    if cache is not None:
+        metrics.cache_stats = cache.stats()
+
+    # Add sampler telemetry to metrics
+    metrics.telemetry_stats = {"attention": attention_model.telemetry.stats(),
+                               "movement": movement_model.telemetry.stats()}
+
+    # Add adaptive read stats to metrics
+    if attention_model.reads is not None:
+        metrics.read_stats["attention"] = attention_model.reads.stats()
+    if movement_model.reads is not None:
+        metrics.read_stats["movement"] = movement_model.reads.stats()
+
+    # Add phase stats to metrics
+    metrics.phase_stats = attention_model.profiler.stats()
+    metrics.capture_stats = attention_model.profiler.capture_stats()
+
     return metrics
 
+def main(session=None, iterations=None, width=None, height=None, speed=None, num_reads=None, rng=None):
+    # Use the module's configuration for any parameter that is not given
+    iterations = ITERATIONS if iterations is None else iterations
+    width = WIDTH if width is None else width
+    height = HEIGHT if height is None else height
+    speed = SPEED if speed is None else speed
+    num_reads = NUM_READS if num_reads is None else num_reads
+
+    # Initialize characters (at their fixed locations, or drawn from rng)
+    agent = agent_mod.Agent(width, height, rng=rng)
+    prey = prey_mod.Prey(width, height, rng=rng)
+    predator = predator_mod.Predator(width, height, rng=rng)
+
+    # Initialize the models
+    attention_model, movement_model, cache = init_models(session, width, height, num_reads)
+    profiler = attention_model.profiler
+    profiler.start()
+
+    # Run model for n iterations
+    for _ in range(iterations):
+
+        attn_agent, attn_prey, attn_predator = attention_model.get_attention_levels(agent,
+                                                                                prey,
+                                                                                predator)
+        
+        with profiler.span("avoid_pursue"):
+            # Prey avoids agent
+            prey.avoid(agent.loc, speed)
+            # Predator pursues agent
+            predator.pursue(agent.loc, speed)
+
+        # Use the quantum model for the agent's movement
+        # call the movement model
+
+        # Get the perceived locations
+        with profiler.span("perceive"):
+            agent_perceived = agent.perceive(agent, attn_agent)
+            prey_perceived = agent.perceive(prey, attn_prey)
+            predator_perceived = agent.perceive(predator, attn_predator)
+
+        movement_model.move(agent, agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, speed)
+
+        # Move Agent
+        # agent.move(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, SPEED, BIAS)
+
+    profiler.stop()
+
+    return collect_metrics("Serial Quantum Implementation", agent, prey, predator,
+                           attention_model, movement_model, cache, iterations)
+
 if __name__ == "__main__":
     main()
-    
\ No newline at end of file
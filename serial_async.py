@@ -0,0 +1,158 @@
+"""Predator-Prey Task (Serial Approach, Asynchronous)
+
+This implements the serial approach of serial.py on an asyncio event loop. At
+each time step the attention sampler calls are submitted before the prey and
+the predator move, so their updates overlap with the sampler's latency, and
+while an episode waits on the sampler other episodes keep running. A single
+episode follows the same trajectory as serial.py.
+"""
+
+import asyncio
+import time
+import serial as serial_mod
+from models import sampler as sampler_mod
+from characters import agent as agent_mod
+from characters import predator as predator_mod
+from characters import prey as prey_mod
+from characters import spawn as spawn_mod
+from metrics import profiler as profiler_mod
+
+# Number of episodes run concurrently
+EPISODES = 4
+
+async def run_episode(session=None, iterations=None, width=None, height=None, speed=None, num_reads=None,
+                      rng=None, profiler=None):
+    """Runs one episode of the serial approach, awaiting the sampler calls
+
+    Parameters
+    ----------
+    session : SamplerSession, optional
+        The sampler session shared by both models (default is a new session on the QPU)
+    iterations : int, optional
+        Number of iterations in the game (default is serial.ITERATIONS)
+    width : int, optional
+        Width of the coordinate plane (default is serial.WIDTH)
+    height : int, optional
+        Height of the coordinate plane (default is serial.HEIGHT)
+    speed : float, optional
+        The speed of movement (default is serial.SPEED)
+    num_reads : int, optional
+        Number of reads in the annealer (default is serial.NUM_READS)
+    rng : np.random.Generator, optional
+        The stream the initial locations are drawn from (default is None, i.e.
+        the characters' fixed locations)
+    profiler : Profiler, optional
+        Times the phases of the episode (default is None, i.e. serial.py's profiler)
+
+    Returns
+    -------
+    Metrics
+        The metrics of the episode.
+    """
+    # Use serial.py's configuration for any parameter that is not given
+    iterations = serial_mod.ITERATIONS if iterations is None else iterations
+    width = serial_mod.WIDTH if width is None else width
+    height = serial_mod.HEIGHT if height is None else height
+    speed = serial_mod.SPEED if speed is None else speed
+    num_reads = serial_mod.NUM_READS if num_reads is None else num_reads
+
+    # Initialize characters
+    agent = agent_mod.Agent(width, height, rng=rng)
+    prey = prey_mod.Prey(width, height, rng=rng)
+    predator = predator_mod.Predator(width, height, rng=rng)
+
+    # Initialize the models
+    attention_model, movement_model, cache = serial_mod.init_models(session, width, height, num_reads, profiler)
+    profiler = attention_model.profiler
+    profiler.start()
+
+    # Run model for n iterations
+    for _ in range(iterations):
+
+        # Submit the attention allocation on the current locations
+        attention = attention_model.get_attention_levels_async(agent, prey, predator)
+
+        # Prey avoids agent and predator pursues agent while the sampler is busy
+        with profiler.span("avoid_pursue"):
+            prey.avoid(agent.loc, speed)
+            predator.pursue(agent.loc, speed)
+
+        attn_agent, attn_prey, attn_predator = await attention
+
+        # Get the perceived locations
+        with profiler.span("perceive"):
+            agent_perceived = agent.perceive(agent, attn_agent)
+            prey_perceived = agent.perceive(prey, attn_prey)
+            predator_perceived = agent.perceive(predator, attn_predator)
+
+        await movement_model.move_async(agent, agent_perceived, prey_perceived, predator_perceived,
+                                        prey.loc, predator.loc, speed)
+
+    profiler.stop()
+
+    return serial_mod.collect_metrics("Asynchronous Serial Quantum Implementation", agent, prey, predator,
+                                      attention_model, movement_model, cache, iterations)
+
+async def run_episodes(n, session=None, seed=None, **parameters):
+    """Runs several episodes concurrently on a shared sampler session
+
+    Parameters
+    ----------
+    n : int
+        Number of episodes.
+    session : SamplerSession, optional
+        The sampler session shared by all episodes (default is a new session on the QPU)
+    seed : int, optional
+        Root seed of the episodes' initial locations, each drawn from its own
+        stream (default is None, i.e. every episode starts at the fixed locations)
+    **parameters
+        Parameters for run_episode (e.g. iterations).
+
+    Returns
+    -------
+    [Metrics]
+        The metrics of each episode. With serial.PROFILE_CAPTURE set, the capture
+        covers all the episodes, so every episode reports the same capture.
+
+    Raises
+    ------
+    ValueError
+        If n is not a positive number.
+    """
+    if n <= 0:
+        raise ValueError("n must be positive number")
+
+    if session is None:
+        session = sampler_mod.SamplerSession()
+
+    # One independent stream per episode
+    rngs = [None] * n if seed is None else spawn_mod.streams(seed, n)
+
+    if not (serial_mod.PROFILE and serial_mod.PROFILE_CAPTURE):
+        return await asyncio.gather(*[run_episode(session, rng=rng, **parameters) for rng in rngs])
+
+    # cProfile and tracemalloc are process-wide, so capture once around all the
+    # episodes and time each episode's phases on its own profiler
+    capture = profiler_mod.Profiler(capture=True)
+    capture.start()
+    try:
+        metrics = await asyncio.gather(*[run_episode(session, rng=rng, profiler=profiler_mod.Profiler(), **parameters)
+                                         for rng in rngs])
+    finally:
+        capture.stop()
+
+    capture_stats = capture.capture_stats()
+    for episode_metrics in metrics:
+        episode_metrics.capture_stats = capture_stats
+    return metrics
+
+def main():
+    start_time = time.perf_counter()
+    metrics = asyncio.run(run_episodes(EPISODES))
+    total_time = time.perf_counter() - start_time
+
+    print("Ran " + str(EPISODES) + " episodes in " + "{:.2f}".format(total_time) + " seconds")
+    return metrics
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Parameter Sweep
+
+This runs the Predator-Prey task over a grid of parameters (speed, bias for the
+classical approach or number of reads for the serial approach, width and height,
+and iterations) across a pool of processes. The serial approach runs on a local
+sampler standing in for the QPU (or on the QPU if SAMPLER is None). Each finished
+result is appended to a JSON lines file as soon as it completes, so an interrupted
+sweep can be resumed by running it again with the same output file.
+"""
+
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dwave.samplers import SimulatedAnnealingSampler, SteepestDescentSolver
+import classical as classical_mod
+import serial as serial_mod
+from models import movement_exact as movement_exact_mod
+from models import sampler as sampler_mod
+
+# Either "classical" (classical.py) or "serial" (serial.py)
+IMPLEMENTATION = "classical"
+# Grid of parameters to sweep over (biases for classical.py, numbers of reads for serial.py)
+SPEEDS = [10, 20, 30, 40]
+BIASES = [0.2, 0.4, 0.6, 0.8, 1.0]
+NUM_READS = [1, 5, 25]
+SIZES = [(250, 250), (500, 500), (1000, 1000)]
+ITERATIONS = [10, 100, 1000]
+# File the results are streamed to
+OUTPUT = "sweep.jsonl"
+# Number of worker processes (None uses all cores)
+MAX_WORKERS = None
+# Number of points run by a worker per task (None picks one from the grid size)
+CHUNK_SIZE = None
+# Number of bytes read at a time when looking for the last complete line of the output
+TAIL_BLOCK = 65536
+# Local sampler serial.py runs on (None for the QPU)
+SAMPLER = "simulated_annealing"
+# Local samplers standing in for the QPU
+SAMPLERS = {"exact": movement_exact_mod.ExactMovementSolver,
+            "steepest_descent": SteepestDescentSolver,
+            "simulated_annealing": SimulatedAnnealingSampler}
+
+def expand_grid(speeds, values, sizes, iterations, implementation="classical"):
+    """Expands a grid of parameters into the list of points to run
+
+    Parameters
+    ----------
+    speeds : [float]
+        The speeds of movement.
+    values : [float]
+        The agent's biases on pursuing over avoiding (classical), or the numbers
+        of reads (serial).
+    sizes : [(int, int)]
+        The widths and heights of the coordinate plane.
+    iterations : [int]
+        The numbers of iterations.
+    implementation : str, optional
+        Either "classical" or "serial" (default is "classical")
+
+    Returns
+    -------
+    [dict]
+        One dict of keyword arguments for the implementation's main per point.
+
+    Raises
+    ------
+    ValueError
+        If the implementation does not exist.
+    """
+    if implementation not in ("classical", "serial"):
+        raise ValueError("unknown implementation " + implementation)
+
+    # The classical agent has a bias, the serial one a number of reads
+    name = "bias" if implementation == "classical" else "num_reads"
+
+    points = []
+    for speed, value, (width, height), iters in itertools.product(speeds, values, sizes, iterations):
+        points.append({"iterations": iters, "width": width, "height": height,
+                       "speed": speed, name: value})
+    return points
+
+def point_key(point):
+    """Gets the key that identifies a point of the grid
+
+    Parameters
+    ----------
+    point : dict
+        The point.
+
+    Returns
+    -------
+    str
+        The key.
+    """
+    return json.dumps(point, sort_keys=True)
+
+def run_chunk(points, implementation="classical", sampler=None):
+    """Runs the episodes of several points of the grid (in a worker process)
+
+    Parameters
+    ----------
+    points : [dict]
+        The points to run.
+    implementation : str, optional
+        Either "classical" or "serial" (default is "classical")
+    sampler : str, optional
+        The local sampler serial.py runs on, a key of SAMPLERS (default is None,
+        i.e. the QPU)
+
+    Returns
+    -------
+    [dict]
+        One record per point, with the point and its metrics.
+    """
+    records = []
+    for point in points:
+        if implementation == "classical":
+            metrics = classical_mod.main(**point)
+        else:
+            session = sampler_mod.SamplerSession() if sampler is None else \
+                sampler_mod.SamplerSession(sampler_factory=SAMPLERS[sampler])
+            metrics = serial_mod.main(session, **point)
+        records.append({"point": point, "metrics": metrics.to_dict()})
+    return records
+
+def load_completed(path):
+    """Gets the keys of the points already written to the output file
+
+    A trailing partial line (left by an interrupted sweep) is truncated, and the
+    file is read line by line, so only the keys are held in memory.
+
+    Parameters
+    ----------
+    path : str
+        The output file.
+
+    Returns
+    -------
+    set
+        The keys of the completed points.
+    """
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+
+    # Find the end of the last complete line by reading blocks back from the end
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - TAIL_BLOCK)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+
+    with open(path, "rb") as f:
+        for line in f:
+            completed.add(point_key(json.loads(line)["point"]))
+    return completed
+
+def sweep(points, path, max_workers=None, chunk_size=None, implementation="classical", sampler=None):
+    """Runs all points of the grid that are not in the output file yet
+
+    Parameters
+    ----------
+    points : [dict]
+        The points to run.
+    path : str
+        The output file the results are streamed to.
+    max_workers : int, optional
+        Number of worker processes (default is None, i.e. all cores)
+    chunk_size : int, optional
+        Number of points run by a worker per task (default is None, i.e. enough
+        for about four tasks per worker)
+    implementation : str, optional
+        Either "classical" or "serial" (default is "classical")
+    sampler : str, optional
+        The local sampler serial.py runs on, a key of SAMPLERS (default is None,
+        i.e. the QPU)
+
+    Returns
+    -------
+    int
+        The number of points run. Points of a chunk that failed are reported on
+        stderr and left out of the output file, so resuming the sweep retries them.
+
+    Raises
+    ------
+    ValueError
+        If the sampler does not exist.
+    """
+    if sampler is not None and sampler not in SAMPLERS:
+        raise ValueError("unknown sampler " + sampler)
+
+    completed = load_completed(path)
+    pending = [point for point in points if point_key(point) not in completed]
+    if not pending:
+        return 0
+
+    # Group small tasks together to amortize inter-process overhead
+    workers = max_workers if max_workers is not None else os.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, len(pending) // (workers * 4))
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, open(path, "a") as f:
+        futures = {executor.submit(run_chunk, chunk, implementation, sampler): chunk for chunk in chunks}
+
+        # Stream each result to disk as soon as its chunk completes
+        failed = 0
+        for future in as_completed(futures):
+            try:
+                records = future.result()
+            except Exception as e:
+                # Keep going with the other chunks; the failed points are retried on resume
+                failed += len(futures[future])
+                for point in futures[future]:
+                    print("Failed point " + point_key(point) + ": " + repr(e), file=sys.stderr)
+                continue
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    return len(pending) - failed
+
+def main():
+    values = BIASES if IMPLEMENTATION == "classical" else NUM_READS
+    points = expand_grid(SPEEDS, values, SIZES, ITERATIONS, IMPLEMENTATION)
+    run = sweep(points, OUTPUT, MAX_WORKERS, CHUNK_SIZE, IMPLEMENTATION, SAMPLER)
+    print("Ran " + str(run) + " of " + str(len(points)) + " points (results in " + OUTPUT + ")")
+
+if __name__ == "__main__":
+    main()
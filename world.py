@@ -0,0 +1,260 @@
+"""Predator-Prey Task (Multi-Entity World)
+
+This implements the classical serial approach in a world with many agents, preys,
+and predators. Each kind of character is kept in a uniform-grid spatial index
+(characters/spatial.py) that is updated as the characters move, so that at each
+time step every agent targets its nearest prey and nearest predator, every prey
+avoids its nearest agent, every predator pursues its nearest agent, and contacts
+are found without comparing every pair of characters.
+"""
+
+import time
+import numpy as np
+from models import attention_classical as attention_mod
+from characters import agent as agent_mod
+from characters import predator as predator_mod
+from characters import prey as prey_mod
+from characters import spatial as spatial_mod
+
+# Number of characters of each kind
+AGENTS = 10
+PREYS = 300
+PREDATORS = 300
+# Number of iterations in the game
+ITERATIONS = 100
+# Width and height of the game's coordinate plane
+WIDTH = 5000
+HEIGHT = 5000
+# For now, speed is always constant
+SPEED = 30
+# Bias on pursuing over avoiding for the agent's movement
+BIAS = 0.8
+# If the distance between two characters is less than this it counts as a contact
+BUFFER = 10
+# Width and height of the cells of the spatial indexes
+CELL_SIZE = 100
+# Seed of the characters' initial locations
+SEED = 0
+
+class World:
+    """
+    The World class advances a predator-prey world with many characters of each kind.
+
+    Characters that are caught (agents and preys) leave their index and stop
+    moving; an agent with no prey left stops moving as well.
+
+    ...
+
+    Attributes
+    ----------
+    w : int
+        Width of the coordinate plane
+    h : int
+        Height of the coordinate plane
+    speed : float
+        The speed of movement
+    bias : float
+        The agents' bias on pursuing over avoiding
+    t : int
+        Number of iterations run so far
+    attention_model : AttentionModelClassical
+        The classical attention allocation model shared by the agents
+    agents : [Agent]
+        The agents
+    preys : [Prey]
+        The preys
+    predators : [Predator]
+        The predators
+    agent_index : GridIndex
+        Spatial index of the agents that are alive, keyed by their position in agents
+    prey_index : GridIndex
+        Spatial index of the preys that are alive, keyed by their position in preys
+    predator_index : GridIndex
+        Spatial index of the predators, keyed by their position in predators
+
+    Methods
+    -------
+    step()
+        Advances the world by one iteration.
+    run(iterations)
+        Advances the world by a number of iterations.
+    stats()
+        Summarizes the state of the world.
+    """
+
+    def __init__(self, w, h, agents=AGENTS, preys=PREYS, predators=PREDATORS, speed=SPEED, bias=BIAS,
+                 cell_size=CELL_SIZE, rng=None):
+        """
+        Parameters
+        ----------
+        w : int
+            Width of the coordinate plane
+        h : int
+            Height of the coordinate plane
+        agents : int, optional
+            Number of agents (default is AGENTS)
+        preys : int, optional
+            Number of preys (default is PREYS)
+        predators : int, optional
+            Number of predators (default is PREDATORS)
+        speed : float, optional
+            The speed of movement (default is SPEED)
+        bias : float, optional
+            The agents' bias on pursuing over avoiding (default is BIAS)
+        cell_size : float, optional
+            Width and height of the cells of the spatial indexes (default is CELL_SIZE)
+        rng : np.random.Generator, optional
+            The stream the initial locations are drawn from (default is None, i.e.
+            a new stream seeded with SEED)
+
+        Raises
+        ------
+        ValueError
+            If given arguments are invalid.
+        """
+
+        if agents <= 0 or preys <= 0 or predators <= 0:
+            raise ValueError("agents, preys, and predators must be positive numbers")
+
+        if speed <= 0:
+            raise ValueError("speed must be positive number")
+
+        if bias < 0 or bias > 1:
+            raise ValueError("bias must be a number between 0 and 1")
+
+        rng = np.random.default_rng(SEED) if rng is None else rng
+
+        self.w = w
+        self.h = h
+        self.speed = speed
+        self.bias = bias
+        self.t = 0
+        self.attention_model = attention_mod.AttentionModelClassical(w, h)
+
+        # Initialize characters, each in its own third of the plane
+        self.agents = [agent_mod.Agent(w, h, rng=rng) for _ in range(agents)]
+        self.preys = [prey_mod.Prey(w, h, rng=rng) for _ in range(preys)]
+        self.predators = [predator_mod.Predator(w, h, rng=rng) for _ in range(predators)]
+
+        # Index every character by its location
+        self.agent_index = spatial_mod.GridIndex(cell_size)
+        self.prey_index = spatial_mod.GridIndex(cell_size)
+        self.predator_index = spatial_mod.GridIndex(cell_size)
+        for characters, index in ((self.agents, self.agent_index), (self.preys, self.prey_index),
+                                  (self.predators, self.predator_index)):
+            for i, character in enumerate(characters):
+                index.insert(i, character.loc)
+        return
+
+    def step(self):
+        """Advances the world by one iteration
+
+        Returns
+        -------
+        void
+        """
+        speed = self.speed
+
+        # Each agent that is alive targets its nearest prey and its nearest predator
+        targets = []
+        for i in list(self.agent_index.locs):
+            agent = self.agents[i]
+            prey_key, _ = self.prey_index.nearest(agent.loc)
+            predator_key, _ = self.predator_index.nearest(agent.loc)
+            if prey_key is None:
+                continue
+            prey = self.preys[prey_key]
+            predator = self.predators[predator_key]
+            attention = self.attention_model.get_attention_levels(agent, prey, predator)
+            targets.append((agent, i, prey, predator, attention))
+
+        # Preys avoid their nearest agent (and are caught if it is too close)
+        if len(self.agent_index):
+            for i in list(self.prey_index.locs):
+                prey = self.preys[i]
+                agent_key, _ = self.agent_index.nearest(prey.loc)
+                prey.avoid(self.agents[agent_key].loc, speed)
+                if prey.alive:
+                    self.prey_index.move(i, prey.loc)
+                else:
+                    # The nearest agent caught the prey
+                    self.prey_index.remove(i)
+                    self.agents[agent_key].feasted = True
+
+            # Predators pursue their nearest agent
+            for i, predator in enumerate(self.predators):
+                agent_key, _ = self.agent_index.nearest(predator.loc)
+                predator.pursue(self.agents[agent_key].loc, speed)
+                self.predator_index.move(i, predator.loc)
+
+        # Agents perceive their targets and move
+        for agent, i, prey, predator, (attn_agent, attn_prey, attn_predator) in targets:
+            agent_perceived = agent.perceive(agent, attn_agent)
+            prey_perceived = agent.perceive(prey, attn_prey)
+            predator_perceived = agent.perceive(predator, attn_predator)
+            agent.move(agent_perceived, prey_perceived, predator_perceived, prey.loc, predator.loc, speed,
+                       self.bias)
+
+            # Any predator within the buffer catches the agent
+            for key in self.predator_index.within(agent.loc, BUFFER):
+                self.predators[key].feasted = True
+                agent.alive = False
+
+            # The agent catches every prey within the buffer
+            for key in self.prey_index.within(agent.loc, BUFFER):
+                self.preys[key].alive = False
+                self.prey_index.remove(key)
+                agent.feasted = True
+
+            if agent.alive:
+                self.agent_index.move(i, agent.loc)
+            else:
+                self.agent_index.remove(i)
+
+        self.t += 1
+
+    def run(self, iterations):
+        """Advances the world by a number of iterations
+
+        Parameters
+        ----------
+        iterations : int
+            Number of iterations.
+
+        Returns
+        -------
+        void
+        """
+        for _ in range(iterations):
+            self.step()
+
+    def stats(self):
+        """Summarizes the state of the world
+
+        Returns
+        -------
+        dict
+            The number of iterations run, agents alive, agents that have feasted,
+            preys alive, and predators that have feasted.
+        """
+        return {"iterations": self.t,
+                "agents_alive": len(self.agent_index),
+                "agents_feasted": sum(agent.feasted for agent in self.agents),
+                "preys_alive": len(self.prey_index),
+                "predators_feasted": sum(predator.feasted for predator in self.predators)}
+
+def main():
+    # Initialize the world
+    world = World(WIDTH, HEIGHT)
+
+    # Run the world
+    start_time = time.perf_counter()
+    world.run(ITERATIONS)
+    total_time = time.perf_counter() - start_time
+
+    print(world.stats())
+    print("Steps per second: " + "{:.1f}".format(ITERATIONS / total_time))
+    return world
+
+if __name__ == "__main__":
+    main()